@@ -0,0 +1,73 @@
+"""
+Compara consultas de uma semana de uma estação lendo o arquivo de texto do NEST
+(`load_station_data` + recorte), a pirâmide de agregados (Parquet, nível de 1 minuto)
+e o arquivo binário mapeado em memória (`src.archive`).
+
+    python -m benchmarks.bench_archive --stations 4 --years 3
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_plot import STATIONS
+from benchmarks.synthetic import write_nmdb_file
+from src.archive import StationArchive
+from src.processing import load_station_data
+from src.rollup import read_level, update_pyramid
+
+
+def timed(fn, queries):
+    latencies = []
+    for station, start, end in queries:
+        t0 = time.perf_counter()
+        fn(station, start, end)
+        latencies.append(time.perf_counter() - t0)
+    return np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stations", type=int, default=4)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    stations = STATIONS[:args.stations]
+    start, end = datetime(2020, 1, 1), datetime(2020 + args.years, 1, 1)
+    rng = np.random.default_rng(0)
+    offsets = rng.integers(0, (end - start).days - 7, size=args.queries)
+    queries = [(stations[i % len(stations)], pd.Timestamp(start) + pd.Timedelta(days=int(d)),
+                pd.Timestamp(start) + pd.Timedelta(days=int(d) + 7) - pd.Timedelta(minutes=1))
+               for i, d in enumerate(offsets)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for station in stations:
+            paths[station] = os.path.join(tmp, f"{station}.txt")
+            write_nmdb_file(paths[station], station, start, end)
+            df = load_station_data(paths[station])
+            update_pyramid(station, df, os.path.join(tmp, "rollup"))
+            StationArchive(station, os.path.join(tmp, "archive")).append(df)
+
+        archive_dir, rollup_dir = os.path.join(tmp, "archive"), os.path.join(tmp, "rollup")
+        runs = [
+            ("texto (load_station_data)", lambda s, a, b: load_station_data(paths[s]).loc[a:b], queries[:5]),
+            ("Parquet (rollup 1min)", lambda s, a, b: read_level(s, "1min", rollup_dir, a, b), queries),
+            ("memmap (DataFrame)", lambda s, a, b: StationArchive(s, archive_dir).read(a, b), queries),
+            ("memmap (view)", lambda s, a, b: StationArchive(s, archive_dir).values(a, b), queries),
+        ]
+        size = sum(os.path.getsize(os.path.join(archive_dir, f)) for f in os.listdir(archive_dir))
+        print(f"{len(stations)} estações × {args.years} anos; arquivo binário: {size / 1e6:.1f} MB\n")
+        print(f"{'leitura':<28}{'consultas':>10}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+        for name, fn, qs in runs:
+            latencies = timed(fn, qs)
+            print(f"{name:<28}{len(qs):>10}{np.percentile(latencies, 50):>11.2f}{np.percentile(latencies, 99):>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
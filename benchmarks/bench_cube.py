@@ -0,0 +1,58 @@
+"""
+Compara o DataFrame combinado antigo (`pd.concat(..., axis=1)`, float64 com
+junção externa) com `StationCube` em tempo de construção e memória.
+
+    python -m benchmarks.bench_cube --stations 12 --years 1
+"""
+import argparse
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.bench_plot import STATIONS, TYPES
+from benchmarks.synthetic import station_frame
+from src.cube import StationCube
+
+
+def station_frames(stations, start: datetime, end: datetime, misaligned: bool) -> dict:
+    frames = {}
+    for i, station in enumerate(stations):
+        df = station_frame(station, start, end).rename(columns={
+            "corr_for_efficiency": "RCORR_E", "uncorrected": "RUNCORR", "corr_for_pressure": "RCORR_P"
+        })[TYPES]
+        if misaligned and i % 2:
+            # Metade das estações com relógio deslocado e falhas, como acontece no NMDB
+            df.index = df.index + pd.Timedelta(seconds=30)
+            df = df.iloc[::3]
+        frames[station] = df
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stations", type=int, default=12)
+    parser.add_argument("--years", type=int, default=1)
+    args = parser.parse_args()
+
+    stations = STATIONS[:args.stations]
+    print(f"{'cenário':<14}{'estrutura':<16}{'tempo (s)':>10}{'memória (MB)':>14}{'linhas':>12}")
+    for misaligned in (False, True):
+        frames = station_frames(stations, datetime(2020, 1, 1), datetime(2020 + args.years, 1, 1), misaligned)
+        label = "desalinhado" if misaligned else "alinhado"
+
+        t0 = time.perf_counter()
+        combined = pd.concat(frames.values(), axis=1, keys=frames.keys(), sort=True)
+        elapsed = time.perf_counter() - t0
+        memory = combined.memory_usage(index=True).sum()
+        print(f"{label:<14}{'DataFrame':<16}{elapsed:>10.2f}{memory / 1e6:>14.1f}{len(combined):>12,}")
+        del combined
+
+        t0 = time.perf_counter()
+        cube = StationCube.from_series(frames)
+        elapsed = time.perf_counter() - t0
+        print(f"{label:<14}{'StationCube':<16}{elapsed:>10.2f}{cube.nbytes / 1e6:>14.1f}{len(cube):>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compara o download sequencial (um `download_station_data` por estação) com
+`download_stations` contra o servidor local que imita o NEST.
+
+    python -m benchmarks.bench_download --latency 0.3
+"""
+import argparse
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.standin_server import StandinServer
+from src.download import download_station_data, download_stations
+
+DEFAULT_STATIONS = [
+    "OULU", "APT", "CALG", "CALM", "DRBS",
+    "INVK", "IRK2", "JUNG", "JUNG1", "KERG",
+    "KIEL2", "LMKS", "PTFM", "PWNK", "ROME",
+    "TERA", "THUL"
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=8)
+    args = parser.parse_args()
+
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 2)
+
+    with StandinServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        for station in DEFAULT_STATIONS:
+            download_station_data(station, f"{tmp}/{station}_seq.txt", start_date=start, end_date=end,
+                                  base_url=server.nest_url)
+        sequential = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        results = download_stations(DEFAULT_STATIONS, start, end, tmp, max_workers=args.workers,
+                                    max_per_host=args.per_host, base_url=server.nest_url)
+        concurrent = time.perf_counter() - t0
+
+    print(f"\nSequencial: {sequential:.2f}s")
+    print(f"Paralelo:   {concurrent:.2f}s ({sum(r.ok for r in results.values())}/{len(results)} ok)")
+    print(f"Ganho:      {sequential / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Mede a leitura colunar dos feeds JSON (`src.ingest.read_feed`) contra o caminho
+antigo (json.loads + DataFrame de dicionários + to_datetime com inferência) em
+feeds sintéticos de vários dias.
+
+Cada medição roda em um subprocesso próprio. O pico de memória soma o pico do
+tracemalloc (Python, numpy, pandas) ao pico do pool de memória do Arrow, cujas
+alocações o tracemalloc não vê; o tempo é medido em outra execução, sem tracemalloc.
+
+    python -m benchmarks.bench_ingest --days 7
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.synthetic import swpc_feed_json
+from src.ingest import FEED_SCHEMAS, read_feed
+
+FEEDS = {"goes": "5min", "ace_epam": "1min", "kp_1m": "1min", "kp_gfz": "3h"}
+
+
+def legacy_read(content: bytes, feed: str) -> pd.DataFrame:
+    """Leitura anterior aos esquemas, mantida só para comparação."""
+    data = json.loads(content)
+    if feed == "kp_gfz":
+        df = pd.DataFrame({"datetime": pd.to_datetime(data["datetime"], utc=True), "Kp": data["Kp"], "status": data["status"]})
+        df["datetime"] = df["datetime"].dt.tz_localize(None)
+        return df
+    df = pd.DataFrame(data)
+    time_col = next((col for col in df.columns if col.lower() in ["time_tag", "timestamp", "time", "date"]), None)
+    df[time_col] = pd.to_datetime(df[time_col], errors="coerce", utc=True).dt.tz_localize(None)
+    return df
+
+
+def _read(content: bytes, feed: str, method: str) -> pd.DataFrame:
+    return legacy_read(content, feed) if method == "legado" else read_feed(content, FEED_SCHEMAS[feed])
+
+
+def worker(path: str, feed: str, method: str, what: str) -> None:
+    with open(path, "rb") as f:
+        content = f.read()
+    if what == "tempo":
+        t0 = time.perf_counter()
+        df = _read(content, feed, method)
+        print(json.dumps({"rows": len(df), "elapsed": time.perf_counter() - t0}))
+        return
+
+    tracemalloc.start()
+    df = _read(content, feed, method)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({"peak_mb": (peak + pa.default_memory_pool().max_memory()) / 1e6}))
+
+
+def measure(path: str, feed: str, method: str, what: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_ingest", "--worker", path, feed, method, what],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--feeds", default=",".join(FEEDS))
+    parser.add_argument("--worker", nargs=4, metavar=("PATH", "FEED", "METHOD", "MEDIDA"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    start = datetime(2024, 1, 1)
+    print(f"{'feed':<10}{'método':<10}{'MB':>7}{'registros':>11}{'tempo (s)':>11}{'registros/s':>14}{'pico (MB)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for feed in args.feeds.split(","):
+            content = swpc_feed_json(feed, start, start + timedelta(days=args.days), FEEDS[feed])
+            path = os.path.join(tmp, f"{feed}.json")
+            with open(path, "wb") as f:
+                f.write(content)
+            for method in ("legado", "read_feed"):
+                r = {**measure(path, feed, method, "tempo"), **measure(path, feed, method, "memoria")}
+                print(f"{feed:<10}{method:<10}{len(content) / 1e6:>7.1f}{r['rows']:>11,}{r['elapsed']:>11.3f}"
+                      f"{r['rows'] / r['elapsed']:>14,.0f}{r['peak_mb']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Mede `load_station_data` (leitor em blocos) contra a implementação antiga
+(readlines + split em Python) em arquivos sintéticos de 1 minuto.
+
+    python -m benchmarks.bench_parser --years 2
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.synthetic import write_nmdb_file
+from src.processing import load_station_data
+
+
+def legacy_load_station_data(filepath: str) -> pd.DataFrame:
+    """Implementação anterior de `load_station_data`, mantida só para comparação."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    data_start_index = next((i for i, line in enumerate(lines) if "start_date_time" in line), None)
+    data_lines = [
+        line.strip().split(";")[:4]
+        for line in lines[data_start_index + 1:]
+        if ";" in line
+    ]
+    df = pd.DataFrame(data_lines, columns=["datetime", "RCORR_E", "RUNCORR", "RCORR_P"])
+    df["datetime"] = pd.to_datetime(df["datetime"].str.strip(), format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    for col in ["RCORR_E", "RUNCORR", "RCORR_P"]:
+        df[col] = pd.to_numeric(df[col].str.strip(), errors="coerce")
+    df.dropna(inplace=True)
+    df.set_index("datetime", inplace=True)
+    return df
+
+
+def measure(func, path: str):
+    # Tempo e memória em execuções separadas: o tracemalloc distorce o tempo
+    t0 = time.perf_counter()
+    df = func(path)
+    elapsed = time.perf_counter() - t0
+    del df
+
+    tracemalloc.start()
+    df = func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return df, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "SYNT.txt")
+        n = write_nmdb_file(path, "SYNT", datetime(2020, 1, 1), datetime(2020 + args.years, 1, 1))
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"Arquivo: {n} linhas, {size_mb:.1f} MB")
+
+        candidates = [("load_station_data", load_station_data)]
+        if not args.skip_legacy:
+            candidates.append(("legado (readlines)", legacy_load_station_data))
+
+        print(f"{'parser':<22}{'tempo (s)':>10}{'linhas/s':>14}{'pico (MB)':>12}")
+        for name, func in candidates:
+            df, elapsed, peak = measure(func, path)
+            print(f"{name:<22}{elapsed:>10.2f}{len(df) / elapsed:>14,.0f}{peak / 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Mede a geração dos gráficos por estação: implementação antiga (pyplot, série
+completa, um gráfico por vez) contra `render_station_plots` (Agg, redução
+min-max/LTTB, figura reaproveitada, processos em paralelo).
+
+    python -m benchmarks.bench_plot --stations 6 --years 2 --workers 4
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import station_frame
+from src.plot import render_station_plots
+
+STATIONS = ["OULU", "APT", "CALG", "CALM", "DRBS", "INVK", "IRK2", "JUNG", "KERG", "KIEL2", "ROME", "THUL"]
+TYPES = ["RCORR_E", "RUNCORR", "RCORR_P"]
+
+
+def legacy_plot(df: pd.DataFrame, stations, tipo, save_path: str) -> None:
+    """Implementação anterior de `plot_stations_comparison_by_type`, mantida só para comparação."""
+    for station in stations:
+        for t in tipo:
+            plt.figure(figsize=(14, 6))
+            plt.plot(df.index, df[(station, t)], label=f"{station} - {t}", linewidth=0.7)
+            plt.title(f"Estatísticas da Estação {station} - {t}")
+            plt.xlabel("Data")
+            plt.ylabel("Contagens corrigidas (c/s)")
+            plt.grid(True)
+            plt.legend()
+            plt.tight_layout()
+            plt.savefig(os.path.join(save_path, f"{station}_{t}.png"))
+            plt.close()
+
+
+def combined_frame(stations, start: datetime, end: datetime) -> pd.DataFrame:
+    frames = {}
+    for station in stations:
+        df = station_frame(station, start, end)
+        df = df.rename(columns={
+            "corr_for_efficiency": "RCORR_E", "uncorrected": "RUNCORR", "corr_for_pressure": "RCORR_P"
+        })[TYPES]
+        frames[station] = df
+    combined = pd.concat(frames.values(), axis=1, keys=frames.keys())
+    combined.columns.names = ["station", "type"]
+    return combined
+
+
+def pixel_difference(path_a: str, path_b: str) -> float:
+    a = plt.imread(path_a)
+    b = plt.imread(path_b)
+    if a.shape != b.shape:
+        return 1.0
+    return float(np.any(a != b, axis=-1).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stations", type=int, default=4)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    stations = STATIONS[:args.stations]
+    df = combined_frame(stations, datetime(2020, 1, 1), datetime(2020 + args.years, 1, 1))
+    n_figures = len(stations) * len(TYPES)
+    print(f"{n_figures} gráficos, {len(df):,} pontos por série")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = []
+        if not args.skip_legacy:
+            out = os.path.join(tmp, "legacy")
+            os.makedirs(out)
+            t0 = time.perf_counter()
+            legacy_plot(df, stations, TYPES, out)
+            runs.append(("legado (pyplot)", time.perf_counter() - t0, out))
+
+        for name, method, workers in [
+            ("Agg, sem redução", None, 1),
+            ("Agg + min-max", "minmax", 1),
+            ("Agg + LTTB", "lttb", 1),
+            (f"Agg + min-max, {args.workers} proc.", "minmax", args.workers),
+        ]:
+            out = os.path.join(tmp, f"{method}_{workers}")
+            t0 = time.perf_counter()
+            render_station_plots(df, stations, out, TYPES, method=method, max_workers=workers)
+            runs.append((name, time.perf_counter() - t0, out))
+
+        reference = runs[0][2]
+        sample = f"{stations[0]}_{TYPES[0]}.png"
+        print(f"\n{'renderização':<28}{'tempo (s)':>10}{'gráficos/s':>12}{'pixels diferentes':>20}")
+        for name, elapsed, out in runs:
+            diff = pixel_difference(os.path.join(reference, sample), os.path.join(out, sample))
+            print(f"{name:<28}{elapsed:>10.2f}{n_figures / elapsed:>12.2f}{diff:>19.2%}")
+
+
+if __name__ == "__main__":
+    main()
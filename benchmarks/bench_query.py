@@ -0,0 +1,121 @@
+"""
+Latência do serviço de consultas (`src.query_service`) em localhost: consultas de uma
+semana de estações (pirâmide de agregados) e do GOES. O servidor roda em outro processo,
+reiniciado a cada tipo de consulta; cada tipo é medido com um cliente (cache de partições
+frio e depois quente) e com vários clientes simultâneos.
+
+    python -m benchmarks.bench_query --stations 4 --years 1 --clients 8
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_plot import STATIONS
+from benchmarks.synthetic import swpc_feed_json, write_nmdb_file
+from src.ingest import FEED_SCHEMAS, read_feed
+from src.processing import load_station_data
+from src.query_service import DATASETS, QueryServer
+from src.rollup import update_pyramid
+from src.storage import write_partitioned
+
+
+def build_data(data_dir: str, stations, start: datetime, end: datetime) -> None:
+    for station in stations:
+        path = os.path.join(data_dir, f"{station}.txt")
+        write_nmdb_file(path, station, start, end)
+        update_pyramid(station, load_station_data(path), os.path.join(data_dir, "rollup"))
+        os.remove(path)
+    goes = read_feed(swpc_feed_json("goes", start, end, "5min"), FEED_SCHEMAS["goes"])
+    write_partitioned(goes, os.path.join(data_dir, DATASETS["goes"].path), "time_tag",
+                      ["time_tag", "satellite", "energy"])
+
+
+def serve(data_dir: str, urls, stop) -> None:
+    with QueryServer(data_dir, port=0) as server:
+        urls.put(server.url)
+        stop.wait()
+
+
+def run(url: str, queries, clients: int) -> np.ndarray:
+    # http.client com uma conexão persistente por thread: o custo do cliente fica fora da medida
+    host, port = urlsplit(url).hostname, urlsplit(url).port
+    local = threading.local()
+
+    def one(params):
+        if not hasattr(local, "conn"):
+            local.conn = http.client.HTTPConnection(host, port, timeout=30)
+        t0 = time.perf_counter()
+        local.conn.request("GET", f"/query?{urlencode(params)}")
+        response = local.conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{response.status} para {params}")
+        return time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        return np.array(list(executor.map(one, queries))) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stations", type=int, default=4)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--clients", type=int, default=8)
+    args = parser.parse_args()
+
+    stations = STATIONS[:args.stations]
+    start, end = datetime(2020, 1, 1), datetime(2020 + args.years, 1, 1)
+    rng = np.random.default_rng(0)
+    offsets = rng.integers(0, (end - start).days - 7, size=args.queries)
+
+    def week(d):
+        first = pd.Timestamp(start) + pd.Timedelta(days=int(d))
+        return {"start": first.isoformat(), "end": (first + pd.Timedelta(days=7)).isoformat()}
+
+    workloads = [
+        ("estação 1min", [dict(week(d), dataset="station", station=stations[i % len(stations)])
+                          for i, d in enumerate(offsets)]),
+        ("estação 1h", [dict(week(d), dataset="station", station=stations[i % len(stations)], resolution="1h")
+                        for i, d in enumerate(offsets)]),
+        ("goes 5min", [dict(week(d), dataset="goes", columns="flux") for d in offsets]),
+        ("goes 1h", [dict(week(d), dataset="goes", columns="flux", resolution="1h") for d in offsets]),
+        ("estação 1min arrow", [dict(week(d), dataset="station", station=stations[i % len(stations)],
+                                     format="arrow") for i, d in enumerate(offsets)]),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        build_data(tmp, stations, start, end)
+        print(f"{len(stations)} estações × {args.years} anos + GOES gerados em {time.perf_counter() - t0:.1f}s\n")
+        print(f"{'consulta':<20}{'frio p50':>10}{'p99':>8}{'quente p50':>12}{'p99':>8}"
+              f"{f'{args.clients} clientes p99':>20}{'consultas/s':>13}  (ms)")
+        for name, queries in workloads:
+            urls, stop = multiprocessing.Queue(), multiprocessing.Event()
+            process = multiprocessing.Process(target=serve, args=(tmp, urls, stop))
+            process.start()
+            url = urls.get(timeout=60)
+            try:
+                cold, warm = run(url, queries, 1), run(url, queries, 1)
+                t0 = time.perf_counter()
+                concurrent = run(url, queries, args.clients)
+                rate = len(queries) / (time.perf_counter() - t0)
+            finally:
+                stop.set()
+                process.join()
+            print(f"{name:<20}{np.percentile(cold, 50):>10.2f}{np.percentile(cold, 99):>8.2f}"
+                  f"{np.percentile(warm, 50):>12.2f}{np.percentile(warm, 99):>8.2f}"
+                  f"{np.percentile(concurrent, 99):>20.2f}{rate:>13.0f}")
+
+if __name__ == "__main__":
+    main()
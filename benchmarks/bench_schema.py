@@ -0,0 +1,72 @@
+"""
+Mede, por conjunto de dados, a memória e o tamanho em Parquet antes e depois dos
+tipos do registro de esquemas (`src.schemas`). "Antes" é o DataFrame inferido por
+`pd.DataFrame(json)` (feeds) ou a leitura float64 das estações, gravado como antes
+(snappy); "depois" usa os tipos do esquema e a gravação de `src.storage`.
+
+    python -m benchmarks.bench_schema --days 30
+"""
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from benchmarks.synthetic import station_frame, swpc_feed_json
+from src.schemas import SCHEMAS, enforce, footprint
+from src.storage import _write_atomic, detect_time_column
+
+FEEDS = {"goes": ("goes", "5min"), "kp_1m": ("kp_1m", "1min"), "ace_epam": ("ace_epam", "5min"), "kp_gfz": ("kp_gfz", "3h")}
+
+
+def legacy_frame(feed: str, body: bytes) -> pd.DataFrame:
+    data = json.loads(body)
+    if isinstance(data, dict):
+        data = {k: v for k, v in data.items() if isinstance(v, list)}
+    df = pd.DataFrame(data)
+    time_col = "datetime" if "datetime" in df.columns else "time_tag"
+    df[time_col] = pd.to_datetime(df[time_col])
+    return df
+
+
+def parquet_size(df: pd.DataFrame, typed: bool) -> int:
+    """Partição como gravada antes (snappy) ou agora (`src.storage`: zstd e tempos em delta)."""
+    df = df.reset_index() if df.index.name else df
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "part.parquet")
+        if typed:
+            _write_atomic(df, path, detect_time_column(df))
+        else:
+            df.to_parquet(path, index=False)
+        return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+    start = datetime(2024, 1, 1)
+    end = start + timedelta(days=args.days)
+
+    frames = {}
+    for name, (feed, step) in FEEDS.items():
+        frames[name] = legacy_frame(feed, swpc_feed_json(feed, start, end, step))
+    frames["station"] = station_frame("OULU", start, end).rename(columns={
+        "corr_for_efficiency": "RCORR_E", "uncorrected": "RUNCORR", "corr_for_pressure": "RCORR_P"
+    })[["RCORR_E", "RUNCORR", "RCORR_P"]].rename_axis("datetime")
+
+    print(f"{args.days} dias por conjunto\n")
+    print(f"{'conjunto':<10}{'linhas':>10}{'memória antes':>15}{'depois':>10}{'redução':>9}"
+          f"{'Parquet antes':>15}{'depois':>10}{'redução':>9}")
+    for name, before in frames.items():
+        after = enforce(before, SCHEMAS[name])
+        mem = (footprint(before), footprint(after))
+        disk = (parquet_size(before, False), parquet_size(after, True))
+        print(f"{name:<10}{len(before):>10,}{mem[0] / 1e6:>13.2f}MB{mem[1] / 1e6:>8.2f}MB{mem[0] / mem[1]:>8.1f}x"
+              f"{disk[0] / 1e6:>13.2f}MB{disk[1] / 1e6:>8.2f}MB{disk[0] / disk[1]:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
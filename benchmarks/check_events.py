@@ -0,0 +1,99 @@
+"""
+Verificação de regressão do detector de eventos (`src.events`) com séries sintéticas:
+um decréscimo de Forbush seguido, 30 h depois do início, de um GLE.
+
+- o Forbush só termina quando a queda volta para menos de `drop_pct` (recuperação);
+- o GLE posterior continua sendo detectado, como sem o Forbush antes;
+- processar em blocos (com o estado salvo e restaurado) dá o mesmo resultado.
+
+    python -m benchmarks.check_events
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.events import DetectorConfig, Event, EventDetector
+
+STATIONS = ["OULU", "ROME", "APTY"]
+START = datetime(2024, 1, 1)
+FORBUSH_ONSET = START + timedelta(days=4)
+GLE_ONSET = FORBUSH_ONSET + timedelta(hours=30)
+FORBUSH_RAMP = timedelta(hours=2)
+FORBUSH_RECOVERY = timedelta(hours=12)
+FORBUSH_DEPTHS = [0.07, 0.08, 0.09]
+
+
+def scenario(forbush: bool, gle: bool, days: int = 10) -> Dict[str, pd.DataFrame]:
+    """Séries de 1 minuto com ciclo diário, ruído de contagem e os eventos pedidos."""
+    index = pd.date_range(START, periods=days * 1440, freq="1min")
+    frames = {}
+    for k, station in enumerate(STATIONS):
+        rng = np.random.default_rng(k)
+        days_since = (index - START) / pd.Timedelta("1D")
+        relative = 0.003 * np.sin(2 * np.pi * days_since)
+        if forbush:
+            t = (index - FORBUSH_ONSET) / FORBUSH_RAMP
+            relative -= np.where(t < 0, 0, FORBUSH_DEPTHS[k] * np.minimum(t, 1)
+                                 * np.exp(-np.maximum(t - 1, 0) * (FORBUSH_RAMP / FORBUSH_RECOVERY)))
+        if gle:
+            t = (index - GLE_ONSET) / pd.Timedelta("1h")
+            relative += np.where(t < 0, 0, 0.06 * np.minimum(t / 0.1, 1) * np.exp(-np.maximum(t - 0.1, 0)))
+        values = 100 * (1 + relative) + rng.normal(0, 0.4, len(index))
+        frames[station] = pd.DataFrame({"RCORR_P": values}, index=index)
+    return frames
+
+
+def detect(frames: Dict[str, pd.DataFrame], chunks: int = 1) -> List[Event]:
+    """Detecta os eventos em `chunks` atualizações, salvando e restaurando o estado entre elas."""
+    path = os.path.join(tempfile.mkdtemp(), "detector_state.json")
+    index = next(iter(frames.values())).index
+    events = []
+    for rows in np.array_split(np.arange(len(index)), chunks):
+        detector = EventDetector.load(path)
+        events += detector.update({s: df.iloc[rows] for s, df in frames.items()})
+        detector.save(path)
+    return events + EventDetector.load(path).flush()
+
+
+def main() -> int:
+    config = DetectorConfig()
+    events = detect(scenario(forbush=True, gle=True))
+    kinds = [e.kind for e in events]
+    failures = []
+
+    forbush = [e for e in events if e.kind == "forbush"]
+    if len(forbush) != 1:
+        failures.append(f"esperado 1 Forbush, detectados {kinds}")
+    else:
+        # O evento acaba quando menos de `min_stations` estações seguem abaixo de `drop_pct`
+        depth = 100 * sorted(FORBUSH_DEPTHS)[-config.min_stations]
+        recovered = FORBUSH_ONSET + FORBUSH_RAMP + FORBUSH_RECOVERY * np.log(depth / config.drop_pct)
+        if abs(forbush[0].end - pd.Timestamp(recovered)) > pd.Timedelta("3h"):
+            failures.append(f"Forbush termina em {forbush[0].end}, recuperação em {recovered:%Y-%m-%d %H:%M}")
+
+    alone = [e for e in detect(scenario(forbush=False, gle=True)) if e.kind == "gle"]
+    after = [e for e in events if e.kind == "gle"]
+    if len(alone) != 1 or len(after) != 1:
+        failures.append(f"GLE sem Forbush: {len(alone)}, depois do Forbush: {len(after)} (esperado 1 e 1)")
+    elif abs(after[0].onset - alone[0].onset) > pd.Timedelta("15min"):
+        failures.append(f"GLE depois do Forbush em {after[0].onset}, sozinho em {alone[0].onset}")
+
+    chunked = detect(scenario(forbush=True, gle=True), chunks=7)
+    if [e.to_dict() for e in chunked] != [e.to_dict() for e in events]:
+        failures.append("resultado em blocos difere do resultado em uma atualização")
+
+    for event in events:
+        print(f"{event.kind:<8} {event.onset} → {event.end}  pico {event.amplitude:+.1f}%")
+    for failure in failures:
+        print(f"[FALHA] {failure}")
+    print("ok" if not failures else f"{len(failures)} falha(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
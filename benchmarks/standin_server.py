@@ -0,0 +1,441 @@
+"""
+Servidor HTTP local que imita o draw_graph.php do NEST (NMDB) e os feeds JSON
+do SWPC/GFZ (com ETag, Last-Modified e respostas 304).
+
+Usado para testar e medir os downloads sem depender da rede:
+
+    python -m benchmarks.standin_server --port 8080 --latency 0.5
+
+e então apontar `base_url` para http://127.0.0.1:8080/draw_graph.php.
+"""
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+HTML_HEAD = """<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.01//EN"
+   "http://www.w3.org/TR/html4/strict.dtd">
+<html>
+<head>
+<META http-equiv="Content-Style-Type" content="text/css" charset="UTF-8">
+<style type="text/css">
+html, body {width:100%;height:100%;margin:0px;padding:0px;}
+code {font-family: monospace;text-align: left;}
+</style>
+</head>
+"""
+
+WARNING_TEMPLATE = (
+    '<tr><td><img SRC="IMG/warning.png" border="0" height="18px"></img>'
+    '<font class="general" style="vertical-align:text-top;" >&nbsp;{}</font></td></tr>'
+)
+
+TYPE_LABELS = {
+    "minute": {
+        "corr_for_efficiency": "RCORR_E",
+        "uncorrected": "RUNCORR",
+        "corr_for_pressure": "RCORR_P",
+        "pressure_mbar": "RPRESS",
+    },
+    "hour": {
+        "corr_for_efficiency": "1HCOR_E",
+        "uncorrected": "1HUNCOR",
+        "corr_for_pressure": "1HCOR_P",
+        "pressure_mbar": "1HPRESS",
+    },
+}
+
+
+def synthetic_value(station: str, dtype: str, ts: datetime) -> float:
+    """Valor sintético determinístico para (estação, tipo, instante)."""
+    base = 80.0 + (sum(map(ord, station)) % 150)
+    minutes = ts.timestamp() / 60.0
+    daily = 0.01 * math.sin(2 * math.pi * minutes / 1440.0)
+    pressure = 1000.0 + 8.0 * math.sin(2 * math.pi * minutes / (1440.0 * 5.3))
+    if dtype == "pressure_mbar":
+        return pressure
+    raw = base * (1.0 + daily) * math.exp(-0.0072 * (pressure - 1000.0))
+    if dtype == "uncorrected":
+        return raw
+    corr_p = raw * math.exp(0.0072 * (pressure - 1000.0))
+    if dtype == "corr_for_pressure":
+        return corr_p
+    return corr_p * 1.002
+
+
+def synthetic_values(station: str, dtype: str, times: np.ndarray) -> np.ndarray:
+    """Versão vetorizada de `synthetic_value` para um array de instantes (datetime64)."""
+    base = 80.0 + (sum(map(ord, station)) % 150)
+    minutes = times.astype("datetime64[s]").astype(np.int64) / 60.0
+    daily = 0.01 * np.sin(2 * np.pi * minutes / 1440.0)
+    pressure = 1000.0 + 8.0 * np.sin(2 * np.pi * minutes / (1440.0 * 5.3))
+    if dtype == "pressure_mbar":
+        return pressure
+    raw = base * (1.0 + daily) * np.exp(-0.0072 * (pressure - 1000.0))
+    if dtype == "uncorrected":
+        return raw
+    corr_p = raw * np.exp(0.0072 * (pressure - 1000.0))
+    if dtype == "corr_for_pressure":
+        return corr_p
+    return corr_p * 1.002
+
+
+# Cadência (s) e escala dos índices servidos pela API do GFZ imitada em /app/json/
+GFZ_INDICES = {
+    "Kp": (10800, 28 / 3), "ap": (10800, 400), "Ap": (86400, 400), "Cp": (86400, 2.5), "C9": (86400, 9),
+    "Hp30": (1800, 28 / 3), "Hp60": (3600, 28 / 3), "ap30": (1800, 400), "ap60": (3600, 400),
+    "SN": (86400, 300), "Fobs": (86400, 250), "Fadj": (86400, 250),
+}
+
+
+def gfz_payload(index: str, start: datetime, end: datetime, status: str = "def") -> dict:
+    """Resposta da API do GFZ para [start, end]: valores determinísticos pelo instante."""
+    cadence, scale = GFZ_INDICES[index]
+    first = -(-int(start.replace(tzinfo=timezone.utc).timestamp()) // cadence) * cadence
+    last = int(end.replace(tzinfo=timezone.utc).timestamp())
+    seconds = np.arange(first, last + 1, cadence, dtype=np.int64)
+    values = ((seconds // cadence * 2654435761) % 1000) / 1000 * scale
+    stamps = seconds.astype("datetime64[s]").astype(str)
+    payload = {"meta": {"source": "sintético"}, "datetime": [f"{t}Z" for t in stamps], index: values.round(3).tolist()}
+    if index in ("Kp", "ap", "Ap", "Cp", "C9"):
+        payload["status"] = [status] * len(seconds)
+    return payload
+
+
+def _parse_query_dates(query: dict):
+    def get(name: str, default: int = 0) -> int:
+        return int(query.get(name, [default])[0])
+
+    start = datetime(get("start_year"), get("start_month"), get("start_day"),
+                     get("start_hour"), get("start_min"))
+    end = datetime(get("end_year"), get("end_month"), get("end_day"),
+                   get("end_hour"), get("end_min"))
+    return start, end
+
+
+def render_nest_page(
+    station: str,
+    start: datetime,
+    end: datetime,
+    dtypes: List[str],
+    max_minute_span: timedelta = timedelta(days=7),
+    dtype: Optional[str] = None,
+) -> str:
+    """
+    Gera uma página no formato devolvido pelo NEST em `output=ascii`.
+
+    `dtype` é o tipo principal e `dtypes` os adicionais (`odtype[]`); sem tipo principal
+    o NEST usa corr_for_efficiency e avisa. Se o intervalo for maior que `max_minute_span`
+    a página passa para a tabela horária e inclui os avisos de redução de resolução, como
+    o NEST real faz.
+    """
+    warnings = []
+    if dtype is None:
+        dtype = "corr_for_efficiency"
+        warnings.append("Default data type selected (corr_for_efficiency)")
+    ordered = [dtype] + [d for d in dtypes if d != dtype]
+
+    if end - start > max_minute_span:
+        resolution = "hour"
+        step = timedelta(hours=1)
+        warnings.append("Due to the query length, NEST automatically switched to the 1hour validated values table")
+        table = "1 hour validated"
+        original = "60 min"
+    else:
+        resolution = "minute"
+        step = timedelta(minutes=1)
+        table = "revised"
+        original = "1 min"
+
+    labels = [TYPE_LABELS[resolution].get(d, d.upper()) for d in ordered]
+    parts = [HTML_HEAD, '<body><font class="general"><div class="container">']
+    if warnings:
+        parts.append('<div name ="logdiv" id="logdiv"><table>')
+        parts.extend(WARNING_TEMPLATE.format(w) for w in warnings)
+        parts.append("</table></div>")
+    parts.append("</div></font><pre><code>")
+    parts.append("#_____________ QUERY RESULTS SUMMARY ___________________________________\n")
+    parts.append(f"#        STATION: {station}\n")
+    parts.append(f"#     START TIME: {start:%Y-%m-%d %H:%M:%S} UTC\n")
+    parts.append(f"#       END TIME: {end:%Y-%m-%d %H:%M:%S} UTC\n")
+    parts.append(f"#     NMDB TABLE: {table}\n")
+    parts.append("#      AVERAGING: No\n")
+    parts.append(f"#   ORIGINAL RES: {original}\n")
+    parts.append("#_______________________________________________________________________\n")
+    parts.append("#\n")
+    parts.append("  start_date_time   " + " ".join(labels) + "\n")
+
+    # Valores calculados de uma vez com numpy; só a formatação é feita linha a linha
+    times = np.arange(np.datetime64(start, "s"), np.datetime64(end, "s"), np.timedelta64(step).astype("timedelta64[s]"))
+    if len(times):
+        stamps = np.char.replace(np.datetime_as_string(times), "T", " ").tolist()
+        columns = [synthetic_values(station, d, times).tolist() for d in ordered]
+        row = "%s" + ";%.3f" * len(ordered) + "\n"
+        parts.append("".join([row % values for values in zip(stamps, *columns)]))
+    parts.append("</code></pre><br>Total Running Time:0.001 sec<br></font><br><br></div></body></html>\n\n")
+    return "".join(parts)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "text/html; charset=UTF-8", headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        with server.lock:
+            server.request_log.append(self.path)
+
+        parts = urlsplit(self.path)
+        if parts.path.endswith("draw_graph.php"):
+            self._nest(parse_qs(parts.query))
+        elif parts.path == "/app/json/":
+            self._gfz(parse_qs(parts.query))
+        elif parts.path in server.json_routes:
+            with server.lock:
+                failing = server.failures.get(parts.path, 0)
+                if failing:
+                    server.failures[parts.path] = failing - 1
+            if failing:
+                self._send(503, b"unavailable", "text/plain")
+            else:
+                self._json(parts.path)
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def _json(self, path: str):
+        with self.server.lock:
+            body, etag, last_modified = self.server.json_routes[path]
+        if self.headers.get("If-None-Match") == etag or (
+            self.headers.get("If-None-Match") is None and self.headers.get("If-Modified-Since") == last_modified
+        ):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send(200, body, "application/json", {"ETag": etag, "Last-Modified": last_modified})
+
+    def _gfz(self, query: dict):
+        with self.server.lock:
+            failing = self.server.failures.get("/app/json/", 0)
+            if failing:
+                self.server.failures["/app/json/"] = failing - 1
+        index = query.get("index", ["Kp"])[0]
+        if failing or index not in GFZ_INDICES:
+            self._send(503 if failing else 400, b"unavailable" if failing else b"bad index", "text/plain")
+            return
+        start, end = (datetime.strptime(query[k][0], "%Y-%m-%dT%H:%M:%SZ") for k in ("start", "end"))
+        payload = gfz_payload(index, start, end, query.get("status", ["def"])[0])
+        self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _nest(self, query: dict):
+        station = query.get("stations[]", ["OULU"])[0]
+        if station in self.server.unknown_stations:
+            body = "<!DOCTYPE html><html><body>No data available for the selected period</body></html>"
+            self._send(200, body.encode("utf-8"))
+            return
+        start, end = _parse_query_dates(query)
+        dtype = query.get("dtype", [None])[0]
+        dtypes = query.get("odtype[]", [])
+        page = render_nest_page(station, start, end, dtypes, self.server.max_minute_span, dtype)
+        self._send(200, page.encode("utf-8"))
+
+
+class StandinServer:
+    """
+    Sobe o servidor em uma thread; use como context manager.
+
+    Args:
+        port (int): Porta local (0 escolhe uma porta livre).
+        latency (float): Atraso artificial por requisição, em segundos.
+        max_minute_span (timedelta): Intervalo máximo servido em resolução de 1 minuto.
+        unknown_stations (List[str], optional): Estações que respondem "no data available".
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        max_minute_span: timedelta = timedelta(days=7),
+        unknown_stations: Optional[List[str]] = None,
+    ):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), StandinHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.max_minute_span = max_minute_span
+        self.httpd.unknown_stations = set(unknown_stations or [])
+        self.httpd.lock = threading.Lock()
+        self.httpd.request_log = []
+        self.httpd.json_routes = {}
+        self.httpd.failures = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def nest_url(self) -> str:
+        return f"{self.url}/draw_graph.php"
+
+    @property
+    def gfz_url(self) -> str:
+        return f"{self.url}/app/json/"
+
+    @property
+    def request_log(self) -> List[str]:
+        return self.httpd.request_log
+
+    def set_json(self, path: str, payload) -> None:
+        """Publica (ou atualiza) um feed JSON em `path`, com novo ETag e Last-Modified."""
+        self.set_body(path, json.dumps(payload).encode("utf-8"))
+
+    def set_body(self, path: str, body: bytes) -> None:
+        """Como `set_json`, com o corpo JSON já serializado (feeds sintéticos grandes)."""
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        with self.httpd.lock:
+            self.httpd.json_routes[path] = (body, etag, formatdate(usegmt=True))
+
+    def fail_next(self, path: str, count: int = 1) -> None:
+        """Faz as próximas `count` requisições a `path` responderem 503."""
+        with self.httpd.lock:
+            self.httpd.failures[path] = count
+
+    def start(self) -> "StandinServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _utc(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+
+
+def _swpc_time(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+# Registros sintéticos de cada feed do SWPC, no formato dos JSON reais
+SWPC_FEEDS = {
+    "/json/goes/primary/integral-protons-6-hour.json": lambda ts: [
+        {"time_tag": _swpc_time(ts) + "Z", "satellite": 18, "flux": 0.2 + 0.01 * (ts.minute % 7), "energy": energy}
+        for energy in (">=1 MeV", ">=10 MeV", ">=100 MeV")
+    ],
+    "/json/ace/epam/ace_epam_5m.json": lambda ts: [
+        {"time_tag": _swpc_time(ts), "active": True, "de1": 1200.0 + ts.minute, "p1": 3400.0 + ts.second}
+    ],
+    "/json/ace/sis/ace_sis_5m.json": lambda ts: [
+        {"time_tag": _swpc_time(ts), "active": True, "p10": 0.9 + 0.01 * ts.minute, "p30": 0.3}
+    ],
+    "/json/planetary_k_index_1m.json": lambda ts: [
+        {"time_tag": _swpc_time(ts), "kp_index": 2, "estimated_kp": 2.33, "kp": "2P"}
+    ],
+}
+
+
+class SwpcPublisher:
+    """
+    Publica os feeds do SWPC no servidor local, avançando com o relógio.
+
+    A cada múltiplo de `cadence` (mais `delay`) um novo registro com o instante da
+    fronteira é acrescentado a cada feed, mantendo só os `window` registros mais
+    recentes, como os arquivos rotativos do SWPC.
+
+    Args:
+        server (StandinServer): Servidor onde os feeds são publicados.
+        cadence (Dict[str, float], optional): Cadência (s) por caminho. Defaults para 1 s em todos.
+        delay (float): Atraso da publicação após cada fronteira, em segundos.
+        window (int): Registros mantidos em cada feed.
+    """
+
+    def __init__(self, server: StandinServer, cadence: Optional[dict] = None, delay: float = 0.2, window: int = 30):
+        self.server = server
+        self.cadence = {path: (cadence or {}).get(path, 1.0) for path in SWPC_FEEDS}
+        self.delay = delay
+        self.window = window
+        self.published = {path: [] for path in SWPC_FEEDS}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, path: str, ts: datetime) -> None:
+        batches = self.published[path]
+        batches.append(SWPC_FEEDS[path](ts))
+        del batches[:-self.window]
+        self.server.set_json(path, [record for batch in batches for record in batch])
+
+    def _run(self) -> None:
+        due = {path: (time.time() // c) * c for path, c in self.cadence.items()}
+        for path, boundary in due.items():
+            self.publish(path, _utc(boundary))
+        while not self._stop.is_set():
+            now = time.time()
+            for path, c in self.cadence.items():
+                boundary = (now - self.delay) // c * c
+                if boundary > due[path]:
+                    due[path] = boundary
+                    self.publish(path, _utc(boundary))
+            self._stop.wait(0.05)
+
+    def start(self) -> "SwpcPublisher":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "SwpcPublisher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita o NEST")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--max-minute-days", type=float, default=7.0)
+    args = parser.parse_args()
+
+    server = StandinServer(args.port, args.latency, timedelta(days=args.max_minute_days))
+    print(f"Servidor local em {server.nest_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
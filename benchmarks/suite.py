@@ -0,0 +1,311 @@
+"""
+Suíte de benchmarks com dados sintéticos e o servidor local que imita o NEST e
+os feeds do SWPC/GFZ.
+
+Mede download (NEST em janelas), `load_station_data` (tabelas de 1 minuto e de
+1 hora), extratores (primeira gravação e mesclagem no armazenamento particionado)
+e gráficos, em uma escala configurável. Cada benchmark roda em um subprocesso
+próprio, de modo que o pico de RSS é só dele. Os resultados são comparados com
+`benchmarks/baselines.json`; uma queda de vazão ou um aumento de memória acima do
+limite da baseline conta como regressão, e o código de saída passa a ser 1.
+
+    python -m benchmarks.suite --scale smoke
+    python -m benchmarks.suite --scale smoke --save-baseline
+    python -m benchmarks.suite --stations 40 --days 3650 --only parse,plot
+
+As baselines dependem da máquina: grave-as de novo (`--save-baseline`) ao trocar
+de ambiente.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from benchmarks.synthetic import swpc_feed_json, write_nmdb_file
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+START = datetime(2024, 1, 1)
+
+SCALES = {
+    "smoke": {"stations": 4, "days": 30},
+    "medium": {"stations": 17, "days": 365},
+    "full": {"stations": 40, "days": 3650},
+}
+BENCHMARKS = ["download", "parse", "parse_hourly", "extract", "plot"]
+
+# Tolerância relativa antes de acusar regressão
+DEFAULT_THRESHOLDS = {"throughput": 0.25, "peak_rss_mb": 0.25}
+
+STATION_CODES = [
+    "OULU", "APT", "CALG", "CALM", "DRBS",
+    "INVK", "IRK2", "JUNG", "JUNG1", "KERG",
+    "KIEL2", "LMKS", "PTFM", "PWNK", "ROME",
+    "TERA", "THUL"
+]
+
+
+def station_codes(n: int) -> List[str]:
+    """Códigos reais do NMDB, completados com códigos sintéticos (S018, S019...) se preciso."""
+    return (STATION_CODES + [f"S{i:03d}" for i in range(len(STATION_CODES) + 1, n + 1)])[:n]
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# --- Preparação (processo principal, fora da medição) ---------------------------------
+
+def prepare(workdir: str, stations: List[str], days: int, only: List[str]) -> None:
+    """Gera os arquivos de estação usados por parse, parse_hourly e plot."""
+    end = START + timedelta(days=days)
+    if {"parse", "plot"} & set(only):
+        os.makedirs(os.path.join(workdir, "minute"), exist_ok=True)
+        for i, station in enumerate(stations):
+            write_nmdb_file(os.path.join(workdir, "minute", f"{station}_{START.year}.txt"),
+                            station, START, end, "minute", seed=i)
+    if "parse_hourly" in only:
+        os.makedirs(os.path.join(workdir, "hour"), exist_ok=True)
+        for i, station in enumerate(stations):
+            write_nmdb_file(os.path.join(workdir, "hour", f"{station}_{START.year}.txt"),
+                            station, START, end, "hour", seed=i)
+
+
+# --- Benchmarks (subprocesso) ----------------------------------------------------------
+
+def _stage(summary: List[dict], prefix: str) -> Dict[str, float]:
+    """Soma as medições de `src.instrument` cujo trecho começa com `prefix`."""
+    rows = [g for g in summary if g["stage"].startswith(prefix)]
+    return {
+        "elapsed": sum(g["elapsed"] for g in rows),
+        "bytes": sum(g["bytes"] for g in rows),
+        "rows": sum(g["rows_parsed"] or g["rows_written"] for g in rows),
+    }
+
+
+def bench_download(workdir: str, stations: List[str], days: int, latency: float) -> dict:
+    from benchmarks.standin_server import StandinServer
+    from src import instrument
+    from src.download import DEFAULT_WINDOW, download_stations
+
+    out_dir = os.path.join(workdir, "download")
+    with StandinServer(latency=latency) as server:
+        instrument.enable()
+        t0 = time.perf_counter()
+        download_stations(stations, START, START + timedelta(days=days), out_dir,
+                          base_url=server.nest_url, window=DEFAULT_WINDOW)
+        elapsed = time.perf_counter() - t0
+        stage = _stage(instrument.summary(), "download_station_data")
+        instrument.disable()
+    return {"elapsed": elapsed, "throughput": stage["rows"] / elapsed, "unit": "linhas/s",
+            "mb_per_s": stage["bytes"] / 1e6 / elapsed}
+
+
+def bench_parse(workdir: str, resolution: str) -> dict:
+    from src.processing import load_station_data
+
+    folder = os.path.join(workdir, resolution)
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder))
+    size = sum(os.path.getsize(p) for p in paths)
+    t0 = time.perf_counter()
+    rows = sum(len(load_station_data(p)) for p in paths)
+    elapsed = time.perf_counter() - t0
+    return {"elapsed": elapsed, "throughput": rows / elapsed, "unit": "linhas/s", "mb_per_s": size / 1e6 / elapsed}
+
+
+# Endpoint do ACE -> (feed sintético, cadência)
+ACE_ENDPOINTS = {
+    "epam/ace_epam_5m": ("ace_epam", "5min"),
+    "mag/ace_mag_1h": ("ace_mag", "1h"),
+    "sis/ace_sis_5m": ("ace_sis", "5min"),
+    "swepam/ace_swepam_1h": ("ace_swepam", "1h"),
+}
+
+
+def _publish_feeds(server, start: datetime, end: datetime) -> None:
+    server.set_body("/json/goes/primary/integral-protons-3-day.json", swpc_feed_json("goes", start, end, "5min"))
+    for path, (feed, step) in ACE_ENDPOINTS.items():
+        server.set_body(f"/json/ace/{path}.json", swpc_feed_json(feed, start, end, step))
+    server.set_body("/json/planetary_k_index_1m.json", swpc_feed_json("kp_1m", start, end, "1min"))
+    server.set_body("/kp", swpc_feed_json("kp_gfz", start, end, "3h"))
+
+
+def bench_extract(workdir: str, days: int, latency: float) -> dict:
+    """Duas rodadas: gravação inicial e mesclagem de uma janela deslocada em 1 dia."""
+    from benchmarks.standin_server import StandinServer
+    from src import instrument
+    from src.extractors import extract_ace_all, extract_goes, extract_kp, extract_kp_gfz_xlsx
+
+    data_dir = os.path.join(workdir, "extract")
+    end = START + timedelta(days=days)
+
+    def run_all(url: str) -> None:
+        extract_goes(os.path.join(data_dir, "goes.xlsx"), base_url=url, data_dir=data_dir)
+        extract_ace_all(os.path.join(data_dir, "ace"), base_url=url, data_dir=data_dir)
+        extract_kp(os.path.join(data_dir, "kp.xlsx"), base_url=url, data_dir=data_dir)
+        extract_kp_gfz_xlsx(f"{START:%Y-%m-%dT%H:%M:%SZ}", f"{end:%Y-%m-%dT%H:%M:%SZ}",
+                            os.path.join(data_dir, "kp_gfz.xlsx"), url=url + "/kp", data_dir=data_dir)
+
+    result = {}
+    with StandinServer(latency=latency) as server:
+        instrument.enable()
+        elapsed = 0.0
+        for label, shift in (("write", timedelta(0)), ("merge", timedelta(days=1))):
+            _publish_feeds(server, START + shift, end + shift)
+            t0 = time.perf_counter()
+            run_all(server.url)
+            result[f"{label}_s"] = time.perf_counter() - t0
+            elapsed += result[f"{label}_s"]
+        stage = _stage(instrument.summary(), "extract_")
+        instrument.disable()
+    return {"elapsed": elapsed, "throughput": stage["rows"] / elapsed, "unit": "linhas/s",
+            "mb_per_s": stage["bytes"] / 1e6 / elapsed, **result}
+
+
+def bench_plot(workdir: str) -> dict:
+    from src.cube import StationCube
+    from src.plot import render_station_plots
+    from src.processing import load_station_data
+
+    folder = os.path.join(workdir, "minute")
+    frames = {name.split("_")[0]: load_station_data(os.path.join(folder, name)) for name in sorted(os.listdir(folder))}
+    cube = StationCube.from_series(frames)
+    t0 = time.perf_counter()
+    files = render_station_plots(cube, cube.stations, os.path.join(workdir, "plots"))
+    elapsed = time.perf_counter() - t0
+    return {"elapsed": elapsed, "throughput": len(files) / elapsed, "unit": "gráficos/s"}
+
+
+def worker(name: str, workdir: str, stations: List[str], days: int, latency: float) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        if name == "download":
+            result = bench_download(workdir, stations, days, latency)
+        elif name == "parse":
+            result = bench_parse(workdir, "minute")
+        elif name == "parse_hourly":
+            result = bench_parse(workdir, "hour")
+        elif name == "extract":
+            result = bench_extract(workdir, days, latency)
+        elif name == "plot":
+            result = bench_plot(workdir)
+        else:
+            raise ValueError(f"Benchmark desconhecido: {name}. Use um de {BENCHMARKS}.")
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def measure(name: str, workdir: str, stations: List[str], days: int, latency: float) -> dict:
+    params = json.dumps({"workdir": workdir, "stations": stations, "days": days, "latency": latency})
+    out = subprocess.run([sys.executable, "-m", "benchmarks.suite", "--worker", name, params],
+                         capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"Benchmark {name} falhou:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# --- Baselines ---------------------------------------------------------------------------
+
+def load_baselines(path: str = BASELINES_PATH) -> dict:
+    if not os.path.exists(path):
+        return {"thresholds": dict(DEFAULT_THRESHOLDS), "scales": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(result: dict, baseline: Optional[dict], thresholds: Dict[str, float]) -> List[str]:
+    """
+    Compara um resultado com a baseline.
+
+    Returns:
+        List[str]: Regressões encontradas (vazia se tudo dentro dos limites).
+    """
+    if not baseline:
+        return []
+    problems = []
+    limit = thresholds.get("throughput", DEFAULT_THRESHOLDS["throughput"])
+    if result["throughput"] < baseline["throughput"] * (1 - limit):
+        problems.append(f"vazão {result['throughput']:,.0f} < {baseline['throughput']:,.0f} -{limit:.0%}")
+    limit = thresholds.get("peak_rss_mb", DEFAULT_THRESHOLDS["peak_rss_mb"])
+    if result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + limit):
+        problems.append(f"memória {result['peak_rss_mb']:.0f} MB > {baseline['peak_rss_mb']:.0f} MB +{limit:.0%}")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks com dados sintéticos e baselines de regressão.")
+    parser.add_argument("--scale", choices=SCALES, default="smoke")
+    parser.add_argument("--stations", type=int, help="Sobrepõe o número de estações da escala")
+    parser.add_argument("--days", type=int, help="Sobrepõe o número de dias da escala")
+    parser.add_argument("--latency", type=float, default=0.05, help="Atraso por requisição do servidor local (s)")
+    parser.add_argument("--only", help=f"Benchmarks separados por vírgula ({','.join(BENCHMARKS)})")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como nova baseline")
+    parser.add_argument("--output", help="Grava os resultados em JSON")
+    parser.add_argument("--worker", nargs=2, metavar=("NOME", "PARAMS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        name, params = args.worker
+        print(json.dumps(worker(name, **json.loads(params))))
+        return 0
+
+    n_stations = args.stations or SCALES[args.scale]["stations"]
+    days = args.days or SCALES[args.scale]["days"]
+    only = args.only.split(",") if args.only else BENCHMARKS
+    stations = station_codes(n_stations)
+    key = f"{n_stations}x{days}d"
+
+    baselines = load_baselines(args.baselines)
+    scale_baselines = baselines["scales"].get(key, {})
+    thresholds = baselines.get("thresholds", DEFAULT_THRESHOLDS)
+
+    print(f"Escala {key}: {n_stations} estações × {days} dias (1 minuto), latência {args.latency}s")
+    results, regressions = {}, 0
+    with tempfile.TemporaryDirectory() as workdir:
+        t0 = time.perf_counter()
+        prepare(workdir, stations, days, only)
+        print(f"Dados sintéticos gerados em {time.perf_counter() - t0:.1f}s\n")
+
+        print(f"{'benchmark':<14}{'tempo (s)':>10}{'vazão':>14} {'unidade':<12}{'MB/s':>8}{'pico RSS (MB)':>15}  status")
+        for name in only:
+            r = measure(name, workdir, stations, days, args.latency)
+            problems = compare(r, scale_baselines.get(name), thresholds)
+            regressions += bool(problems)
+            status = "sem baseline" if name not in scale_baselines else ("REGRESSÃO: " + "; ".join(problems) if problems else "ok")
+            mb_s = f"{r['mb_per_s']:.1f}" if "mb_per_s" in r else "-"
+            print(f"{name:<14}{r['elapsed']:>10.2f}{r['throughput']:>14,.1f} {r['unit']:<12}{mb_s:>8}"
+                  f"{r['peak_rss_mb']:>15.0f}  {status}")
+            results[name] = r
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"scale": key, "latency": args.latency, "results": results}, f, indent=2)
+
+    if args.save_baseline:
+        baselines.setdefault("thresholds", dict(DEFAULT_THRESHOLDS))
+        baselines.setdefault("scales", {})[key] = {
+            name: {"throughput": round(r["throughput"], 2), "peak_rss_mb": round(r["peak_rss_mb"], 1)}
+            for name, r in results.items()
+        }
+        baselines["machine"] = {"platform": platform.platform(), "python": platform.python_version(),
+                                "cpus": os.cpu_count(), "recorded_at": datetime.now().isoformat(timespec="seconds")}
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2)
+        print(f"\nBaseline {key} gravada em {args.baselines}")
+        return 0
+
+    if regressions:
+        print(f"\n{regressions} benchmark(s) com regressão.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
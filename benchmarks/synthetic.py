@@ -0,0 +1,156 @@
+"""
+Geração de dados sintéticos realistas para os benchmarks.
+"""
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.standin_server import HTML_HEAD, TYPE_LABELS
+
+NEST_TYPES = ["corr_for_efficiency", "uncorrected", "corr_for_pressure"]
+
+
+def station_frame(
+    station: str,
+    start: datetime,
+    end: datetime,
+    resolution: str = "minute",
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Série sintética de uma estação: ciclo diário, decréscimos de Forbush ocasionais,
+    ruído de contagem e pressão com a correção barométrica aplicada.
+
+    Returns:
+        pd.DataFrame: Colunas no formato do NEST (corr_for_efficiency, uncorrected,
+        corr_for_pressure, pressure_mbar), indexadas por `start_date_time`.
+    """
+    freq = "1min" if resolution == "minute" else "1h"
+    index = pd.date_range(start, end, freq=freq, inclusive="left", name="start_date_time")
+    n = len(index)
+    rng = np.random.default_rng(seed + sum(map(ord, station)))
+
+    minutes = (index.asi8 // 60_000_000_000).astype(np.float64)
+    base = 80.0 + (sum(map(ord, station)) % 150)
+    daily = 0.003 * np.sin(2 * np.pi * minutes / 1440.0)
+
+    forbush = np.zeros(n)
+    step_minutes = 1 if resolution == "minute" else 60
+    for onset in rng.integers(0, max(n, 1), size=max(1, n // (200_000 // step_minutes + 1))):
+        recovery = np.arange(n - onset) * step_minutes / (1440.0 * 3)
+        forbush[onset:] -= rng.uniform(0.03, 0.08) * np.exp(-recovery)
+
+    pressure = 1000.0 + 8.0 * np.sin(2 * np.pi * minutes / (1440.0 * 5.3)) + rng.normal(0, 0.3, n)
+    corr_p = base * (1.0 + daily + forbush) + rng.normal(0, 0.01 * base, n)
+    uncorrected = corr_p * np.exp(-0.0072 * (pressure - 1000.0))
+
+    return pd.DataFrame({
+        "corr_for_efficiency": corr_p * 1.002,
+        "uncorrected": uncorrected,
+        "corr_for_pressure": corr_p,
+        "pressure_mbar": pressure,
+    }, index=index)
+
+
+def write_nmdb_file(
+    path: str,
+    station: str,
+    start: datetime,
+    end: datetime,
+    resolution: str = "minute",
+    dtypes=None,
+    html: bool = True,
+    seed: int = 0
+) -> int:
+    """
+    Grava um arquivo no formato ASCII do NEST (HTML + bloco <pre>), com cabeçalho
+    de 1 minuto (RCORR_E ...) ou de 1 hora (1HCOR_E ...).
+
+    Returns:
+        int: Número de linhas de dados gravadas.
+    """
+    dtypes = dtypes or NEST_TYPES
+    df = station_frame(station, start, end, resolution, seed)[dtypes]
+    labels = [TYPE_LABELS[resolution][d] for d in dtypes]
+
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        if html:
+            f.write(HTML_HEAD)
+            f.write('<body><font class="general"><div class="container">')
+            f.write("FROM OULU_1h WHERE start_date_time >='2024-01-01 00:00:00'</div></font>")
+        f.write("<pre><code>#_____________ QUERY RESULTS SUMMARY ___________________________________\n")
+        f.write(f"#        STATION: {station}\n")
+        f.write("#_______________________________________________________________________\n#\n")
+        f.write("  start_date_time   " + " ".join(labels) + "\n")
+        df.to_csv(f, sep=";", header=False, float_format="%.3f", date_format="%Y-%m-%d %H:%M:%S")
+        f.write("</code></pre><br>Total Running Time:0.001 sec<br></font><br><br></div></body></html>\n\n")
+    return len(df)
+
+
+GOES_ENERGIES = [">=1 MeV", ">=5 MeV", ">=10 MeV", ">=30 MeV", ">=50 MeV", ">=100 MeV", ">=500 MeV"]
+ACE_EPAM_FIELDS = ["de1", "de4", "p1", "p3", "p5", "p7", "p8", "e1", "e2"]
+# Demais feeds do ACE: campo -> (distribuição do numpy, parâmetro 1, parâmetro 2)
+ACE_FIELDS = {
+    "ace_mag": {"bx_gsm": ("normal", 0.0, 4.0), "by_gsm": ("normal", 0.0, 4.0), "bz_gsm": ("normal", 0.0, 4.0),
+                "lat_gsm": ("normal", 0.0, 30.0), "lon_gsm": ("uniform", 0.0, 360.0), "bt": ("lognormal", 1.7, 0.4)},
+    "ace_sis": {"p10": ("lognormal", 0.0, 1.0), "p30": ("lognormal", -1.0, 1.0)},
+    "ace_swepam": {"dens": ("lognormal", 1.6, 0.5), "speed": ("normal", 420.0, 80.0),
+                   "temperature": ("lognormal", 11.5, 0.6)},
+}
+
+
+def swpc_feed_json(feed: str, start: datetime, end: datetime, step: str = "1min", seed: int = 0) -> bytes:
+    """
+    Corpo JSON sintético de um feed do SWPC ou do GFZ no intervalo [start, end).
+
+    Args:
+        feed (str): "goes" (uma linha por energia), "ace_epam", "ace_mag", "ace_sis", "ace_swepam",
+            "kp_1m" ou "kp_gfz" (objeto de listas).
+        start (datetime): Início.
+        end (datetime): Fim (exclusivo).
+        step (str): Cadência dos registros.
+        seed (int): Semente do gerador.
+
+    Returns:
+        bytes: JSON no formato do serviço.
+    """
+    index = pd.date_range(start, end, freq=step, inclusive="left")
+    rng = np.random.default_rng(seed)
+    stamps = index.strftime("%Y-%m-%dT%H:%M:%S").tolist()
+
+    if feed == "goes":
+        flux = rng.lognormal(-1.0, 1.0, (len(index), len(GOES_ENERGIES))).round(6)
+        records = [
+            {"time_tag": ts + "Z", "satellite": 18, "flux": float(flux[i, j]), "energy": energy}
+            for i, ts in enumerate(stamps) for j, energy in enumerate(GOES_ENERGIES)
+        ]
+    elif feed == "ace_epam":
+        values = rng.lognormal(5.0, 1.0, (len(index), len(ACE_EPAM_FIELDS))).round(3)
+        records = [
+            {"time_tag": ts, "active": True, **dict(zip(ACE_EPAM_FIELDS, map(float, values[i])))}
+            for i, ts in enumerate(stamps)
+        ]
+    elif feed in ACE_FIELDS:
+        values = {name: getattr(rng, dist)(a, b, len(index)).round(3) for name, (dist, a, b) in ACE_FIELDS[feed].items()}
+        records = [
+            {"time_tag": ts, "active": True, **{name: float(column[i]) for name, column in values.items()}}
+            for i, ts in enumerate(stamps)
+        ]
+    elif feed == "kp_1m":
+        kp = rng.integers(0, 28, len(index)) / 3
+        records = [
+            {"time_tag": ts, "kp_index": int(kp[i]), "estimated_kp": round(float(kp[i]), 2), "kp": f"{int(kp[i])}P"}
+            for i, ts in enumerate(stamps)
+        ]
+    elif feed == "kp_gfz":
+        return json.dumps({
+            "meta": {"source": "sintético"},
+            "datetime": [ts + "Z" for ts in stamps],
+            "Kp": (rng.integers(0, 28, len(index)) / 3).round(3).tolist(),
+            "status": ["def"] * len(index),
+        }).encode()
+    else:
+        raise ValueError(f"Feed sintético desconhecido: {feed}")
+    return json.dumps(records).encode()
@@ -1,11 +1,13 @@
 import requests
 import pandas as pd
-import os
 
-def update_kp_from_json_url(url, save_path):
+from src.storage import update_store
+
+def update_kp_from_json_url(url, save_path, export_xlsx=False):
     """
-    Atualiza incrementalmente o arquivo Kp usando um JSON do GFZ Potsdam.
+    Atualiza incrementalmente o armazenamento Kp usando um JSON do GFZ Potsdam.
     Se já existir, só adiciona o que for novo, sem duplicar.
+    Com export_xlsx=True também regrava o arquivo Excel em save_path.
     """
     try:
         # Baixa os dados
@@ -21,20 +23,8 @@ def update_kp_from_json_url(url, save_path):
         })
         df_new["datetime"] = df_new["datetime"].dt.tz_localize(None)  # Remove timezone para merge
         
-        # Se já existe arquivo, concatena incrementalmente (sem duplicatas)
-        if os.path.exists(save_path):
-            df_existing = pd.read_excel(save_path)
-            df_existing["datetime"] = pd.to_datetime(df_existing["datetime"], errors="coerce")
-            df_existing["datetime"] = df_existing["datetime"].dt.tz_localize(None)
-            frames_to_concat = [df_existing, df_new]
-            frames_to_concat = [df for df in frames_to_concat if not df.empty]
-            df_final = pd.concat(frames_to_concat, ignore_index=True)
-            df_final.drop_duplicates(subset=["datetime"], inplace=True)
-        else:
-            df_final = df_new
-
-        df_final.sort_values("datetime", inplace=True)
-        df_final.to_excel(save_path, index=False)
+        # Grava só as partições mensais que recebem dados novos (sem duplicatas)
+        update_store(df_new, save_path, "datetime", ["datetime"], export_xlsx)
         print(f"Arquivo atualizado: {save_path} ({len(df_new)} novos registros baixados)")
     except Exception as e:
         print(f"Erro na atualização do arquivo Kp: {e}")
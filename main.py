@@ -1,11 +1,7 @@
 # run_pipeline.py
-from src.download import download_station_data
-from src.processing import load_station_data
-from src.plot import plot_stations_comparison_by_type
-from src.extractors import extract_goes, extract_kp, extract_ace_all, extract_kp_gfz_xlsx
+from src.pipeline import PipelineConfig, run
 
 import os
-import pandas as pd
 from datetime import datetime
 import shutil
 import stat
@@ -25,11 +21,14 @@ def run_pipeline():
         END_DATE = datetime.today()
 
     EXTRACT_STATION = input("Extrair dados das estações? (s/n): ").lower().startswith("s")
+    UPDATE_STATIONS = EXTRACT_STATION and input("Baixar só os dados novos das estações (após o último registro salvo)? (s/n): ").lower().startswith("s")
     EXTRACT_GOES = input("Extrair dados do satélite GOES? (s/n): ").lower().startswith("s")
     EXTRACT_KP = input("Extrair índice Kp? (s/n): ").lower().startswith("s")
     EXTRACT_KP_GFZ = input("Extrair índice Kp GFZ? (s/n): ").lower().startswith("s")
     EXTRACT_ACE = input("Extrair dados do satélite ACE? (s/n): ").lower().startswith("s")
 
+    EXPORT_XLSX = input("Exportar também para Excel (.xlsx)? (s/n): ").lower().startswith("s")
+
     DELETE_DATA = input("Deseja apagar os dados e gráficos anteriores? (s/n): ").lower().startswith("s")
 
     stations_input = input("Digite os códigos das estações separados por vírgula (ou ENTER para padrão): ")
@@ -63,64 +62,26 @@ def run_pipeline():
                 else:
                     print(f"Diretório mantido: {d}")
 
-    for d in [station_data_dir, goes_data_dir, kp_data_dir, ace_data_dir, plot_dir]:
-        os.makedirs(d, exist_ok=True)
-
-    # ========== Estações ==========
-    if EXTRACT_STATION:
-        dataframes = {}
-        for station in stations:
-            filename = f"{station}_{START_DATE.year}.txt"
-            file_path = os.path.join(station_data_dir, filename)
-            download_station_data(station, file_path, start_date=START_DATE, end_date=END_DATE)
-
-            if os.path.exists(file_path):
-                try:
-                    df = load_station_data(file_path)
-                    dataframes[station] = df
-                except Exception as e:
-                    print(f"Erro ao processar {station}: {e}")
-
-        if dataframes:
-            combined_df = pd.concat(dataframes.values(), axis=1, keys=dataframes.keys())
-            combined_df.columns.names = ["station", "type"]
-
-            plot_stations_comparison_by_type(
-                df=combined_df,
-                stations=list(dataframes.keys()),
-                tipo=["RCORR_E", "RUNCORR", "RCORR_P"],
-                save_path=plot_dir
-            )
-        else:
-            print("Nenhuma estação válida carregada.")
-
-    # ========== GOES ==========
-    if EXTRACT_GOES:
-        extract_goes(save_path=os.path.join(goes_data_dir, "goes_protons.xlsx"))
-
-    # ========== ACE ==========
-    if EXTRACT_ACE:
-        # extract_ace(save_path=os.path.join(ace_data_dir, "ace_solar_wind.xlsx"))
-        extract_ace_all(os.path.join(ace_data_dir))
-
-
-    # ========== Kp ==========
-    if EXTRACT_KP:
-        extract_kp(save_path=os.path.join(kp_data_dir, "kp_index_1min.xlsx"))
-
-    if EXTRACT_KP_GFZ:
-        start_iso = START_DATE.strftime("%Y-%m-%dT00:00:00Z")
-        end_iso = END_DATE.strftime("%Y-%m-%dT23:59:59Z")
-        # extract_kp_gfz_xlsx(
-        #     start=start_iso,
-        #     end=end_iso,
-        #     save_path=os.path.join(kp_data_dir, "dados_kp_gfz.xlsx")
-        # )
-        extract_kp_gfz_xlsx(
-            start="2022-01-30T00:00:00Z",
-            end="2022-02-02T23:59:59Z",
-            save_path=os.path.join(kp_data_dir, "dados_kp_gfz.xlsx")
-        )
+    # ========== Execução ==========
+    # Fontes independentes (estações, GOES, ACE, Kp) rodam em paralelo; ver src/pipeline.py
+    sources = [name for name, enabled in [
+        ("stations", EXTRACT_STATION),
+        ("goes", EXTRACT_GOES),
+        ("ace", EXTRACT_ACE),
+        ("kp", EXTRACT_KP),
+        ("kp_gfz", EXTRACT_KP_GFZ),
+    ] if enabled]
+
+    config = PipelineConfig(
+        start=START_DATE,
+        end=END_DATE,
+        sources=sources,
+        stations=stations,
+        update_stations=UPDATE_STATIONS,
+        export_xlsx=EXPORT_XLSX,
+        plot_dir=plot_dir,
+    )
+    run(config)
 
 if __name__ == "__main__":
     run_pipeline()
@@ -1,7 +1,5 @@
 # run_extract_stations_kp.py
-from src.download import download_station_data
-from src.processing import load_station_data
-from src.extractors import extract_kp, extract_kp_gfz_xlsx
+from src.pipeline import PipelineConfig, run
 
 import os
 import pandas as pd
@@ -23,8 +21,10 @@ def run_pipeline():
         END_DATE = datetime.today()
 
     EXTRACT_STATION = input("Extrair dados das estações? (s/n): ").lower().startswith("s")
+    UPDATE_STATIONS = EXTRACT_STATION and input("Baixar só os dados novos das estações (após o último registro salvo)? (s/n): ").lower().startswith("s")
     EXTRACT_KP_NOAA = input("Extrair índice Kp NOAA? (s/n): ").lower().startswith("s")
     EXTRACT_KP_GFZ = input("Extrair índice Kp GFZ? (s/n): ").lower().startswith("s")
+    EXPORT_XLSX = input("Exportar também para Excel (.xlsx)? (s/n): ").lower().startswith("s")
     DELETE_DATA = input("Deseja apagar os dados anteriores? (s/n): ").lower().startswith("s")
 
     stations_input = input("Digite os códigos das estações separados por vírgula (ou ENTER para padrão): ")
@@ -54,35 +54,23 @@ def run_pipeline():
                 else:
                     print(f"Diretório mantido: {d}")
 
-    for d in [station_data_dir, kp_data_dir]:
-        os.makedirs(d, exist_ok=True)
+    # ========== Execução ==========
+    sources = [name for name, enabled in [
+        ("stations", EXTRACT_STATION),
+        ("kp", EXTRACT_KP_NOAA),
+        ("kp_gfz", EXTRACT_KP_GFZ),
+    ] if enabled]
 
-    # ========== Estações ==========
-    if EXTRACT_STATION:
-        for station in stations:
-            filename = f"{station}_{START_DATE.year}.txt"
-            file_path = os.path.join(station_data_dir, filename)
-            download_station_data(station, file_path, start_date=START_DATE, end_date=END_DATE)
-            if os.path.exists(file_path):
-                try:
-                    _ = load_station_data(file_path)
-                    print(f"Estação {station} processada com sucesso.")
-                except Exception as e:
-                    print(f"Erro ao processar {station}: {e}")
-
-    # ========== Kp NOAA ==========
-    if EXTRACT_KP_NOAA:
-        extract_kp(save_path=os.path.join(kp_data_dir, "kp_index_1min.xlsx"))
-
-    # ========== Kp GFZ ==========
-    if EXTRACT_KP_GFZ:
-        start_iso = START_DATE.strftime("%Y-%m-%dT00:00:00Z")
-        end_iso = END_DATE.strftime("%Y-%m-%dT23:59:59Z")
-        extract_kp_gfz_xlsx(
-            start=start_iso,
-            end=end_iso,
-            save_path=os.path.join(kp_data_dir, "dados_kp_gfz.xlsx")
-        )
+    config = PipelineConfig(
+        start=START_DATE,
+        end=END_DATE,
+        sources=sources,
+        stations=stations,
+        update_stations=UPDATE_STATIONS,
+        export_xlsx=EXPORT_XLSX,
+        plot=False,
+    )
+    run(config)
 
 if __name__ == "__main__":
     run_pipeline()
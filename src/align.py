@@ -0,0 +1,348 @@
+import argparse
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.storage import last_timestamp, list_partitions, read_partitioned, store_dir, write_partitioned
+
+DEFAULT_ALIGNED_DIR = os.path.join("data", "aligned")
+DEFAULT_OVERLAP = timedelta(hours=2)
+TIME_COL = "datetime"
+COLUMN_SEPARATOR = "/"
+
+Loader = Callable[[Optional[datetime], Optional[datetime]], pd.DataFrame]
+
+
+@dataclass
+class Source:
+    """
+    Série de entrada do alinhamento.
+
+    Attributes:
+        name (str): Nome da fonte (primeiro nível das colunas do resultado).
+        load (Callable): Recebe (início, fim) e devolve um DataFrame indexado por tempo,
+            com uma coluna numérica por variável.
+        cadence (pd.Timedelta): Cadência nominal da fonte.
+        how (str): "asof" (último valor até o instante da grade), "interval" (agrega os
+            valores de cada intervalo da grade) ou "auto" (interval se a fonte for mais
+            fina que a grade, asof caso contrário).
+        agg (str): Agregação dos intervalos ("mean", "max", "min", "last", "sum", "count").
+        staleness (pd.Timedelta, optional): Idade máxima de um valor no modo asof;
+            valores mais velhos viram NaN. Defaults para a cadência.
+        latest (Callable, optional): Devolve o instante mais recente disponível na fonte.
+    """
+    name: str
+    load: Loader
+    cadence: pd.Timedelta
+    how: str = "auto"
+    agg: str = "mean"
+    staleness: Optional[pd.Timedelta] = None
+    latest: Optional[Callable[[], Optional[pd.Timestamp]]] = None
+
+    def method(self, step: pd.Timedelta) -> str:
+        if self.how != "auto":
+            return self.how
+        return "interval" if self.cadence < step else "asof"
+
+    @property
+    def max_age(self) -> pd.Timedelta:
+        return pd.Timedelta(self.staleness if self.staleness is not None else self.cadence)
+
+
+def store_loader(
+    save_path: str,
+    time_col: str,
+    columns: Optional[List[str]] = None,
+    pivot: Optional[str] = None,
+    value: Optional[str] = None
+) -> Loader:
+    """
+    Loader de um armazenamento particionado dos extratores (GOES, ACE, Kp).
+
+    Args:
+        save_path (str): Caminho do .xlsx correspondente (define a pasta do armazenamento).
+        time_col (str): Coluna de tempo.
+        columns (List[str], optional): Variáveis a usar. Defaults para as colunas numéricas.
+            Sem dados no intervalo, voltam como colunas vazias (NaN) em vez de sumirem.
+        pivot (str, optional): Coluna cujos valores viram variáveis (ex.: "energy" no GOES).
+        value (str, optional): Coluna de valores quando `pivot` é usado.
+    """
+    root = store_dir(save_path)
+
+    def load(start: Optional[datetime], end: Optional[datetime]) -> pd.DataFrame:
+        wanted = None if columns is None and pivot is None else (columns or []) + [c for c in (pivot, value) if c]
+        df = read_partitioned(root, time_col, start, end, wanted)
+        if df.empty:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name=time_col), columns=[] if pivot else columns or [], dtype=np.float64)
+        if pivot is not None:
+            return df.pivot_table(index=time_col, columns=pivot, values=value, aggfunc="last").sort_index()
+        df = df.set_index(time_col).sort_index()
+        df = df[columns] if columns is not None else df.select_dtypes("number")
+        return df.astype(np.float64)
+
+    return load
+
+
+def station_loader(station: str, root: Optional[str] = None) -> Loader:
+    """Loader das séries de 1 minuto de uma estação, a partir da pirâmide de agregados (`src.rollup`)."""
+    from src.rollup import DEFAULT_ROLLUP_DIR, read_level
+
+    def load(start: Optional[datetime], end: Optional[datetime]) -> pd.DataFrame:
+        return read_level(station, "1min", root or DEFAULT_ROLLUP_DIR, start, end)
+
+    return load
+
+
+def default_sources(data_dir: str = "data", stations: Optional[List[str]] = None) -> Dict[str, Source]:
+    """
+    Fontes padrão: Kp (1 minuto e GFZ 3 horas), GOES (um canal por energia), ACE
+    (MAG, SWEPAM, EPAM, SIS) e as estações informadas (RCORR_E, RUNCORR, RCORR_P).
+    """
+    from src.rollup import pyramid_watermark
+
+    def store(name, save_path, time_col, cadence, **kwargs) -> Source:
+        loader = store_loader(save_path, time_col, **kwargs)
+        latest = lambda: last_timestamp(store_dir(save_path), time_col)
+        return Source(name, loader, pd.Timedelta(cadence), latest=latest)
+
+    ace = os.path.join(data_dir, "data_ace")
+    kp = os.path.join(data_dir, "data_kp")
+    sources = [
+        store("kp", os.path.join(kp, "kp_index_1min.xlsx"), "time_tag", "1min", columns=["estimated_kp"]),
+        store("kp_gfz", os.path.join(kp, "dados_kp_gfz.xlsx"), "datetime", "3h", columns=["Kp"]),
+        store("goes", os.path.join(data_dir, "data_goes", "goes_protons.xlsx"), "time_tag", "5min",
+              pivot="energy", value="flux"),
+        store("ace_mag", os.path.join(ace, "ace_mag_1h.xlsx"), "time_tag", "1h"),
+        store("ace_swepam", os.path.join(ace, "ace_swepam_1h.xlsx"), "time_tag", "1h"),
+        store("ace_epam", os.path.join(ace, "ace_epam_5m.xlsx"), "time_tag", "5min"),
+        store("ace_sis", os.path.join(ace, "ace_sis_5m.xlsx"), "time_tag", "5min"),
+    ]
+    rollup_root = os.path.join(data_dir, "rollup")
+    for station in stations or []:
+        sources.append(Source(station, station_loader(station, rollup_root), pd.Timedelta("1min"),
+                              latest=lambda s=station: pyramid_watermark(s, rollup_root)))
+    return {source.name: source for source in sources}
+
+
+def make_grid(start: datetime, end: datetime, step: pd.Timedelta) -> pd.DatetimeIndex:
+    """Grade [start, end] com passo `step`, com início arredondado para baixo no passo."""
+    first = pd.Timestamp(start).floor(step)
+    return pd.date_range(first, pd.Timestamp(end), freq=step, name=TIME_COL).astype("datetime64[ns]")
+
+
+def _as_ns(index: pd.Index) -> np.ndarray:
+    return index.values.astype("datetime64[ns]").view(np.int64)
+
+
+def align_frame(df: pd.DataFrame, grid: pd.DatetimeIndex, step: pd.Timedelta, source: Source) -> pd.DataFrame:
+    """
+    Coloca uma série na grade.
+
+    No modo "interval" cada instante da grade recebe a agregação dos valores em
+    [t, t + step); no modo "asof", o último valor com instante <= t, desde que não
+    seja mais velho que `source.max_age`. Ambos usam aritmética inteira sobre os
+    instantes (posição na grade ou busca binária), sem laço por linha.
+
+    Returns:
+        pd.DataFrame: Indexado pela grade, com as colunas de `df`.
+    """
+    columns = list(df.columns)
+    if df.empty or not len(grid):
+        return pd.DataFrame(np.nan, index=grid, columns=columns)
+
+    times = _as_ns(df.index)
+    if not (np.diff(times) >= 0).all():
+        order = np.argsort(times, kind="stable")
+        times, df = times[order], df.iloc[order]
+    grid_ns = _as_ns(grid)
+    step_ns = pd.Timedelta(step).value
+
+    if source.method(step) == "interval":
+        codes = (times - grid_ns[0]) // step_ns
+        inside = (codes >= 0) & (codes < len(grid))
+        grouped = df[inside].groupby(codes[inside]).agg(source.agg)
+        values = np.full((len(grid), len(columns)), np.nan)
+        values[grouped.index.to_numpy()] = grouped.to_numpy(dtype=np.float64)
+    else:
+        pos = np.searchsorted(times, grid_ns, side="right") - 1
+        valid = pos >= 0
+        valid[valid] = grid_ns[valid] - times[pos[valid]] <= source.max_age.value
+        values = df.to_numpy(dtype=np.float64)[np.maximum(pos, 0)]
+        values[~valid] = np.nan
+
+    return pd.DataFrame(values, index=grid, columns=columns)
+
+
+def align(
+    sources: Dict[str, Source],
+    start: datetime,
+    end: datetime,
+    step: pd.Timedelta = pd.Timedelta("1h")
+) -> pd.DataFrame:
+    """
+    Alinha várias fontes em uma grade comum.
+
+    Cada fonte é lida só no intervalo necessário (incluindo, no modo asof, a janela
+    de `staleness` antes do início).
+
+    Args:
+        sources (Dict[str, Source]): Fontes (ver `default_sources`).
+        start (datetime): Início da grade.
+        end (datetime): Fim da grade (inclusivo).
+        step (pd.Timedelta): Passo da grade.
+
+    Returns:
+        pd.DataFrame: Indexado pela grade, com colunas MultiIndex (source, variable).
+    """
+    step = pd.Timedelta(step)
+    grid = make_grid(start, end, step)
+    parts = {}
+    for name, source in sources.items():
+        lookback = source.max_age if source.method(step) == "asof" else pd.Timedelta(0)
+        df = source.load(grid[0] - lookback, grid[-1] + step - pd.Timedelta(1, "ns"))
+        parts[name] = align_frame(df, grid, step, source)
+
+    if not parts:
+        return pd.DataFrame(index=grid)
+    aligned = pd.concat(parts.values(), axis=1, keys=parts.keys())
+    aligned.columns = aligned.columns.set_names(["source", "variable"])
+    aligned.columns = aligned.columns.set_levels([lvl.astype(str) for lvl in aligned.columns.levels])
+    return aligned
+
+
+def _flatten(aligned: pd.DataFrame) -> pd.DataFrame:
+    flat = aligned.copy()
+    flat.columns = [f"{s}{COLUMN_SEPARATOR}{v}" for s, v in aligned.columns]
+    return flat.rename_axis(TIME_COL).reset_index()
+
+
+def _meta_path(store: str) -> str:
+    return os.path.join(store, "_spec.json")
+
+
+def update_aligned(
+    name: str,
+    sources: Dict[str, Source],
+    start: datetime,
+    step: pd.Timedelta = pd.Timedelta("1h"),
+    end: Optional[datetime] = None,
+    root: str = DEFAULT_ALIGNED_DIR,
+    overlap: timedelta = DEFAULT_OVERLAP
+) -> int:
+    """
+    Materializa o alinhamento em um armazenamento particionado, recalculando só o final.
+
+    A partir da segunda execução, só a grade desde a marca d'água menos uma margem
+    (o maior `staleness` ou cadência das fontes, mais `overlap` para correções tardias)
+    é recalculada, e só as partições desse trecho são regravadas. Se as fontes ou o
+    passo mudarem, o alinhamento é refeito desde `start`. As colunas gravadas ficam
+    em `_spec.json`: uma variável ausente no trecho recalculado é gravada como NaN, e
+    uma variável nova refaz o alinhamento desde `start`, para todas as partições
+    terem as mesmas colunas.
+
+    Args:
+        name (str): Nome do alinhamento (pasta em `root`).
+        sources (Dict[str, Source]): Fontes.
+        start (datetime): Início do alinhamento.
+        step (pd.Timedelta): Passo da grade.
+        end (datetime, optional): Fim. Defaults para o dado mais recente entre as fontes.
+        root (str): Pasta dos alinhamentos.
+        overlap (timedelta): Margem extra recalculada antes da marca d'água.
+
+    Returns:
+        int: Número de instantes da grade recalculados.
+    """
+    step = pd.Timedelta(step)
+    store = os.path.join(root, name)
+    spec = {"step": str(step), "sources": sorted(sources)}
+
+    known = None
+    if os.path.exists(_meta_path(store)):
+        with open(_meta_path(store), "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if {key: saved.get(key) for key in spec} != spec:
+            print(f"Fontes ou passo de {name} mudaram; refazendo o alinhamento desde {start}.")
+            shutil.rmtree(store)
+        else:
+            known = saved.get("columns")
+
+    if end is None:
+        latest = [t for t in (s.latest() for s in sources.values() if s.latest) if t is not None]
+        if not latest:
+            return 0
+        end = max(latest)
+
+    since = pd.Timestamp(start)
+    watermark = last_timestamp(store, TIME_COL)
+    if watermark is not None:
+        margin = max([s.max_age for s in sources.values()] + [step]) + pd.Timedelta(overlap)
+        since = max(since, watermark - margin)
+    if since > pd.Timestamp(end):
+        return 0
+
+    flat = _flatten(align(sources, since, end, step))
+    columns = [c for c in flat.columns if c != TIME_COL]
+    if watermark is not None and known is not None:
+        new = [c for c in columns if c not in known]
+        if new:
+            print(f"Novas variáveis em {name} ({', '.join(new)}); refazendo o alinhamento desde {start}.")
+            shutil.rmtree(store)
+            flat = _flatten(align(sources, start, end, step))
+            columns = [c for c in flat.columns if c != TIME_COL]
+        else:
+            columns = known
+            flat = flat.reindex(columns=[TIME_COL] + columns)
+
+    write_partitioned(flat, store, TIME_COL, freq="M", keep="last")
+    with open(_meta_path(store), "w", encoding="utf-8") as f:
+        json.dump({**spec, "columns": columns}, f)
+    return len(flat)
+
+
+def read_aligned(
+    name: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    root: str = DEFAULT_ALIGNED_DIR
+) -> pd.DataFrame:
+    """Lê um alinhamento materializado, com colunas MultiIndex (source, variable)."""
+    store = os.path.join(root, name)
+    if not list_partitions(store):
+        return pd.DataFrame()
+    df = read_partitioned(store, TIME_COL, start, end).set_index(TIME_COL)
+    df.columns = pd.MultiIndex.from_tuples([tuple(c.split(COLUMN_SEPARATOR, 1)) for c in df.columns],
+                                           names=["source", "variable"])
+    return df
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Alinha estações, Kp, GOES e ACE em uma grade comum.")
+    parser.add_argument("--name", default="default", help="Nome do alinhamento materializado")
+    parser.add_argument("--start", required=True, help="Início (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Fim (YYYY-MM-DD). Defaults para o dado mais recente")
+    parser.add_argument("--step", default="1h", help="Passo da grade (ex.: 1min, 5min, 1h)")
+    parser.add_argument("--sources", help="Fontes separadas por vírgula (kp,kp_gfz,goes,ace_mag,...)")
+    parser.add_argument("--stations", help="Estações separadas por vírgula")
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args(argv)
+
+    stations = [s.strip().upper() for s in args.stations.split(",")] if args.stations else []
+    sources = default_sources(args.data_dir, stations)
+    if args.sources:
+        sources = {n: s for n, s in sources.items() if n in args.sources.split(",") or n in stations}
+
+    n = update_aligned(args.name, sources, datetime.strptime(args.start, "%Y-%m-%d"), pd.Timedelta(args.step),
+                       datetime.strptime(args.end, "%Y-%m-%d") if args.end else None,
+                       os.path.join(args.data_dir, "aligned"))
+    print(f"{args.name}: {n} instantes recalculados ({', '.join(sources)}).")
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.align --start 2024-01-01 --step 1h --sources kp_gfz,goes,ace_mag --stations OULU,ROME
+    main()
@@ -0,0 +1,262 @@
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.processing import STATION_COLUMNS
+
+DEFAULT_ARCHIVE_DIR = os.path.join("data", "archive")
+DTYPE = np.dtype("<f4")
+STEP = np.timedelta64(60, "s").astype("timedelta64[ns]")
+# Linhas de NaN gravadas por vez ao estender o arquivo
+_FILL_ROWS = 1 << 20
+
+TimeLike = Union[datetime, str, pd.Timestamp, np.datetime64]
+
+
+class StationArchive:
+    """
+    Arquivo binário de uma estação com uma linha por minuto desde a época do arquivo.
+
+    A linha de um instante é `(instante - época) // 1 minuto`; cada linha tem as três
+    correções (STATION_COLUMNS) em float32, com NaN onde não há medida. Os valores ficam
+    em `{estação}.f32` e a época, as colunas e o último instante gravado em `{estação}.json`.
+
+    A leitura usa `numpy.memmap`: um intervalo de tempo vira um recorte do arquivo
+    mapeado, e só as páginas desse trecho são lidas do disco. Dados novos são gravados no
+    próprio arquivo (estendido com NaN quando passam do fim); dados anteriores à época
+    exigem reescrever o arquivo com uma época nova.
+
+    Args:
+        station (str): Código da estação.
+        root (str): Pasta dos arquivos.
+    """
+
+    def __init__(self, station: str, root: str = DEFAULT_ARCHIVE_DIR):
+        self.station = station
+        self.root = root
+        self.data_path = os.path.join(root, f"{station}.f32")
+        self.header_path = os.path.join(root, f"{station}.json")
+        self.header = self._read_header()
+
+    def _read_header(self) -> Optional[dict]:
+        if not os.path.exists(self.header_path):
+            return None
+        with open(self.header_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_header(self) -> None:
+        tmp_path = self.header_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.header, f, indent=2)
+        os.replace(tmp_path, self.header_path)
+
+    @property
+    def exists(self) -> bool:
+        return self.header is not None and os.path.exists(self.data_path)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.header["columns"] if self.header else list(STATION_COLUMNS)
+
+    @property
+    def epoch(self) -> np.datetime64:
+        return np.datetime64(self.header["epoch"], "ns")
+
+    @property
+    def last_time(self) -> Optional[pd.Timestamp]:
+        """Último instante com dados gravados."""
+        return pd.Timestamp(self.header["last"]) if self.header and self.header.get("last") else None
+
+    def __len__(self) -> int:
+        if not self.exists:
+            return 0
+        return os.path.getsize(self.data_path) // (DTYPE.itemsize * len(self.columns))
+
+    def __repr__(self) -> str:
+        span = f"{self.epoch} → {self.last_time}" if self.exists else "vazio"
+        return f"StationArchive({self.station}, {len(self):,} minutos, {span})"
+
+    def position(self, when: TimeLike, ceil: bool = False) -> int:
+        """Linha do instante `when` (pode ser negativa ou passar do fim)."""
+        delta = pd.Timestamp(when).value - int(self.epoch.astype(np.int64))
+        step = int(STEP.astype(np.int64))
+        return -(-delta // step) if ceil else delta // step
+
+    def _bounds(self, start: Optional[TimeLike], end: Optional[TimeLike]):
+        n = len(self)
+        i0 = 0 if start is None else min(max(self.position(start, ceil=True), 0), n)
+        i1 = n if end is None else min(max(self.position(end) + 1, i0), n)
+        return i0, i1
+
+    def values(self, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None) -> np.ndarray:
+        """
+        Valores no intervalo [start, end] como recorte do arquivo mapeado (somente leitura, sem cópia).
+
+        Returns:
+            np.ndarray: Matriz float32 (minuto × coluna); vazia se a estação não tem arquivo.
+        """
+        if not self.exists or not len(self):
+            return np.empty((0, len(self.columns)), dtype=DTYPE)
+        i0, i1 = self._bounds(start, end)
+        mm = np.memmap(self.data_path, dtype=DTYPE, mode="r", shape=(len(self), len(self.columns)))
+        return mm[i0:i1]
+
+    def times(self, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None) -> pd.DatetimeIndex:
+        """Instantes das linhas retornadas por `values` com os mesmos argumentos."""
+        if not self.exists:
+            return pd.DatetimeIndex([], name="datetime")
+        i0, i1 = self._bounds(start, end)
+        return pd.DatetimeIndex(self.epoch + STEP * np.arange(i0, i1), name="datetime")
+
+    def read(
+        self,
+        start: Optional[TimeLike] = None,
+        end: Optional[TimeLike] = None,
+        columns: Optional[List[str]] = None,
+        dropna: bool = True
+    ) -> pd.DataFrame:
+        """
+        DataFrame no formato de `load_station_data` (indexado por datetime), copiando só o intervalo.
+
+        Args:
+            start (datetime, optional): Início (inclusivo).
+            end (datetime, optional): Fim (inclusivo).
+            columns (List[str], optional): Colunas. Defaults para todas.
+            dropna (bool): Remove os minutos sem nenhuma medida.
+        """
+        columns = columns or self.columns
+        values = self.values(start, end)
+        df = pd.DataFrame(np.array(values[:, [self.columns.index(c) for c in columns]]),
+                          index=self.times(start, end), columns=columns)
+        return df.dropna(how="all") if dropna else df
+
+    def _create(self, first: np.datetime64, columns: List[str]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        epoch = first.astype("datetime64[D]").astype("datetime64[ns]")
+        self.header = {"epoch": str(epoch.astype("datetime64[s]")), "step": "1min",
+                       "columns": columns, "dtype": DTYPE.str, "last": None}
+        open(self.data_path, "wb").close()
+
+    def _extend(self, n_rows: int) -> None:
+        """Estende o arquivo até `n_rows` linhas, preenchendo com NaN."""
+        width = len(self.columns)
+        with open(self.data_path, "ab") as f:
+            missing = n_rows - len(self)
+            while missing > 0:
+                k = min(missing, _FILL_ROWS)
+                np.full((k, width), np.nan, dtype=DTYPE).tofile(f)
+                missing -= k
+
+    def _rebase(self, first: np.datetime64) -> None:
+        """Reescreve o arquivo com uma época anterior (dados mais antigos que a época atual)."""
+        old = np.array(self.values())
+        old_epoch = self.epoch
+        tmp_path = self.data_path + ".tmp"
+        epoch = first.astype("datetime64[D]").astype("datetime64[ns]")
+        shift = int((old_epoch - epoch) // STEP)
+        with open(tmp_path, "wb") as f:
+            remaining = shift
+            while remaining > 0:
+                k = min(remaining, _FILL_ROWS)
+                np.full((k, len(self.columns)), np.nan, dtype=DTYPE).tofile(f)
+                remaining -= k
+            old.tofile(f)
+        os.replace(tmp_path, self.data_path)
+        self.header["epoch"] = str(epoch.astype("datetime64[s]"))
+
+    def append(self, df: pd.DataFrame) -> int:
+        """
+        Grava as linhas de `df` (saída de `load_station_data`) nas posições dos seus minutos.
+
+        Minutos já gravados são sobrescritos (correções tardias do NEST); o arquivo é
+        estendido com NaN quando os dados passam do fim.
+
+        Returns:
+            int: Número de linhas gravadas.
+        """
+        if df.empty:
+            return 0
+        times = df.index.values.astype("datetime64[ns]")
+        if not self.exists:
+            self._create(times.min(), [c for c in STATION_COLUMNS if c in df.columns] or list(df.columns))
+        elif times.min() < self.epoch:
+            print(f"{self.station}: dados anteriores à época do arquivo; reescrevendo a partir de {times.min()}.")
+            self._rebase(times.min())
+
+        block = df.reindex(columns=self.columns).to_numpy(dtype=DTYPE)
+        pos = ((times - self.epoch) // STEP).astype(np.int64)
+        n_rows = int(pos.max()) + 1
+        if n_rows > len(self):
+            self._extend(n_rows)
+
+        mm = np.memmap(self.data_path, dtype=DTYPE, mode="r+", shape=(len(self), len(self.columns)))
+        if pos[-1] - pos[0] + 1 == len(pos) and (np.diff(pos) == 1).all():
+            mm[pos[0]:pos[-1] + 1] = block
+        else:
+            mm[pos] = block
+        mm.flush()
+        del mm
+
+        last = pd.Timestamp(times.max())
+        if self.last_time is None or last > self.last_time:
+            self.header["last"] = last.isoformat()
+        self._write_header()
+        return len(df)
+
+
+def read_stations(
+    stations: List[str],
+    start: TimeLike,
+    end: TimeLike,
+    types: Optional[List[str]] = None,
+    root: str = DEFAULT_ARCHIVE_DIR
+):
+    """
+    Monta um `StationCube` de várias estações no intervalo [start, end] a partir dos arquivos.
+
+    Cada estação contribui com um recorte do seu arquivo mapeado; só o cubo resultante
+    é alocado.
+    """
+    from src.cube import StationCube
+
+    types = types or list(STATION_COLUMNS)
+    first = np.datetime64(pd.Timestamp(start).floor("1min").to_datetime64(), "ns")
+    n = int((np.datetime64(pd.Timestamp(end).to_datetime64(), "ns") - first) // STEP) + 1
+    values = np.full((max(n, 0), len(stations), len(types)), np.nan, dtype=DTYPE)
+    for s, station in enumerate(stations):
+        archive = StationArchive(station, root)
+        if not archive.exists:
+            continue
+        i0 = archive.position(first)
+        window = archive.values(first, end)
+        offset = max(-i0, 0)
+        cols = [archive.columns.index(t) if t in archive.columns else None for t in types]
+        for k, c in enumerate(cols):
+            if c is not None:
+                values[offset:offset + len(window), s, k] = window[:, c]
+    return StationCube(first, STEP, stations, types, values)
+
+
+def build_all(station_dir: str, root: str = DEFAULT_ARCHIVE_DIR) -> None:
+    """Grava nos arquivos binários os dados de todas as estações em `station_dir`."""
+    from src.cache import cached_load_station_data
+
+    # Cache de leitura na pasta de dados que contém `station_dir` (ex.: data/data_station -> data)
+    data_dir = os.path.dirname(os.path.normpath(station_dir))
+    for path in sorted(glob.glob(os.path.join(station_dir, "*.txt"))):
+        station = os.path.basename(path).split("_")[0]
+        t0 = time.perf_counter()
+        n = StationArchive(station, root).append(cached_load_station_data(path, data_dir=data_dir))
+        print(f"{station}: {n} minutos gravados no arquivo binário ({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.archive [pasta_das_estacoes]
+    build_all(sys.argv[1] if len(sys.argv) > 1 else os.path.join("data", "data_station"))
@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import requests
+
+from src.download import get_session, plan_query_windows
+from src.extractors import GFZ_URL
+from src.ingest import FEED_SCHEMAS, read_feed
+from src.instrument import span
+from src.storage import export_excel, store_dir, update_store
+
+# Índices servidos pela API do GFZ (parâmetro `index`)
+GFZ_INDICES = ["Kp", "ap", "Ap", "Cp", "C9", "Hp30", "Hp60", "ap30", "ap60", "SN", "Fobs", "Fadj"]
+DEFAULT_CHUNK = timedelta(days=365)
+GFZ_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def gfz_save_path(kp_dir: str, index: str) -> str:
+    """Caminho do .xlsx (e da pasta do armazenamento) de um índice do GFZ."""
+    if index == "Kp":
+        return os.path.join(kp_dir, "dados_kp_gfz.xlsx")
+    return os.path.join(kp_dir, f"dados_{index.lower()}_gfz.xlsx")
+
+
+class RateLimiter:
+    """
+    Limita o início de requisições a `rate` por segundo, entre todas as threads.
+
+    Args:
+        rate (float): Requisições por segundo (0 desliga o limite).
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class Checkpoint:
+    """
+    Registro dos trechos já gravados de um preenchimento histórico, em JSON.
+
+    O arquivo guarda os parâmetros da consulta; se eles mudarem, os trechos
+    registrados deixam de valer.
+    """
+
+    def __init__(self, path: str, params: dict):
+        self.path = path
+        self.params = params
+        self.done: set = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("params") == params:
+                self.done = set(saved["done"])
+
+    @staticmethod
+    def key(chunk: Tuple[datetime, datetime]) -> str:
+        return f"{chunk[0]:%Y-%m-%dT%H:%M:%S}/{chunk[1]:%Y-%m-%dT%H:%M:%S}"
+
+    def __contains__(self, chunk: Tuple[datetime, datetime]) -> bool:
+        return self.key(chunk) in self.done
+
+    def mark(self, chunks: List[Tuple[datetime, datetime]]) -> None:
+        self.done.update(self.key(c) for c in chunks)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"params": self.params, "done": sorted(self.done)}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def fetch_gfz_chunk(
+    chunk: Tuple[datetime, datetime],
+    index: str,
+    status: str,
+    url: str,
+    session: requests.Session,
+    limiter: RateLimiter,
+    retries: int = 3,
+    timeout: float = 60
+) -> pd.DataFrame:
+    """
+    Baixa um trecho [início, fim) de um índice do GFZ, com novas tentativas e espera exponencial.
+    """
+    params = {
+        "start": chunk[0].strftime(GFZ_TIME_FORMAT),
+        "end": (chunk[1] - timedelta(seconds=1)).strftime(GFZ_TIME_FORMAT),
+        "index": index,
+        "status": status,
+    }
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            with span("backfill_gfz", index) as s:
+                response = session.get(url, params=params, timeout=timeout)
+                s.add(bytes=len(response.content))
+                response.raise_for_status()
+                df = read_feed(response.content, FEED_SCHEMAS["kp_gfz"])
+                s.add(rows_parsed=len(df))
+                return df
+        except (requests.RequestException, ValueError):
+            if attempt == retries:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def backfill_gfz(
+    start: datetime,
+    end: datetime,
+    kp_dir: str = os.path.join("data", "data_kp"),
+    indices: Optional[List[str]] = None,
+    status: str = "def",
+    chunk: timedelta = DEFAULT_CHUNK,
+    max_workers: int = 4,
+    rate: float = 2.0,
+    flush_every: int = 16,
+    export_xlsx: bool = False,
+    url: str = GFZ_URL,
+    session: Optional[requests.Session] = None
+) -> Dict[str, int]:
+    """
+    Preenche o histórico de índices do GFZ em trechos, com retomada após interrupções.
+
+    O intervalo é dividido em trechos de `chunk`, baixados em paralelo (no máximo
+    `max_workers` de uma vez e `rate` requisições por segundo). Os trechos baixados são
+    acumulados e gravados no armazenamento particionado em lotes de `flush_every`, de
+    modo que cada partição mensal é escrita uma vez por lote, e só então marcados no
+    checkpoint (`_backfill.json` na pasta do armazenamento). Uma nova execução com os
+    mesmos parâmetros pula os trechos marcados; trechos que falharam são tentados de novo.
+
+    Args:
+        start (datetime): Início do histórico.
+        end (datetime): Fim do histórico (exclusivo).
+        kp_dir (str): Pasta dos índices (ver `gfz_save_path`).
+        indices (List[str], optional): Índices a baixar. Defaults para ["Kp"].
+        status (str): "def" (definitivos) ou "all" (inclui os preliminares).
+        chunk (timedelta): Duração de cada trecho.
+        max_workers (int): Requisições simultâneas.
+        rate (float): Máximo de requisições por segundo.
+        flush_every (int): Trechos acumulados antes de cada gravação.
+        export_xlsx (bool): Exporta o histórico completo para Excel ao final.
+        url (str): Endereço da API do GFZ.
+        session (requests.Session, optional): Sessão HTTP. Defaults para a sessão compartilhada.
+
+    Returns:
+        Dict[str, int]: Trechos que falharam por índice (0 quando o índice foi concluído).
+    """
+    session = session or get_session()
+    limiter = RateLimiter(rate)
+    failed = {}
+
+    for index in indices or ["Kp"]:
+        if index not in GFZ_INDICES:
+            raise ValueError(f"Índice desconhecido: {index}. Opções: {', '.join(GFZ_INDICES)}")
+        save_path = gfz_save_path(kp_dir, index)
+        checkpoint = Checkpoint(os.path.join(store_dir(save_path), "_backfill.json"),
+                                {"index": index, "status": status, "chunk": str(chunk)})
+        pending = [c for c in plan_query_windows(start, end, chunk) if c not in checkpoint]
+        print(f"GFZ {index}: {len(pending)} trechos a baixar "
+              f"({len(checkpoint.done)} já gravados)")
+
+        buffer: List[pd.DataFrame] = []
+        buffered: List[Tuple[datetime, datetime]] = []
+        errors = 0
+
+        def flush():
+            if buffered:
+                frames = [df for df in buffer if not df.empty]
+                if frames:
+                    update_store(pd.concat(frames, ignore_index=True), save_path, "datetime", ["datetime"])
+                checkpoint.mark(buffered)
+                buffer.clear()
+                buffered.clear()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            queue = iter(pending)
+            running = {}
+            for c in queue:
+                running[executor.submit(fetch_gfz_chunk, c, index, status, url, session, limiter)] = c
+                if len(running) >= max_workers * 2:
+                    break
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    c = running.pop(future)
+                    try:
+                        buffer.append(future.result())
+                        buffered.append(c)
+                    except Exception as e:
+                        errors += 1
+                        print(f"GFZ {index}: falha no trecho {Checkpoint.key(c)}: {e}")
+                    following = next(queue, None)
+                    if following is not None:
+                        running[executor.submit(fetch_gfz_chunk, following, index, status, url, session,
+                                                limiter)] = following
+                if len(buffered) >= flush_every:
+                    flush()
+        flush()
+
+        if export_xlsx:
+            export_excel(store_dir(save_path), save_path, "datetime")
+        failed[index] = errors
+        print(f"GFZ {index}: concluído" + (f", {errors} trechos com falha (execute de novo para retomar)"
+                                            if errors else ""))
+    return failed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Preenche o histórico de índices do GFZ (Kp, ap, Hp30...).")
+    parser.add_argument("--start", required=True, help="Data inicial (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Data final, exclusiva (YYYY-MM-DD). Defaults para hoje")
+    parser.add_argument("--index", default="Kp", help=f"Índices separados por vírgula ({','.join(GFZ_INDICES)})")
+    parser.add_argument("--status", default="def", choices=["def", "all"])
+    parser.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK.days)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2.0, help="Requisições por segundo")
+    parser.add_argument("--kp-dir", default=os.path.join("data", "data_kp"))
+    parser.add_argument("--export-xlsx", action="store_true")
+    parser.add_argument("--url", default=GFZ_URL)
+    args = parser.parse_args(argv)
+
+    end = datetime.strptime(args.end, "%Y-%m-%d") if args.end else datetime.combine(datetime.today(), datetime.min.time())
+    failed = backfill_gfz(datetime.strptime(args.start, "%Y-%m-%d"), end, args.kp_dir, args.index.split(","),
+                          args.status, timedelta(days=args.chunk_days), args.workers, args.rate,
+                          export_xlsx=args.export_xlsx, url=args.url)
+    return 1 if any(failed.values()) else 0
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.backfill --start 1932-01-01 --index Kp,ap --workers 4 --rate 2
+    raise SystemExit(main())
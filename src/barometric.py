@@ -0,0 +1,365 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.download import NEST_BASE_URL, PRESSURE_TYPES, _host_semaphore, fetch_station_windows, get_session
+from src.instrument import span
+from src.processing import STATION_COLUMNS, load_station_data, parse_station_rows
+
+DEFAULT_META_PATH = os.path.join("data", "station_meta.json")
+DEFAULT_REPORT_PATH = os.path.join("data", "pressure_validation.json")
+PRESSURE_COLUMN = "PRESS"
+# Calibração e validação pedem também a RCORR_P do NEST, para comparar
+REFERENCE_TYPES = PRESSURE_TYPES + ["corr_for_pressure"]
+DEFAULT_CALIBRATION = timedelta(days=10)
+# Erro relativo RMS (%) aceito na validação contra a RCORR_P do NEST
+DEFAULT_TOLERANCE_PCT = 0.05
+# Variação mínima de pressão (mbar) no trecho de calibração para o ajuste ser confiável
+MIN_PRESSURE_RANGE = 2.0
+
+
+@dataclass
+class PressureCoefficients:
+    """
+    Coeficientes da correção barométrica de uma estação:
+    `N_corr = N_sem_correção · exp(beta · (P - p0))`.
+
+    Attributes:
+        station (str): Código da estação.
+        beta (float): Coeficiente barométrico, em 1/mbar.
+        p0 (float): Pressão de referência, em mbar.
+        fitted_from (str): Início do trecho usado no ajuste.
+        fitted_to (str): Fim do trecho usado no ajuste.
+        samples (int): Amostras usadas no ajuste.
+        rms_pct (float): Erro relativo RMS do ajuste em relação à RCORR_P do NEST, em %.
+    """
+    station: str
+    beta: float
+    p0: float
+    fitted_from: str
+    fitted_to: str
+    samples: int
+    rms_pct: float
+
+
+def load_station_meta(path: str = DEFAULT_META_PATH) -> Dict[str, PressureCoefficients]:
+    """Tabela de coeficientes por estação (vazia se o arquivo não existir)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {station: PressureCoefficients(**values) for station, values in json.load(f).items()}
+
+
+def save_station_meta(meta: Dict[str, PressureCoefficients], path: str = DEFAULT_META_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({station: asdict(meta[station]) for station in sorted(meta)}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def correct_pressure(counts: np.ndarray, pressure: np.ndarray, beta: float, p0: float) -> np.ndarray:
+    """
+    Correção barométrica vetorizada (calculada em float64, devolvida em float32).
+
+    Args:
+        counts (np.ndarray): Contagens sem correção.
+        pressure (np.ndarray): Pressão da estação, em mbar.
+        beta (float): Coeficiente barométrico, em 1/mbar.
+        p0 (float): Pressão de referência, em mbar.
+
+    Returns:
+        np.ndarray: Contagens corrigidas; NaN onde faltar contagem ou pressão.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    pressure = np.asarray(pressure, dtype=np.float64)
+    return (counts * np.exp(beta * (pressure - p0))).astype(np.float32)
+
+
+def _relative_error_pct(df: pd.DataFrame, beta: float, p0: float) -> np.ndarray:
+    valid = df[["RUNCORR", "RCORR_P", PRESSURE_COLUMN]].dropna()
+    local = correct_pressure(valid["RUNCORR"].to_numpy(), valid[PRESSURE_COLUMN].to_numpy(), beta, p0)
+    reference = valid["RCORR_P"].to_numpy(dtype=np.float64)
+    return (local.astype(np.float64) / reference - 1.0) * 100.0
+
+
+def fit_coefficients(df: pd.DataFrame, station: str) -> PressureCoefficients:
+    """
+    Ajusta beta e p0 de uma estação a partir das séries do próprio NEST.
+
+    `ln(RCORR_P / RUNCORR) = beta · P - beta · p0` é uma reta na pressão; o ajuste por
+    mínimos quadrados recupera os coeficientes que o NEST aplica à estação no trecho.
+
+    Args:
+        df (pd.DataFrame): Saída de `load_station_data` com RUNCORR, RCORR_P e PRESS.
+        station (str): Código da estação.
+
+    Returns:
+        PressureCoefficients: Coeficientes ajustados.
+
+    Raises:
+        ValueError: Se faltarem amostras, a pressão quase não variar ou a RCORR_P não
+            depender da pressão.
+    """
+    missing = [c for c in ("RUNCORR", "RCORR_P", PRESSURE_COLUMN) if c not in df.columns]
+    if missing:
+        raise ValueError(f"{station}: colunas ausentes para o ajuste: {missing}")
+    valid = df[["RUNCORR", "RCORR_P", PRESSURE_COLUMN]].dropna()
+    valid = valid[(valid["RUNCORR"] > 0) & (valid["RCORR_P"] > 0)]
+    pressure = valid[PRESSURE_COLUMN].to_numpy(dtype=np.float64)
+    if len(valid) < 10 or np.ptp(pressure) < MIN_PRESSURE_RANGE:
+        raise ValueError(f"{station}: {len(valid)} amostras e variação de pressão de "
+                         f"{np.ptp(pressure) if len(pressure) else 0:.1f} mbar; use um trecho de calibração maior.")
+
+    ratio = np.log(valid["RCORR_P"].to_numpy(dtype=np.float64) / valid["RUNCORR"].to_numpy(dtype=np.float64))
+    beta, intercept = np.polyfit(pressure, ratio, 1)
+    if abs(beta) < 1e-6:
+        raise ValueError(f"{station}: a RCORR_P do NEST não varia com a pressão no trecho.")
+    p0 = -intercept / beta
+    error = _relative_error_pct(valid, beta, p0)
+    return PressureCoefficients(
+        station, float(beta), float(p0), str(valid.index.min()), str(valid.index.max()), len(valid),
+        float(np.sqrt(np.mean(error ** 2)))
+    )
+
+
+def apply_pressure_correction(df: pd.DataFrame, coefficients: Optional[PressureCoefficients]) -> pd.DataFrame:
+    """
+    Acrescenta a RCORR_P calculada localmente a partir de RUNCORR e PRESS.
+
+    Args:
+        df (pd.DataFrame): Saída de `load_station_data` (modo de correção local).
+        coefficients (PressureCoefficients, optional): Coeficientes da estação; None
+            devolve `df` inalterado.
+
+    Returns:
+        pd.DataFrame: `df` com a coluna RCORR_P (float32), nas posições de STATION_COLUMNS.
+    """
+    if coefficients is None or "RUNCORR" not in df.columns or PRESSURE_COLUMN not in df.columns:
+        return df
+    df = df.copy(deep=False)
+    df["RCORR_P"] = correct_pressure(df["RUNCORR"].to_numpy(), df[PRESSURE_COLUMN].to_numpy(),
+                                     coefficients.beta, coefficients.p0)
+    ordered = [c for c in STATION_COLUMNS if c in df.columns]
+    return df[ordered + [c for c in df.columns if c not in ordered]]
+
+
+def validate(df: pd.DataFrame, coefficients: PressureCoefficients, tolerance: float = DEFAULT_TOLERANCE_PCT) -> dict:
+    """
+    Compara a RCORR_P calculada localmente com a do NEST.
+
+    Args:
+        df (pd.DataFrame): Saída de `load_station_data` com RUNCORR, RCORR_P (do NEST) e PRESS.
+        coefficients (PressureCoefficients): Coeficientes da estação.
+        tolerance (float): Erro relativo RMS máximo aceito, em %.
+
+    Returns:
+        dict: Amostras, viés, RMS, percentil 99 e máximo do erro relativo absoluto (em %)
+        e se o RMS ficou dentro da tolerância.
+    """
+    error = _relative_error_pct(df, coefficients.beta, coefficients.p0)
+    if not len(error):
+        raise ValueError(f"{coefficients.station}: sem amostras com RUNCORR, RCORR_P e pressão.")
+    rms = float(np.sqrt(np.mean(error ** 2)))
+    return {
+        "station": coefficients.station,
+        "start": str(df.index.min()),
+        "end": str(df.index.max()),
+        "samples": int(len(error)),
+        "bias_pct": float(error.mean()),
+        "rms_pct": rms,
+        "p99_pct": float(np.percentile(np.abs(error), 99)),
+        "max_pct": float(np.abs(error).max()),
+        "ok": rms <= tolerance,
+    }
+
+
+def fetch_reference(
+    station: str,
+    start: datetime,
+    end: datetime,
+    base_url: str = NEST_BASE_URL,
+    session: Optional[requests.Session] = None,
+    semaphore=None
+) -> pd.DataFrame:
+    """Baixa contagens sem correção, pressão e a RCORR_P do NEST no intervalo [start, end)."""
+    header, rows, _ = fetch_station_windows(station, start, end, REFERENCE_TYPES, base_url,
+                                            session or get_session(), max_workers=2, semaphore=semaphore)
+    if not rows:
+        raise ValueError(f"{station}: o NEST não devolveu dados entre {start} e {end}.")
+    return parse_station_rows(station, header, rows)
+
+
+def _for_stations(stations: List[str], fn, base_url: str, max_workers: int) -> Dict[str, object]:
+    # Executa `fn(estação)` em paralelo; erros ficam no resultado da estação
+    semaphore = _host_semaphore(base_url, max_workers)
+
+    def worker(station):
+        try:
+            return fn(station, semaphore)
+        except (requests.RequestException, ValueError) as e:
+            print(f"{station}: {e}")
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(stations, executor.map(worker, stations)))
+
+
+def calibrate(
+    stations: List[str],
+    start: datetime,
+    end: datetime,
+    meta_path: str = DEFAULT_META_PATH,
+    base_url: str = NEST_BASE_URL,
+    max_workers: int = 4
+) -> Dict[str, PressureCoefficients]:
+    """
+    Ajusta e grava na tabela os coeficientes de cada estação, a partir de um trecho curto
+    baixado com contagens sem correção, pressão e a RCORR_P do NEST.
+
+    Returns:
+        Dict[str, PressureCoefficients]: Coeficientes das estações ajustadas com sucesso.
+    """
+    session = get_session(pool_maxsize=max_workers)
+
+    def fit(station, semaphore):
+        with span("calibrate_pressure", station):
+            return fit_coefficients(fetch_reference(station, start, end, base_url, session, semaphore), station)
+
+    fitted = {s: c for s, c in _for_stations(stations, fit, base_url, max_workers).items()
+              if isinstance(c, PressureCoefficients)}
+    meta = load_station_meta(meta_path)
+    meta.update(fitted)
+    save_station_meta(meta, meta_path)
+    return fitted
+
+
+def validate_stations(
+    stations: List[str],
+    start: datetime,
+    end: datetime,
+    meta_path: str = DEFAULT_META_PATH,
+    report_path: Optional[str] = DEFAULT_REPORT_PATH,
+    base_url: str = NEST_BASE_URL,
+    tolerance: float = DEFAULT_TOLERANCE_PCT,
+    max_workers: int = 4
+) -> pd.DataFrame:
+    """
+    Relatório de validação: RCORR_P local × RCORR_P do NEST em [start, end) por estação.
+
+    O trecho deve ser diferente do usado na calibração, para medir também a deriva dos
+    coeficientes do NEST ao longo do tempo. O relatório é gravado em JSON em `report_path`.
+
+    Returns:
+        pd.DataFrame: Uma linha por estação (ver `validate`).
+    """
+    meta = load_station_meta(meta_path)
+    unknown = [s for s in stations if s not in meta]
+    if unknown:
+        print(f"Sem coeficientes (rode `calibrate` antes): {', '.join(unknown)}")
+    session = get_session(pool_maxsize=max_workers)
+
+    def check(station, semaphore):
+        with span("validate_pressure", station):
+            return validate(fetch_reference(station, start, end, base_url, session, semaphore), meta[station], tolerance)
+
+    results = _for_stations([s for s in stations if s in meta], check, base_url, max_workers)
+    report = [r for r in results.values() if isinstance(r, dict)]
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump({"tolerance_pct": tolerance, "stations": report}, f, indent=2)
+    return pd.DataFrame(report)
+
+
+def rederive(data_dir: str = "data", meta_path: Optional[str] = None) -> Dict[str, int]:
+    """
+    Recalcula a RCORR_P das estações baixadas no modo de correção local com os
+    coeficientes atuais e regrava a pirâmide de agregados e o arquivo binário (se
+    existirem), sem baixar nada.
+
+    Returns:
+        Dict[str, int]: Linhas recalculadas por estação.
+    """
+    from src.archive import StationArchive
+    from src.rollup import update_pyramid
+
+    meta = load_station_meta(meta_path or os.path.join(data_dir, "station_meta.json"))
+    done = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "data_station", "*.txt"))):
+        station = os.path.basename(path).split("_")[0]
+        if station not in meta:
+            continue
+        df = load_station_data(path)
+        if PRESSURE_COLUMN not in df.columns or df.empty:
+            continue
+        df = apply_pressure_correction(df, meta[station])
+        if os.path.isdir(os.path.join(data_dir, "rollup", station)):
+            update_pyramid(station, df, os.path.join(data_dir, "rollup"), since=df.index.min())
+        archive = StationArchive(station, os.path.join(data_dir, "archive"))
+        if archive.exists:
+            archive.append(df)
+        done[station] = len(df)
+        print(f"{station}: RCORR_P recalculada em {len(df):,} linhas")
+    return done
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Correção barométrica local das estações e validação contra o NEST.")
+    parser.add_argument("command", choices=["calibrate", "validate", "show", "rederive"])
+    parser.add_argument("--stations", help="Estações separadas por vírgula. Defaults para as da tabela")
+    parser.add_argument("--start", help="Data inicial (YYYY-MM-DD). Defaults para 10 dias antes de --end")
+    parser.add_argument("--end", help="Data final, exclusiva (YYYY-MM-DD). Defaults para hoje")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--meta", help="Tabela de coeficientes. Defaults para <data-dir>/station_meta.json")
+    parser.add_argument("--report", help="Relatório de validação. Defaults para <data-dir>/pressure_validation.json")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE_PCT, help="Erro RMS máximo, em %%")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--nest-url", default=NEST_BASE_URL)
+    args = parser.parse_args(argv)
+
+    meta_path = args.meta or os.path.join(args.data_dir, "station_meta.json")
+    end = datetime.strptime(args.end, "%Y-%m-%d") if args.end else datetime.combine(datetime.today(), datetime.min.time())
+    start = datetime.strptime(args.start, "%Y-%m-%d") if args.start else end - DEFAULT_CALIBRATION
+    stations = args.stations.split(",") if args.stations else sorted(load_station_meta(meta_path))
+    if args.command in ("calibrate", "validate") and not stations:
+        parser.error("informe --stations")
+
+    t0 = time.perf_counter()
+    if args.command == "calibrate":
+        fitted = calibrate(stations, start, end, meta_path, args.nest_url, args.workers)
+        print(f"{len(fitted)}/{len(stations)} estações calibradas em {time.perf_counter() - t0:.1f}s")
+        if len(fitted) < len(stations):
+            return 1
+    elif args.command == "validate":
+        report = validate_stations(stations, start, end, meta_path,
+                                   args.report or os.path.join(args.data_dir, "pressure_validation.json"),
+                                   args.nest_url, args.tolerance, args.workers)
+        print(report.to_string(index=False) if not report.empty else "Nenhuma estação validada.")
+        return 0 if not report.empty and report["ok"].all() and len(report) == len(stations) else 1
+    elif args.command == "rederive":
+        rederive(args.data_dir, meta_path)
+        return 0
+
+    meta = load_station_meta(meta_path)
+    table = pd.DataFrame([asdict(meta[s]) for s in stations if s in meta])
+    if not table.empty:
+        table["beta_pct_mbar"] = table["beta"] * 100
+    print(table.to_string(index=False) if not table.empty else "Nenhuma estação calibrada.")
+    return 0
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.barometric calibrate --stations OULU,ROME --start 2024-01-01 --end 2024-01-11
+    #      python -m src.barometric validate --stations OULU,ROME --start 2024-03-01 --end 2024-03-08
+    raise SystemExit(main())
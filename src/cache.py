@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from src.processing import load_station_data
+
+DEFAULT_CACHE_DIR = os.path.join("data", ".cache", "parsed")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Incrementar quando o formato do DataFrame produzido pelo parser mudar
+PARSER_VERSION = "3"
+
+
+def file_sha256(filepath: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Cache em disco de DataFrames já processados, endereçado pelo conteúdo do arquivo.
+
+    Cada arquivo de origem é identificado por caminho, tamanho, mtime e hash SHA-256 do
+    conteúdo. Enquanto tamanho e mtime não mudam, o hash registrado é reutilizado sem
+    reler o arquivo; se mudarem, o hash é recalculado e, sendo o conteúdo igual, o
+    DataFrame salvo continua válido. Os DataFrames ficam em Feather e o espaço total é
+    limitado por `max_bytes`, descartando primeiro as entradas usadas há mais tempo (LRU).
+
+    Args:
+        cache_dir (str): Pasta do cache.
+        max_bytes (int): Tamanho máximo ocupado pelos arquivos do cache.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._bytes_served = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        if os.path.exists(self._index_path):
+            try:
+                with open(self._index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+                if index.get("version") == PARSER_VERSION:
+                    return index
+            except (OSError, ValueError):
+                pass
+        return {"version": PARSER_VERSION, "sources": {}, "blobs": {}}
+
+    def _save_index(self) -> None:
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.feather")
+
+    def _content_key(self, filepath: str, st: os.stat_result) -> str:
+        source = self._index["sources"].get(os.path.abspath(filepath))
+        if source and source["size"] == st.st_size and source["mtime_ns"] == st.st_mtime_ns:
+            return source["sha256"]
+
+        sha = file_sha256(filepath)
+        self._index["sources"][os.path.abspath(filepath)] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": sha,
+        }
+        return sha
+
+    def _evict(self) -> None:
+        blobs: Dict[str, dict] = self._index["blobs"]
+        total = sum(b["bytes"] for b in blobs.values())
+        for key in sorted(blobs, key=lambda k: blobs[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= blobs[key]["bytes"]
+            del blobs[key]
+            self._evictions += 1
+            try:
+                os.remove(self._blob_path(key))
+            except FileNotFoundError:
+                pass
+
+    def get_or_parse(
+        self,
+        filepath: str,
+        parser: Callable[[str], pd.DataFrame] = load_station_data
+    ) -> pd.DataFrame:
+        """
+        Retorna o DataFrame do arquivo, usando o cache quando o conteúdo já foi processado.
+
+        Args:
+            filepath (str): Arquivo de origem.
+            parser (Callable): Função usada em caso de falta. Defaults para `load_station_data`.
+
+        Returns:
+            pd.DataFrame: Mesmo resultado de `parser(filepath)`.
+        """
+        st = os.stat(filepath)
+        with self._lock:
+            key = f"{self._content_key(filepath, st)}-{parser.__name__}"
+            blob = self._index["blobs"].get(key)
+            if blob and os.path.exists(self._blob_path(key)):
+                blob["last_access"] = time.time()
+                self._hits += 1
+                self._bytes_served += blob["bytes"]
+                self._save_index()
+                hit = True
+            else:
+                self._misses += 1
+                hit = False
+
+        if hit:
+            df = pd.read_feather(self._blob_path(key))
+            return df.set_index(df.columns[0])
+
+        df = parser(filepath)
+        blob_path = self._blob_path(key)
+        tmp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+        df.reset_index().to_feather(tmp_path)
+        os.replace(tmp_path, blob_path)
+
+        with self._lock:
+            self._index["blobs"][key] = {
+                "bytes": os.path.getsize(blob_path),
+                "last_access": time.time(),
+            }
+            self._evict()
+            self._save_index()
+        return df
+
+    def stats(self) -> dict:
+        """
+        Estatísticas do cache nesta sessão.
+
+        Returns:
+            dict: hits, misses, hit_rate, entries, bytes (ocupados em disco),
+            bytes_served (lidos do cache) e evictions.
+        """
+        with self._lock:
+            blobs = self._index["blobs"]
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "entries": len(blobs),
+                "bytes": sum(b["bytes"] for b in blobs.values()),
+                "bytes_served": self._bytes_served,
+                "evictions": self._evictions,
+            }
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            for key in list(self._index["blobs"]):
+                try:
+                    os.remove(self._blob_path(key))
+                except FileNotFoundError:
+                    pass
+            self._index = {"version": PARSER_VERSION, "sources": {}, "blobs": {}}
+            self._save_index()
+
+
+_default_caches: Dict[str, ParseCache] = {}
+_default_caches_lock = threading.Lock()
+
+
+def parse_cache_dir(data_dir: str) -> str:
+    """Pasta do cache de leitura dentro da pasta de dados `data_dir`."""
+    return os.path.join(data_dir, ".cache", "parsed")
+
+
+def get_default_cache(cache_dir: str = DEFAULT_CACHE_DIR) -> ParseCache:
+    """Cache compartilhado no processo para a pasta `cache_dir`."""
+    with _default_caches_lock:
+        if cache_dir not in _default_caches:
+            _default_caches[cache_dir] = ParseCache(cache_dir)
+        return _default_caches[cache_dir]
+
+
+def cached_load_station_data(
+    filepath: str,
+    cache: Optional[ParseCache] = None,
+    data_dir: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Versão de `load_station_data` com cache: arquivos inalterados não são reprocessados.
+
+    Args:
+        filepath (str): Caminho do arquivo de texto da estação
+        cache (ParseCache, optional): Cache a usar. Defaults para o cache em `<data_dir>/.cache/parsed`.
+        data_dir (str, optional): Pasta de dados que contém o cache. Defaults para "data".
+
+    Returns:
+        pd.DataFrame: DataFrame com colunas ['RCORR_E', 'RUNCORR', 'RCORR_P'] indexado por data/hora
+    """
+    if cache is None:
+        cache = get_default_cache(parse_cache_dir(data_dir) if data_dir is not None else DEFAULT_CACHE_DIR)
+    return cache.get_or_parse(filepath)
@@ -0,0 +1,201 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.processing import STATION_COLUMNS
+
+TimeLike = Union[datetime, str, pd.Timestamp, np.datetime64]
+
+
+class StationCube:
+    """
+    Dados de várias estações alinhados em uma grade de tempo regular.
+
+    Os valores ficam em um único array float32 de forma (tempo × estação × tipo), com
+    NaN onde não há medida, e a validade de cada célula também é guardada em uma
+    máscara de bits compactada ao longo do tempo. Séries por estação/tipo, matrizes
+    por tipo e recortes por intervalo de tempo são views do mesmo array, sem cópia.
+
+    Em comparação com o DataFrame MultiIndex float64 produzido por `pd.concat(..., axis=1)`,
+    cada célula ocupa 4 bytes + 1 bit em vez de 8 bytes (cerca de 48% menos memória), e o
+    índice de tempo não é materializado. Quando as estações têm timestamps próprios, a
+    junção externa do DataFrame ainda cria linhas extras cheias de NaN que a grade
+    regular não tem.
+
+    Args:
+        start (np.datetime64): Primeiro instante da grade.
+        step (np.timedelta64): Passo da grade.
+        stations (List[str]): Estações (segundo eixo).
+        types (List[str]): Tipos de correção (terceiro eixo).
+        values (np.ndarray): Array float32 (tempo × estação × tipo).
+        valid_bits (np.ndarray, optional): Máscara compactada com `np.packbits(..., axis=0)`.
+            Calculada a partir dos NaN de `values` se omitida.
+        bit_offset (int): Deslocamento, em bits, do primeiro instante em `valid_bits`.
+    """
+
+    def __init__(
+        self,
+        start: np.datetime64,
+        step: np.timedelta64,
+        stations: List[str],
+        types: List[str],
+        values: np.ndarray,
+        valid_bits: Optional[np.ndarray] = None,
+        bit_offset: int = 0
+    ):
+        if values.shape[1:] != (len(stations), len(types)):
+            raise ValueError(f"Forma {values.shape} incompatível com {len(stations)} estações e {len(types)} tipos.")
+        self.start = np.datetime64(start, "ns")
+        self.step = np.timedelta64(step, "ns")
+        self.stations = list(stations)
+        self.types = list(types)
+        self.values = values
+        self.valid_bits = np.packbits(~np.isnan(values), axis=0) if valid_bits is None else valid_bits
+        self.bit_offset = bit_offset
+        self._station_pos = {s: i for i, s in enumerate(self.stations)}
+        self._type_pos = {t: i for i, t in enumerate(self.types)}
+
+    @classmethod
+    def from_series(
+        cls,
+        dataframes: Dict[str, pd.DataFrame],
+        types: Optional[List[str]] = None,
+        step: Optional[pd.Timedelta] = None,
+        start: Optional[TimeLike] = None,
+        end: Optional[TimeLike] = None
+    ) -> "StationCube":
+        """
+        Monta o cubo a partir das séries de cada estação (saída de `load_station_data`).
+
+        Cada instante é posicionado na grade por aritmética inteira; instantes fora da
+        grade são arredondados para baixo.
+
+        Args:
+            dataframes (Dict[str, pd.DataFrame]): DataFrame de cada estação, indexado por tempo.
+            types (List[str], optional): Tipos de correção. Defaults para STATION_COLUMNS.
+            step (pd.Timedelta, optional): Passo da grade. Defaults para o menor passo mediano das estações.
+            start (datetime, optional): Início da grade. Defaults para o primeiro instante dos dados.
+            end (datetime, optional): Fim da grade (inclusivo). Defaults para o último instante dos dados.
+
+        Returns:
+            StationCube: Cubo alinhado.
+        """
+        types = types or STATION_COLUMNS
+        stations = [s for s, df in dataframes.items() if not df.empty]
+        times = {s: dataframes[s].index.values.astype("datetime64[ns]").view(np.int64) for s in stations}
+
+        if step is None:
+            steps = [np.median(np.diff(t)) for t in times.values() if len(t) > 1]
+            step_ns = int(min(steps)) if steps else 60_000_000_000
+        else:
+            step_ns = pd.Timedelta(step).value
+        first = min((t[0] for t in times.values()), default=0) if start is None else pd.Timestamp(start).value
+        last = max((t[-1] for t in times.values()), default=0) if end is None else pd.Timestamp(end).value
+        first = int(first) - int(first) % step_ns
+        n_times = max(int((last - first) // step_ns) + 1, 0)
+
+        values = np.full((n_times, len(stations), len(types)), np.nan, dtype=np.float32)
+        for s, station in enumerate(stations):
+            df = dataframes[station]
+            block = df.reindex(columns=types).to_numpy(dtype=np.float32)
+            pos = (times[station] - first) // step_ns
+            inside = (pos >= 0) & (pos < n_times)
+            if not inside.all():
+                pos, block = pos[inside], block[inside]
+            if len(pos) and pos[-1] - pos[0] + 1 == len(pos) and (len(pos) == 1 or (np.diff(pos) == 1).all()):
+                # Série já regular: cópia direta, sem indexação elemento a elemento
+                values[pos[0]:pos[-1] + 1, s, :] = block
+            else:
+                values[pos, s, :] = block
+
+        return cls(np.datetime64(first, "ns"), np.timedelta64(step_ns, "ns"), stations, types, values)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, step: Optional[pd.Timedelta] = None) -> "StationCube":
+        """Monta o cubo a partir do DataFrame com colunas MultiIndex (station, type)."""
+        stations = list(dict.fromkeys(df.columns.get_level_values(0)))
+        types = list(dict.fromkeys(df.columns.get_level_values(1)))
+        frames = {s: df[s].dropna(how="all") for s in stations}
+        return cls.from_series(frames, types=types, step=step)
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def __repr__(self) -> str:
+        return (f"StationCube({len(self)} instantes × {len(self.stations)} estações × {len(self.types)} tipos, "
+                f"início {self.start}, passo {pd.Timedelta(self.step)}, {self.nbytes / 1e6:.1f} MB)")
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.valid_bits.nbytes
+
+    @property
+    def times(self) -> np.ndarray:
+        """Instantes da grade (datetime64[ns])."""
+        return self.start + self.step * np.arange(len(self))
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.times, name="datetime")
+
+    def __contains__(self, key) -> bool:
+        station, t = key
+        return station in self._station_pos and t in self._type_pos
+
+    def series(self, station: str, t: str) -> np.ndarray:
+        """Valores de uma estação e tipo (view, sem cópia)."""
+        return self.values[:, self._station_pos[station], self._type_pos[t]]
+
+    def station(self, station: str) -> np.ndarray:
+        """Matriz (tempo × tipo) de uma estação (view, sem cópia)."""
+        return self.values[:, self._station_pos[station], :]
+
+    def type_matrix(self, t: str) -> np.ndarray:
+        """Matriz (tempo × estação) de um tipo, para análises entre estações (view, sem cópia)."""
+        return self.values[:, :, self._type_pos[t]]
+
+    def valid(self, station: Optional[str] = None, t: Optional[str] = None) -> np.ndarray:
+        """
+        Desempacota a máscara de validade.
+
+        Returns:
+            np.ndarray: Booleano (tempo,) para estação e tipo, ou (tempo × estação × tipo) sem argumentos.
+        """
+        bits = self.valid_bits
+        if station is not None and t is not None:
+            bits = bits[:, self._station_pos[station], self._type_pos[t]]
+        mask = np.unpackbits(bits, axis=0, count=self.bit_offset + len(self))
+        return mask[self.bit_offset:].astype(bool)
+
+    def _position(self, when: TimeLike, ceil: bool = False) -> int:
+        delta = pd.Timestamp(when).value - int(self.start.astype(np.int64))
+        step = int(self.step.astype(np.int64))
+        return -(-delta // step) if ceil else delta // step
+
+    def slice(self, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None) -> "StationCube":
+        """
+        Recorte no intervalo [start, end], compartilhando a memória do cubo original.
+
+        Args:
+            start (datetime, optional): Início do recorte.
+            end (datetime, optional): Fim do recorte (inclusivo).
+
+        Returns:
+            StationCube: Cubo recortado.
+        """
+        i0 = 0 if start is None else min(max(self._position(start, ceil=True), 0), len(self))
+        i1 = len(self) if end is None else min(max(self._position(end) + 1, i0), len(self))
+
+        bit = self.bit_offset + i0
+        return StationCube(
+            self.start + i0 * self.step, self.step, self.stations, self.types,
+            self.values[i0:i1], self.valid_bits[bit // 8:(self.bit_offset + i1 + 7) // 8], bit % 8
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame com colunas MultiIndex (station, type), no formato antigo."""
+        columns = pd.MultiIndex.from_product([self.stations, self.types], names=["station", "type"])
+        data = self.values.reshape(len(self), -1).astype(np.float64)
+        return pd.DataFrame(data, index=self.index, columns=columns)
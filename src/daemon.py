@@ -0,0 +1,292 @@
+import argparse
+import heapq
+import json
+import os
+import random
+import signal
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from src.download import get_session
+from src.extractors import SWPC_BASE_URL
+from src.http_cache import ResponseCache, fetch, get_response_cache, http_cache_dir
+from src.ingest import FEED_SCHEMAS, FeedSchema, read_feed
+from src.storage import last_timestamp, store_dir, update_store
+
+
+@dataclass
+class Feed:
+    """
+    Feed do SWPC acompanhado pelo daemon.
+
+    Attributes:
+        name (str): Nome curto (goes, ace_epam, ace_sis, kp_1m).
+        path (str): Caminho do JSON a partir do endereço base do SWPC.
+        cadence (float): Cadência de publicação, em segundos.
+        save_path (str): Caminho do .xlsx correspondente (define a pasta do armazenamento).
+        time_col (str): Coluna de tempo.
+        keys (List[str]): Colunas que identificam um registro.
+        schema (FeedSchema): Esquema usado na leitura do JSON (ver `src.ingest`).
+        publish_delay (float): Quanto após cada fronteira da cadência o SWPC costuma publicar.
+    """
+    name: str
+    path: str
+    cadence: float
+    save_path: str
+    time_col: str
+    keys: List[str]
+    schema: FeedSchema
+    publish_delay: float = 10.0
+
+
+def default_feeds(data_dir: str = "data") -> Dict[str, Feed]:
+    """Feeds de tempo quase real: GOES e ACE de 5 minutos e Kp de 1 minuto."""
+    goes = os.path.join(data_dir, "data_goes", "goes_protons.xlsx")
+    ace = os.path.join(data_dir, "data_ace")
+    kp = os.path.join(data_dir, "data_kp", "kp_index_1min.xlsx")
+    feeds = [
+        Feed("goes", "/json/goes/primary/integral-protons-6-hour.json", 300, goes,
+             "time_tag", ["time_tag", "satellite", "energy"], FEED_SCHEMAS["goes"]),
+        Feed("ace_epam", "/json/ace/epam/ace_epam_5m.json", 300, os.path.join(ace, "ace_epam_5m.xlsx"),
+             "time_tag", ["time_tag"], FEED_SCHEMAS["ace_epam"]),
+        Feed("ace_sis", "/json/ace/sis/ace_sis_5m.json", 300, os.path.join(ace, "ace_sis_5m.xlsx"),
+             "time_tag", ["time_tag"], FEED_SCHEMAS["ace_sis"]),
+        Feed("kp_1m", "/json/planetary_k_index_1m.json", 60, kp,
+             "time_tag", ["time_tag"], FEED_SCHEMAS["kp_1m"]),
+    ]
+    return {feed.name: feed for feed in feeds}
+
+
+@dataclass
+class FeedState:
+    last_seen: Optional[pd.Timestamp] = None
+    polls: int = 0
+    new_records: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    last_error: Optional[str] = None
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+
+class SwpcDaemon:
+    """
+    Acompanha os feeds do SWPC continuamente, gravando só os registros novos.
+
+    Cada feed é consultado logo após as fronteiras da sua cadência (por exemplo,
+    hh:mm:10 para o Kp de 1 minuto). Se o dado da fronteira ainda não saiu, a consulta
+    é repetida em intervalos curtos durante a primeira metade do período; falhas
+    adiam a próxima tentativa com espera exponencial e variação aleatória. As
+    consultas usam requisições condicionais (`src.http_cache`), e apenas registros
+    estritamente posteriores ao último instante visto do feed são gravados.
+
+    A latência registrada vai da publicação (Last-Modified do servidor, ou o fim do
+    intervalo do registro mais novo) até o fim da gravação.
+
+    Args:
+        feeds (Dict[str, Feed], optional): Feeds a acompanhar. Defaults para `default_feeds()`.
+        base_url (str): Endereço base do SWPC.
+        cache (ResponseCache, optional): Cache de respostas HTTP.
+        session (requests.Session, optional): Sessão HTTP. Defaults para a sessão compartilhada.
+        timeout (float): Tempo máximo de cada requisição, em segundos.
+        base_backoff (float): Primeira espera após uma falha, em segundos.
+        max_backoff (float): Espera máxima após falhas seguidas, em segundos.
+        metrics_path (str, optional): Arquivo JSON atualizado com as métricas.
+        metrics_interval (float): Intervalo entre atualizações das métricas, em segundos.
+    """
+
+    def __init__(
+        self,
+        feeds: Optional[Dict[str, Feed]] = None,
+        base_url: str = SWPC_BASE_URL,
+        cache: Optional[ResponseCache] = None,
+        session: Optional[requests.Session] = None,
+        timeout: float = 10,
+        base_backoff: float = 2.0,
+        max_backoff: float = 300.0,
+        metrics_path: Optional[str] = None,
+        metrics_interval: float = 60.0
+    ):
+        self.feeds = feeds or default_feeds()
+        self.base_url = base_url
+        self.cache = cache or get_response_cache()
+        self.session = session or get_session()
+        self.timeout = timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self.state: Dict[str, FeedState] = {}
+        self._stop = threading.Event()
+
+        for name, feed in self.feeds.items():
+            last = last_timestamp(store_dir(feed.save_path), feed.time_col)
+            self.state[name] = FeedState(last_seen=last)
+
+    def next_boundary(self, feed: Feed, now: float) -> float:
+        """Próximo instante de consulta alinhado à cadência do feed."""
+        due = (now - feed.publish_delay) // feed.cadence * feed.cadence + feed.cadence + feed.publish_delay
+        return due if due > now else due + feed.cadence
+
+    def poll(self, name: str) -> int:
+        """
+        Consulta um feed uma vez e grava os registros novos.
+
+        Returns:
+            int: Número de registros gravados.
+        """
+        feed, state = self.feeds[name], self.state[name]
+        state.polls += 1
+        response = fetch(self.base_url + feed.path, ttl=0, cache=self.cache,
+                         session=self.session, timeout=self.timeout)
+        if not response.ok:
+            raise requests.HTTPError(f"código {response.status}")
+        if not response.changed and state.last_seen is not None:
+            return 0
+
+        df = read_feed(response.content, feed.schema)
+        df = df[df[feed.time_col].notna()]
+        if state.last_seen is not None:
+            df = df[df[feed.time_col] > state.last_seen]
+        if df.empty:
+            response.commit()
+            return 0
+
+        update_store(df, feed.save_path, feed.time_col, feed.keys)
+        response.commit()
+        persisted = time.time()
+
+        newest = df[feed.time_col].max()
+        state.last_seen = newest
+        state.new_records += len(df)
+        if response.last_modified:
+            published = parsedate_to_datetime(response.last_modified).timestamp()
+        else:
+            published = newest.tz_localize("UTC").timestamp() + feed.cadence
+        state.latencies.append(max(persisted - published, 0.0))
+        return len(df)
+
+    def _schedule(self, name: str, now: float, new: Optional[int]) -> float:
+        feed, state = self.feeds[name], self.state[name]
+        if new is None:
+            # Falha: espera exponencial com variação aleatória
+            delay = min(self.max_backoff, self.base_backoff * 2 ** (state.consecutive_failures - 1))
+            return now + delay * random.uniform(0.5, 1.5)
+
+        boundary = self.next_boundary(feed, now)
+        slot_start = boundary - feed.cadence
+        if new == 0 and now < slot_start + feed.cadence / 2:
+            # O registro da fronteira atual ainda não saiu: tenta de novo em breve
+            return min(now + max(feed.cadence / 20, 1.0), boundary)
+        return boundary
+
+    def metrics(self) -> dict:
+        """Métricas por feed: consultas, registros, falhas e latência publicação → gravação (s)."""
+        out = {}
+        for name, state in self.state.items():
+            latencies = list(state.latencies)
+            out[name] = {
+                "last_seen": state.last_seen.isoformat() if state.last_seen is not None else None,
+                "polls": state.polls,
+                "new_records": state.new_records,
+                "failures": state.failures,
+                "last_error": state.last_error,
+                "latency_last": latencies[-1] if latencies else None,
+                "latency_p50": statistics.median(latencies) if latencies else None,
+                "latency_max": max(latencies) if latencies else None,
+            }
+        return out
+
+    def _write_metrics(self) -> None:
+        if not self.metrics_path:
+            return
+        os.makedirs(os.path.dirname(self.metrics_path) or ".", exist_ok=True)
+        tmp_path = self.metrics_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": time.time(), "feeds": self.metrics()}, f, indent=2)
+        os.replace(tmp_path, self.metrics_path)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self, duration: Optional[float] = None, poll_now: bool = True) -> None:
+        """
+        Executa o laço do daemon até `stop()` ou até `duration` segundos.
+
+        Args:
+            duration (float, optional): Tempo máximo de execução, em segundos.
+            poll_now (bool): Consulta todos os feeds ao iniciar, sem esperar a primeira fronteira.
+        """
+        start = time.time()
+        deadline = start + duration if duration else None
+        queue = [(start if poll_now else self.next_boundary(feed, start), name) for name, feed in self.feeds.items()]
+        heapq.heapify(queue)
+        next_metrics = start + self.metrics_interval
+        print(f"Daemon SWPC iniciado: {', '.join(self.feeds)}")
+
+        while not self._stop.is_set():
+            due, name = queue[0]
+            wake = min(due, next_metrics, deadline or due)
+            if self._stop.wait(max(wake - time.time(), 0)):
+                break
+            now = time.time()
+            if deadline and now >= deadline:
+                break
+            if now >= next_metrics:
+                self._write_metrics()
+                next_metrics = now + self.metrics_interval
+            if now < due:
+                continue
+
+            heapq.heappop(queue)
+            state = self.state[name]
+            try:
+                new = self.poll(name)
+                state.consecutive_failures = 0
+                if new:
+                    print(f"[{name}] +{new} registros até {state.last_seen} "
+                          f"(latência {state.latencies[-1]:.1f}s)")
+            except Exception as e:
+                new = None
+                state.failures += 1
+                state.consecutive_failures += 1
+                state.last_error = f"{type(e).__name__}: {e}"
+                print(f"[{name}] falha na consulta ({state.consecutive_failures}x seguidas): {e}")
+            heapq.heappush(queue, (self._schedule(name, time.time(), new), name))
+
+        self._write_metrics()
+        print("Daemon SWPC encerrado.")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Acompanha os feeds do SWPC em tempo quase real.")
+    parser.add_argument("--feeds", help="Feeds separados por vírgula (goes,ace_epam,ace_sis,kp_1m)")
+    parser.add_argument("--base-url", default=SWPC_BASE_URL)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--metrics", help="Arquivo de métricas. Defaults para <data-dir>/daemon_metrics.json")
+    parser.add_argument("--metrics-interval", type=float, default=60.0)
+    parser.add_argument("--duration", type=float, help="Encerra após N segundos")
+    args = parser.parse_args(argv)
+
+    feeds = default_feeds(args.data_dir)
+    if args.feeds:
+        feeds = {name: feeds[name] for name in args.feeds.split(",")}
+
+    daemon = SwpcDaemon(feeds, args.base_url, cache=get_response_cache(http_cache_dir(args.data_dir)),
+                        metrics_path=args.metrics or os.path.join(args.data_dir, "daemon_metrics.json"),
+                        metrics_interval=args.metrics_interval)
+    signal.signal(signal.SIGINT, lambda *_: daemon.stop())
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    daemon.run(args.duration)
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.daemon --feeds kp_1m,ace_epam
+    main()
@@ -1,7 +1,387 @@
+import codecs
+import contextlib
 import requests
 import os
-from datetime import datetime
-from typing import List, Optional
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, Iterator, List, Optional, TextIO, Tuple
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from src.instrument import span
+
+NEST_BASE_URL = "http://nest.nmdb.eu/draw_graph.php"
+
+# corr_for_efficiency primeiro: vai em `dtype` e mantém a ordem de colunas que o NEST
+# devolve sem `dtype` (RCORR_E, RUNCORR, RCORR_P), a mesma dos arquivos já baixados
+DEFAULT_TYPES = [
+    "corr_for_efficiency",
+    "uncorrected",
+    "corr_for_pressure"
+]
+
+# Modo de correção local (`src.barometric`): contagens sem correção e pressão no lugar da
+# RCORR_P, que é calculada a partir delas. Como o primeiro tipo vai em `dtype` (ver
+# `build_station_url`), o NEST não acrescenta a RCORR_E e a resposta tem só duas colunas
+PRESSURE_TYPES = [
+    "uncorrected",
+    "pressure_mbar"
+]
+
+# Coluna padronizada (ver `src.processing`) -> tipo de dado pedido ao NEST
+COLUMN_TYPES = {
+    "RUNCORR": "uncorrected",
+    "RCORR_P": "corr_for_pressure",
+    "RCORR_E": "corr_for_efficiency",
+    "PRESS": "pressure_mbar",
+}
+
+# Janela padrão das consultas fatiadas: pequena o bastante para o NEST
+# responder com a tabela de 1 minuto, sem média no servidor.
+DEFAULT_WINDOW = timedelta(days=5)
+MIN_WINDOW = timedelta(hours=1)
+
+# Avisos do NEST indicando que a resposta perdeu resolução.
+DOWNSAMPLING_MARKERS = (
+    "automatically switched to the 1hour",
+    "data has been averaged to",
+)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+_host_limits: Dict[str, threading.BoundedSemaphore] = {}
+_host_limits_lock = threading.Lock()
+
+
+@dataclass
+class StationDownloadResult:
+    """
+    Resultado do download de uma estação.
+
+    Attributes:
+        station (str): Código da estação.
+        file_path (str): Caminho do arquivo de destino.
+        status (str): "ok", "no_data" ou "error".
+        http_status (int, optional): Código HTTP retornado pelo NEST.
+        n_bytes (int): Tamanho da resposta em bytes.
+        elapsed (float): Tempo total da requisição em segundos.
+        error (str, optional): Mensagem de erro, quando houver.
+    """
+    station: str
+    file_path: str
+    status: str
+    http_status: Optional[int] = None
+    n_bytes: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+def get_session(pool_maxsize: int = 16) -> requests.Session:
+    """
+    Retorna a sessão HTTP compartilhada (keep-alive) usada pelos downloads.
+
+    A sessão é criada uma única vez por processo; o pool de conexões do
+    urllib3 é thread-safe, então a mesma sessão pode ser usada pelas threads
+    de `download_stations`.
+
+    Args:
+        pool_maxsize (int): Número máximo de conexões mantidas por host.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def _host_semaphore(url: str, max_per_host: int) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _host_limits_lock:
+        key = f"{host}#{max_per_host}"
+        if key not in _host_limits:
+            _host_limits[key] = threading.BoundedSemaphore(max_per_host)
+        return _host_limits[key]
+
+
+def build_station_url(
+    station_code: str,
+    start_date: datetime,
+    end_date: datetime,
+    include_types: Optional[List[str]] = None,
+    base_url: str = NEST_BASE_URL
+) -> str:
+    """
+    Monta a URL de consulta ASCII do NEST (draw_graph.php) para uma estação.
+
+    Args:
+        station_code (str): Código da estação (ex: "OULU").
+        start_date (datetime): Data de início do intervalo.
+        end_date (datetime): Data de fim do intervalo.
+        include_types (List[str], optional): Tipos de dados desejados. Defaults para as três opções principais.
+            O primeiro vai em `dtype` (tipo principal) e os demais em `odtype[]`; sem `dtype`
+            o NEST usa corr_for_efficiency como principal e a inclui na resposta.
+        base_url (str): Endereço do draw_graph.php (permite apontar para um servidor local).
+    """
+    include_types = include_types or DEFAULT_TYPES
+    odtype_params = f"&dtype={include_types[0]}" + "".join(
+        f"&odtype[]={dtype}" for dtype in include_types[1:] if dtype != include_types[0]
+    )
+
+    return (
+        f"{base_url}?formchk=1"
+        f"&stations[]={station_code}"
+        f"&output=ascii"
+        f"&tabchoice=revori"
+        f"{odtype_params}"
+        f"&date_choice=bydate"
+        f"&start_year={start_date.year}&start_month={start_date.month}&start_day={start_date.day}"
+        f"&start_hour={start_date.hour}&start_min={start_date.minute}"
+        f"&end_year={end_date.year}&end_month={end_date.month}&end_day={end_date.day}"
+        f"&end_hour={end_date.hour}&end_min={end_date.minute}"
+        f"&yunits=0"
+    )
+
+
+def plan_query_windows(
+    start_date: datetime,
+    end_date: datetime,
+    window: timedelta = DEFAULT_WINDOW
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Divide o intervalo [start_date, end_date) em janelas consecutivas de no máximo `window`.
+
+    Args:
+        start_date (datetime): Início do intervalo.
+        end_date (datetime): Fim do intervalo.
+        window (timedelta): Duração máxima de cada janela.
+
+    Returns:
+        List[Tuple[datetime, datetime]]: Janelas (início, fim) em ordem cronológica.
+    """
+    if window <= timedelta(0):
+        raise ValueError("A janela deve ser positiva.")
+
+    windows = []
+    current = start_date
+    while current < end_date:
+        upper = min(current + window, end_date)
+        windows.append((current, upper))
+        current = upper
+    return windows
+
+
+def is_downsampled(text: str) -> bool:
+    """Indica se a resposta do NEST avisa que trocou de tabela ou fez média no servidor."""
+    lowered = text.lower()
+    return any(marker in lowered for marker in DOWNSAMPLING_MARKERS)
+
+
+def _is_no_data(text: str) -> bool:
+    return "DOCTYPE html" in text or "no data available" in text.lower()
+
+
+@dataclass
+class StreamedBlock:
+    """
+    Resumo de uma resposta do NEST processada em streaming.
+
+    Attributes:
+        status (str): "ok", "no_data" ou "downsampled" (interrompida por redução de resolução).
+        header (List[str]): Cabeçalho do bloco <pre> (até a linha `start_date_time`).
+        n_rows (int): Linhas de dados gravadas.
+        n_bytes (int): Bytes recebidos.
+        downsampled (bool): True se a resposta avisou redução de resolução.
+        http_status (int, optional): Código HTTP.
+        preview (str): Início da resposta, para diagnóstico.
+    """
+    status: str
+    header: List[str]
+    n_rows: int = 0
+    n_bytes: int = 0
+    downsampled: bool = False
+    http_status: Optional[int] = None
+    preview: str = ""
+
+
+def stream_nest_block(
+    response: requests.Response,
+    out: TextIO,
+    raw: Optional[BinaryIO] = None,
+    write_header: bool = True,
+    stop_if_downsampled: bool = False,
+    chunk_size: int = 1 << 16
+) -> StreamedBlock:
+    """
+    Extrai o bloco <pre> de uma resposta do NEST à medida que ela chega.
+
+    Apenas o cabeçalho e as linhas de dados são gravados em `out`; o HTML, o CSS e o
+    dump da consulta SQL são descartados. A memória usada é limitada a uma linha,
+    qualquer que seja o tamanho do intervalo consultado.
+
+    Args:
+        response (requests.Response): Resposta aberta com `stream=True`.
+        out (TextIO): Destino do cabeçalho e das linhas de dados.
+        raw (BinaryIO, optional): Se informado, recebe a resposta original (depuração).
+        write_header (bool): Se False, grava apenas as linhas de dados.
+        stop_if_downsampled (bool): Interrompe a leitura ao encontrar aviso de redução de resolução.
+        chunk_size (int): Tamanho dos blocos lidos da conexão.
+
+    Returns:
+        StreamedBlock: Resumo da resposta.
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    block = StreamedBlock("ok", [], http_status=response.status_code)
+    state = "before"
+    no_data = False
+    pending = ""
+
+    def handle(line: str) -> str:
+        nonlocal no_data
+        line = line.rstrip("\r")
+        if state == "before":
+            no_data = no_data or _is_no_data(line)
+            block.downsampled = block.downsampled or is_downsampled(line)
+            if "<pre>" not in line:
+                return "before"
+            if stop_if_downsampled and block.downsampled:
+                return "abort"
+            line = line.split("<pre>", 1)[1]
+            line = line.split("<code>", 1)[-1]
+            if not line:
+                return "header"
+        if state in ("before", "header"):
+            block.header.append(line)
+            if line.lstrip().startswith("start_date_time"):
+                if write_header:
+                    out.write("\n".join(block.header))
+                    out.write("\n")
+                return "data"
+            return "header"
+        if state == "data":
+            if line.startswith("</code>"):
+                return "after"
+            if ";" in line:
+                out.write(line)
+                out.write("\n")
+                block.n_rows += 1
+        return state
+
+    for chunk in response.iter_content(chunk_size):
+        block.n_bytes += len(chunk)
+        if raw is not None:
+            raw.write(chunk)
+        if state == "after":
+            # Continua lendo só para devolver a conexão ao pool
+            continue
+        text = decoder.decode(chunk)
+        if len(block.preview) < 300:
+            block.preview += text[:300 - len(block.preview)]
+        pending += text
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            state = handle(line)
+            if state == "abort":
+                break
+        if state == "abort":
+            response.close()
+            block.status = "downsampled"
+            return block
+
+    pending += decoder.decode(b"", final=True)
+    if pending and state != "after":
+        state = handle(pending)
+
+    if no_data or state == "before":
+        block.status = "no_data"
+    return block
+
+
+def _stream_to_file(
+    response: requests.Response,
+    file_path: str,
+    raw_html_path: Optional[str] = None,
+    **kwargs
+) -> StreamedBlock:
+    """Grava o bloco de dados em `file_path` de forma atômica (nada é gravado se não houver dados)."""
+    tmp_path = f"{file_path}.{threading.get_ident()}.part"
+    raw = open(raw_html_path, "wb") if raw_html_path else None
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="\n") as out:
+            block = stream_nest_block(response, out, raw, **kwargs)
+    finally:
+        if raw is not None:
+            raw.close()
+
+    if block.status == "ok":
+        os.replace(tmp_path, file_path)
+    else:
+        os.remove(tmp_path)
+    return block
+
+
+def _open_stream(
+    url: str,
+    session: requests.Session,
+    timeout: float
+) -> requests.Response:
+    response = session.get(url, timeout=timeout, stream=True)
+    response.raise_for_status()
+    return response
+
+
+def _fetch_station(
+    station_code: str,
+    file_path: str,
+    start_date: datetime,
+    end_date: datetime,
+    include_types: Optional[List[str]],
+    base_url: str,
+    session: Optional[requests.Session],
+    timeout: float,
+    raw_html_path: Optional[str] = None
+) -> StationDownloadResult:
+    url = build_station_url(station_code, start_date, end_date, include_types, base_url)
+    session = session or get_session()
+
+    with span("download_station_data", station_code) as s:
+        print(f"🔗 Requisitando dados de {station_code}...")
+        t0 = time.perf_counter()
+        with _open_stream(url, session, timeout) as response:
+            block = _stream_to_file(response, file_path, raw_html_path)
+        elapsed = time.perf_counter() - t0
+        s.add(bytes=block.n_bytes, rows_written=block.n_rows)
+
+        if block.status != "ok":
+            print(f"Nenhum dado disponível para {station_code}. Status {block.http_status}")
+            print("Prévia da resposta:", block.preview)
+            return StationDownloadResult(
+                station_code, file_path, "no_data",
+                http_status=block.http_status, n_bytes=block.n_bytes, elapsed=elapsed
+            )
+
+        if block.downsampled:
+            print(f"Aviso: o NEST reduziu a resolução dos dados de {station_code}.")
+        print(f"Dados salvos: {file_path} ({block.n_rows} linhas)")
+        return StationDownloadResult(
+            station_code, file_path, "ok",
+            http_status=block.http_status, n_bytes=block.n_bytes, elapsed=elapsed
+        )
+
 
 def download_station_data(
     station_code: str,
@@ -9,11 +389,18 @@ def download_station_data(
     year: Optional[int] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    include_types: Optional[List[str]] = None
-) -> None:
+    include_types: Optional[List[str]] = None,
+    base_url: str = NEST_BASE_URL,
+    session: Optional[requests.Session] = None,
+    timeout: float = 120,
+    raw_html_path: Optional[str] = None
+) -> bool:
     """
     Faz o download dos dados da estação NMDB no formato ASCII.
 
+    A resposta é lida em streaming e apenas o bloco de dados (cabeçalho `#` e linhas
+    `start_date_time;...`) é gravado, sem o HTML da página.
+
     Args:
         station_code (str): Código da estação (ex: "OULU").
         file_path (str): Caminho completo para salvar o arquivo.
@@ -21,42 +408,344 @@ def download_station_data(
         start_date (datetime, optional): Data de início do intervalo.
         end_date (datetime, optional): Data de fim do intervalo.
         include_types (List[str], optional): Lista com os tipos de dados desejados. Defaults para as três opções principais.
+        base_url (str): Endereço do draw_graph.php. Defaults para o NEST oficial.
+        session (requests.Session, optional): Sessão HTTP a reutilizar. Defaults para a sessão compartilhada.
+        timeout (float): Tempo máximo de espera pela resposta, em segundos.
+        raw_html_path (str, optional): Se informado, guarda também a página HTML original (depuração).
+
+    Returns:
+        bool: True se o arquivo foi salvo.
     """
     if not start_date or not end_date:
         raise ValueError("É necessário fornecer start_date e end_date.")
 
-    include_types = include_types or [
-        "uncorrected",
-        "corr_for_pressure",
-        "corr_for_efficiency"
-    ]
+    result = _fetch_station(
+        station_code, file_path, start_date, end_date,
+        include_types, base_url, session, timeout, raw_html_path
+    )
+    return result.ok
 
-    base_url = "http://nest.nmdb.eu/draw_graph.php"
-    odtype_params = "".join(f"&odtype[]={dtype}" for dtype in include_types)
 
-    url = (
-        f"{base_url}?formchk=1"
-        f"&stations[]={station_code}"
-        f"&output=ascii"
-        f"&tabchoice=revori"
-        f"{odtype_params}"
-        f"&date_choice=bydate"
-        f"&start_year={start_date.year}&start_month={start_date.month}&start_day={start_date.day}"
-        f"&start_hour={start_date.hour}&start_min={start_date.minute}"
-        f"&end_year={end_date.year}&end_month={end_date.month}&end_day={end_date.day}"
-        f"&end_hour={end_date.hour}&end_min={end_date.minute}"
-        f"&yunits=0"
+def _stream_window(
+    station_code: str,
+    start_date: datetime,
+    end_date: datetime,
+    include_types: Optional[List[str]],
+    base_url: str,
+    session: requests.Session,
+    timeout: float,
+    semaphore: Optional[threading.BoundedSemaphore],
+    part_path: str,
+    stop_if_downsampled: bool
+) -> StreamedBlock:
+    url = build_station_url(station_code, start_date, end_date, include_types, base_url)
+    if semaphore is None:
+        semaphore = contextlib.nullcontext()
+    with semaphore, _open_stream(url, session, timeout) as response:
+        return _stream_to_file(
+            response, part_path, write_header=False, stop_if_downsampled=stop_if_downsampled
+        )
+
+
+@dataclass
+class WindowedFetch:
+    """
+    Resultado de uma consulta feita em várias janelas.
+
+    Attributes:
+        header (List[str]): Cabeçalho do bloco <pre> (até a linha `start_date_time`).
+        parts (List[str]): Arquivos temporários com as linhas de cada janela, em ordem cronológica.
+        n_bytes (int): Total de bytes recebidos.
+        n_resplit (int): Número de janelas redivididas por redução de resolução.
+        downsampled (bool): True se alguma janela continuou com resolução reduzida.
+    """
+    header: List[str]
+    parts: List[str]
+    n_bytes: int = 0
+    n_resplit: int = 0
+    downsampled: bool = False
+
+    def iter_rows(self) -> Iterator[str]:
+        """Linhas de todas as janelas, em ordem e sem timestamps repetidos nas fronteiras."""
+        last = ""
+        for part in self.parts:
+            with open(part, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if line[:19] > last:
+                        last = line[:19]
+                        yield line
+
+
+def _fetch_windows_to_parts(
+    station_code: str,
+    start_date: datetime,
+    end_date: datetime,
+    include_types: Optional[List[str]],
+    base_url: str,
+    session: requests.Session,
+    timeout: float,
+    window: timedelta,
+    min_window: timedelta,
+    max_workers: int,
+    semaphore: Optional[threading.BoundedSemaphore],
+    tmp_dir: str
+) -> WindowedFetch:
+    headers: Dict[datetime, List[str]] = {}
+    parts: Dict[datetime, str] = {}
+    result = WindowedFetch(header=[], parts=[])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit(w_start: datetime, w_end: datetime):
+            part_path = os.path.join(tmp_dir, f"{w_start:%Y%m%d%H%M}.part")
+            future = executor.submit(
+                _stream_window, station_code, w_start, w_end, include_types, base_url,
+                session, timeout, semaphore, part_path, w_end - w_start > min_window
+            )
+            return future, (w_start, w_end, part_path)
+
+        pending = dict(submit(a, b) for a, b in plan_query_windows(start_date, end_date, window))
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                w_start, w_end, part_path = pending.pop(future)
+                block = future.result()
+                result.n_bytes += block.n_bytes
+
+                # O NEST reduziu a resolução: divide a janela ao meio e tenta de novo
+                if block.status == "downsampled":
+                    middle = w_start + (w_end - w_start) / 2
+                    middle = middle.replace(second=0, microsecond=0)
+                    if w_start < middle < w_end:
+                        result.n_resplit += 1
+                        pending.update([submit(w_start, middle), submit(middle, w_end)])
+                        continue
+                    # Não é possível dividir mais: aceita a janela como veio
+                    block = _stream_window(
+                        station_code, w_start, w_end, include_types, base_url,
+                        session, timeout, semaphore, part_path, False
+                    )
+                    result.n_bytes += block.n_bytes
+
+                if block.status != "ok":
+                    continue
+                result.downsampled = result.downsampled or block.downsampled
+                headers[w_start] = block.header
+                parts[w_start] = part_path
+
+    if parts:
+        # Cabeçalho da primeira janela, com o intervalo total da consulta
+        result.header = [
+            f"#     START TIME: {start_date:%Y-%m-%d %H:%M:%S} UTC" if "START TIME:" in line else
+            f"#       END TIME: {end_date:%Y-%m-%d %H:%M:%S} UTC" if "END TIME:" in line else line
+            for line in headers[min(headers)]
+        ]
+        result.parts = [parts[key] for key in sorted(parts)]
+    return result
+
+
+def fetch_station_windows(
+    station_code: str,
+    start_date: datetime,
+    end_date: datetime,
+    include_types: Optional[List[str]] = None,
+    base_url: str = NEST_BASE_URL,
+    session: Optional[requests.Session] = None,
+    timeout: float = 120,
+    window: timedelta = DEFAULT_WINDOW,
+    min_window: timedelta = MIN_WINDOW,
+    max_workers: int = 4,
+    semaphore: Optional[threading.BoundedSemaphore] = None
+) -> Tuple[List[str], List[str], int]:
+    """
+    Consulta o intervalo em janelas paralelas e devolve as linhas em memória.
+
+    Indicado para intervalos curtos (atualizações); downloads longos devem usar
+    `download_station_data_chunked`, que grava em disco sem acumular as linhas.
+
+    Returns:
+        Tuple[List[str], List[str], int]: Cabeçalho, linhas ordenadas e sem repetição,
+        e total de bytes recebidos.
+    """
+    with tempfile.TemporaryDirectory(prefix="nest_") as tmp_dir:
+        fetched = _fetch_windows_to_parts(
+            station_code, start_date, end_date, include_types, base_url,
+            session or get_session(), timeout, window, min_window, max_workers, semaphore, tmp_dir
+        )
+        return fetched.header, list(fetched.iter_rows()), fetched.n_bytes
+
+
+def _fetch_station_chunked(
+    station_code: str,
+    file_path: str,
+    start_date: datetime,
+    end_date: datetime,
+    include_types: Optional[List[str]],
+    base_url: str,
+    session: requests.Session,
+    timeout: float,
+    window: timedelta,
+    min_window: timedelta,
+    max_workers: int,
+    semaphore: Optional[threading.BoundedSemaphore]
+) -> StationDownloadResult:
+    with span("download_station_data", station_code) as s:
+        print(f"🔗 Requisitando dados de {station_code} em janelas de {window}...")
+        t0 = time.perf_counter()
+        out_dir = os.path.dirname(os.path.abspath(file_path))
+
+        with tempfile.TemporaryDirectory(prefix=f".{station_code}_", dir=out_dir) as tmp_dir:
+            fetched = _fetch_windows_to_parts(
+                station_code, start_date, end_date, include_types, base_url, session,
+                timeout, window, min_window, max_workers, semaphore, tmp_dir
+            )
+            elapsed = time.perf_counter() - t0
+            s.add(bytes=fetched.n_bytes)
+
+            if not fetched.parts:
+                print(f"Nenhum dado disponível para {station_code}.")
+                return StationDownloadResult(station_code, file_path, "no_data", n_bytes=fetched.n_bytes, elapsed=elapsed)
+
+            # As janelas já chegam ordenadas: basta concatená-las, sem carregar as linhas em memória
+            n_rows = 0
+            tmp_path = os.path.join(tmp_dir, "merged")
+            with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+                f.write("\n".join(fetched.header))
+                f.write("\n")
+                for line in fetched.iter_rows():
+                    f.write(line)
+                    f.write("\n")
+                    n_rows += 1
+            os.replace(tmp_path, file_path)
+            s.add(rows_written=n_rows)
+
+        if fetched.downsampled:
+            print(f"Aviso: {station_code} ainda contém janelas com resolução reduzida pelo NEST.")
+        print(f"Dados salvos: {file_path} ({n_rows} linhas, {fetched.n_resplit} janelas redivididas)")
+        return StationDownloadResult(
+            station_code, file_path, "ok", http_status=200, n_bytes=fetched.n_bytes, elapsed=elapsed
+        )
+
+
+def download_station_data_chunked(
+    station_code: str,
+    file_path: str,
+    start_date: datetime,
+    end_date: datetime,
+    include_types: Optional[List[str]] = None,
+    window: timedelta = DEFAULT_WINDOW,
+    min_window: timedelta = MIN_WINDOW,
+    max_workers: int = 4,
+    base_url: str = NEST_BASE_URL,
+    session: Optional[requests.Session] = None,
+    timeout: float = 120
+) -> StationDownloadResult:
+    """
+    Baixa uma estação em resolução nativa, fatiando o intervalo em janelas paralelas.
+
+    Cada janela é pequena o suficiente para o NEST não trocar para a tabela horária.
+    Se mesmo assim a resposta avisar que houve redução de resolução, a janela é dividida
+    ao meio e consultada de novo (até `min_window`). As janelas são reunidas em um único
+    arquivo, ordenado e sem timestamps repetidos, legível por `load_station_data`.
+
+    Args:
+        station_code (str): Código da estação (ex: "OULU").
+        file_path (str): Caminho completo para salvar o arquivo.
+        start_date (datetime): Data de início do intervalo.
+        end_date (datetime): Data de fim do intervalo.
+        include_types (List[str], optional): Tipos de dados desejados. Defaults para as três opções principais.
+        window (timedelta): Tamanho inicial das janelas.
+        min_window (timedelta): Menor janela admitida ao redividir.
+        max_workers (int): Número de janelas baixadas em paralelo.
+        base_url (str): Endereço do draw_graph.php. Defaults para o NEST oficial.
+        session (requests.Session, optional): Sessão HTTP a reutilizar. Defaults para a sessão compartilhada.
+        timeout (float): Tempo máximo de espera por resposta, em segundos.
+
+    Returns:
+        StationDownloadResult: Resultado do download.
+    """
+    return _fetch_station_chunked(
+        station_code, file_path, start_date, end_date, include_types, base_url,
+        session or get_session(), timeout, window, min_window, max_workers, None
     )
 
-    print(f"🔗 Requisitando dados de {station_code}...")
-    response = requests.get(url)
 
-    if "DOCTYPE html" in response.text or "no data available" in response.text.lower():
-        print(f"Nenhum dado disponível para {station_code}. Status {response.status_code}")
-        print("Prévia da resposta:", response.text[:300])
-        return
+def download_stations(
+    stations: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    output_dir: str,
+    include_types: Optional[List[str]] = None,
+    max_workers: int = 8,
+    max_per_host: int = 4,
+    base_url: str = NEST_BASE_URL,
+    timeout: float = 120,
+    filename_template: str = "{station}_{year}.txt",
+    window: Optional[timedelta] = None,
+    window_workers: int = 4
+) -> Dict[str, StationDownloadResult]:
+    """
+    Baixa várias estações em paralelo usando um pool de threads e uma sessão HTTP com keep-alive.
+
+    O tempo total fica próximo ao da estação mais lenta em vez da soma de todas.
+    O número de requisições simultâneas a um mesmo host é limitado por `max_per_host`.
+
+    Args:
+        stations (List[str]): Códigos das estações.
+        start_date (datetime): Data de início do intervalo.
+        end_date (datetime): Data de fim do intervalo.
+        output_dir (str): Pasta onde os arquivos serão salvos.
+        include_types (List[str], optional): Tipos de dados desejados. Defaults para as três opções principais.
+        max_workers (int): Número de threads do pool.
+        max_per_host (int): Máximo de requisições simultâneas por host.
+        base_url (str): Endereço do draw_graph.php. Defaults para o NEST oficial.
+        timeout (float): Tempo máximo de espera por resposta, em segundos.
+        filename_template (str): Modelo do nome do arquivo (`station` e `year` disponíveis).
+        window (timedelta, optional): Se informado, cada estação é baixada em janelas desse
+            tamanho com `download_station_data_chunked` (resolução nativa de 1 minuto).
+        window_workers (int): Janelas simultâneas por estação quando `window` é usado.
+
+    Returns:
+        Dict[str, StationDownloadResult]: Resultado por estação, na ordem de `stations`.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    session = get_session(pool_maxsize=max(max_workers, max_per_host))
+    semaphore = _host_semaphore(base_url, max_per_host)
+
+    def worker(station: str) -> StationDownloadResult:
+        filename = filename_template.format(station=station, year=start_date.year)
+        file_path = os.path.join(output_dir, filename)
+        t0 = time.perf_counter()
+        try:
+            if window is not None:
+                return _fetch_station_chunked(
+                    station, file_path, start_date, end_date, include_types, base_url,
+                    session, timeout, window, MIN_WINDOW, window_workers, semaphore
+                )
+            with semaphore:
+                return _fetch_station(
+                    station, file_path, start_date, end_date,
+                    include_types, base_url, session, timeout
+                )
+        except Exception as e:
+            print(f"[ERRO] Falha ao baixar {station}: {e}")
+            return StationDownloadResult(
+                station, file_path, "error",
+                elapsed=time.perf_counter() - t0, error=str(e)
+            )
+
+    results: Dict[str, StationDownloadResult] = {}
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(worker, station): station for station in stations}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(response.text)
+    ordered = {station: results[station] for station in stations}
+    n_ok = sum(r.ok for r in ordered.values())
+    print(f"\n{n_ok}/{len(stations)} estações baixadas em {time.perf_counter() - t0:.1f}s")
+    for r in ordered.values():
+        if not r.ok:
+            print(f"  {r.station}: {r.status}" + (f" ({r.error})" if r.error else ""))
 
-    print(f"Dados salvos: {file_path}")
+    return ordered
@@ -0,0 +1,486 @@
+import argparse
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.cube import StationCube
+
+DEFAULT_EVENTS_DIR = os.path.join("data", "events")
+KINDS = {"forbush": -1, "gle": 1}
+
+
+@dataclass
+class DetectorConfig:
+    """
+    Parâmetros do detector de eventos.
+
+    Attributes:
+        column (str): Tipo de correção analisado (RCORR_P ou RCORR_E).
+        step (str): Passo da grade (cadência das estações).
+        baseline_halflife (str): Meia-vida da linha de base (média móvel exponencial).
+        signal_halflife (str): Meia-vida da suavização do sinal comparado com a linha de base.
+        drop_pct (float): Queda mínima, em % da linha de base, para um decréscimo de Forbush.
+        rise_pct (float): Aumento mínimo, em % da linha de base, para um GLE.
+        min_sigma (float): Desvio mínimo, em desvios-padrão do ruído da estação.
+        min_stations (int): Estações simultâneas necessárias para abrir um evento.
+        merge_gap (str): Intervalos menores que este entre trechos ativos não encerram o evento.
+        warmup (str): Tempo de dados de uma estação antes de ela poder participar de eventos.
+        max_hold (str): Tempo sinalizado máximo em que uma estação deixa de atualizar linha de
+            base e variância; depois disso elas voltam a acompanhar a série (ex.: uma mudança
+            de nível do monitor não fica sinalizada para sempre).
+    """
+    column: str = "RCORR_P"
+    step: str = "1min"
+    baseline_halflife: str = "2D"
+    signal_halflife: str = "10min"
+    drop_pct: float = 3.0
+    rise_pct: float = 3.0
+    min_sigma: float = 4.0
+    min_stations: int = 2
+    merge_gap: str = "1h"
+    warmup: str = "2D"
+    max_hold: str = "5D"
+
+    def alpha(self, halflife: str) -> float:
+        return float(1 - np.exp(-np.log(2) * (pd.Timedelta(self.step) / pd.Timedelta(halflife))))
+
+
+@dataclass
+class Event:
+    """
+    Evento detectado.
+
+    Attributes:
+        kind (str): "forbush" (queda) ou "gle" (aumento).
+        onset (pd.Timestamp): Primeiro instante com `min_stations` estações sinalizadas.
+        end (pd.Timestamp): Último instante com `min_stations` estações sinalizadas.
+        peak_time (pd.Timestamp): Instante do maior desvio.
+        amplitude (float): Maior desvio em relação à linha de base, em %.
+        stations (Dict[str, float]): Maior desvio de cada estação que participou, em %.
+    """
+    kind: str
+    onset: pd.Timestamp
+    end: pd.Timestamp
+    peak_time: pd.Timestamp
+    amplitude: float
+    stations: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        for name in ("onset", "end", "peak_time"):
+            d[name] = d[name].isoformat()
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Event":
+        return cls(**{**d, **{n: pd.Timestamp(d[n]) for n in ("onset", "end", "peak_time")}})
+
+    def merge(self, other: "Event") -> None:
+        sign = KINDS[self.kind]
+        self.end = other.end
+        if other.amplitude * sign > self.amplitude * sign:
+            self.amplitude, self.peak_time = other.amplitude, other.peak_time
+        for station, amplitude in other.stations.items():
+            current = self.stations.get(station)
+            if current is None or amplitude * sign > current * sign:
+                self.stations[station] = amplitude
+
+
+class EventDetector:
+    """
+    Detector incremental de decréscimos de Forbush e GLEs em todas as estações de uma vez.
+
+    Por estação, o estado é um punhado de números: linha de base e sinal suavizado
+    (médias móveis exponenciais), variância do desvio entre os dois, número de amostras
+    e o último instante processado. Cada nova amostra atualiza esse estado em O(1);
+    os blocos novos são processados como matrizes (tempo × estação), com as médias
+    exponenciais calculadas pelo pandas a partir do estado anterior, sem reler o histórico.
+
+    Uma estação é sinalizada quando o sinal se afasta da linha de base do instante
+    anterior em pelo menos `drop_pct`/`rise_pct` e `min_sigma` desvios-padrão. Amostras
+    sinalizadas (até `max_hold`) não atualizam a linha de base nem a variância: um evento
+    longo não aumenta o próprio ruído nem puxa a linha de base, então continua sinalizado
+    até a recuperação e não esconde um evento seguinte. Um evento
+    começa quando `min_stations` estações estão sinalizadas ao mesmo tempo e termina
+    após `merge_gap` sem isso; eventos ainda abertos continuam na próxima atualização.
+
+    Args:
+        config (DetectorConfig, optional): Parâmetros. Defaults para DetectorConfig().
+    """
+
+    def __init__(self, config: Optional[DetectorConfig] = None):
+        self.config = config or DetectorConfig()
+        self.stations: List[str] = []
+        self.last_time: Optional[pd.Timestamp] = None
+        self.count = np.zeros(0, dtype=np.int64)
+        self.baseline = np.zeros(0)
+        self.signal = np.zeros(0)
+        self.variance = np.zeros(0)
+        # Trecho sinalizado em aberto de cada estação: amostras sinalizadas e calmas desde o início
+        self.hold = np.zeros(0, dtype=np.int64)
+        self.quiet = np.zeros(0, dtype=np.int64)
+        self.open_events: Dict[str, Event] = {}
+        self.last_active: Dict[str, pd.Timestamp] = {}
+
+    def _add_stations(self, stations: List[str]) -> None:
+        new = [s for s in stations if s not in self.stations]
+        if not new:
+            return
+        self.stations += new
+        for name in ("count", "hold", "quiet"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(len(new), dtype=np.int64)]))
+        for name in ("baseline", "signal", "variance"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.full(len(new), np.nan)]))
+
+    @staticmethod
+    def _ewm(values: np.ndarray, state: np.ndarray, alpha: float) -> np.ndarray:
+        """Média exponencial por coluna continuando de `state`; NaN não altera a média."""
+        # Ordem de coluna: o pandas calcula a média coluna a coluna sem copiar a matriz
+        seeded = np.empty((len(values) + 1, values.shape[1]), order="F")
+        seeded[0], seeded[1:] = state, values
+        return pd.DataFrame(seeded, copy=False).ewm(alpha=alpha, adjust=False, ignore_na=True).mean().to_numpy()
+
+    @staticmethod
+    def _ewm_step(state: float, value: float, alpha: float) -> float:
+        """Um passo de `_ewm` para uma estação, com a mesma aritmética do pandas."""
+        if np.isnan(value) or state == value:
+            return state
+        if np.isnan(state):
+            return value
+        return ((1 - alpha) * state + alpha * value) / ((1 - alpha) + alpha)
+
+    def _filter(self, values: np.ndarray, signal: np.ndarray, missing: np.ndarray, baseline: np.ndarray,
+                variance: np.ndarray, alpha: float) -> Tuple[np.ndarray, ...]:
+        """Linha de base, desvio, variância, desvio relativo e em sigmas, sem excluir amostras."""
+        # Cópias graváveis e em ordem de coluna: `_gate` refaz trechos de uma estação no lugar
+        baseline = self._ewm(values, baseline, alpha).copy(order="F")
+        deviation = np.where(missing, np.nan, signal - baseline[:-1])
+        variance = self._ewm(deviation ** 2, variance, alpha).copy(order="F")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return baseline, deviation, variance, 100 * deviation / baseline[:-1], deviation / np.sqrt(variance[:-1])
+
+    def update(self, dataframes: Dict[str, pd.DataFrame]) -> List[Event]:
+        """
+        Processa as amostras posteriores ao último instante visto.
+
+        Args:
+            dataframes (Dict[str, pd.DataFrame]): Séries das estações (saída de
+                `load_station_data` ou de `src.rollup.read_level`), indexadas por tempo.
+                Linhas já processadas são ignoradas.
+
+        Returns:
+            List[Event]: Eventos encerrados nesta atualização.
+        """
+        cfg = self.config
+        step = pd.Timedelta(cfg.step)
+        start = self.last_time + step if self.last_time is not None else None
+        frames = {s: df for s, df in dataframes.items() if cfg.column in df.columns and not df.empty}
+        if start is not None:
+            frames = {s: df[df.index >= start] for s, df in frames.items()}
+        cube = StationCube.from_series(frames, types=[cfg.column], step=step, start=start)
+        if not len(cube) or not cube.stations:
+            return []
+
+        self._add_stations(cube.stations)
+        cols = np.array([self.stations.index(s) for s in cube.stations])
+        values = np.full((len(cube), len(self.stations)), np.nan, order="F")
+        values[:, cols] = cube.type_matrix(cfg.column)
+        missing = np.isnan(values)
+
+        a_base, a_signal = cfg.alpha(cfg.baseline_halflife), cfg.alpha(cfg.signal_halflife)
+        signal = self._ewm(values, self.signal, a_signal)[1:]
+        # Primeira linha em que cada estação completa o aquecimento
+        needed = pd.Timedelta(cfg.warmup) / step - self.count
+        ready = np.zeros(len(self.stations), dtype=np.int64)
+        for j, k in enumerate(np.ceil(needed).astype(np.int64)):
+            if k > 0:
+                rows = np.flatnonzero(~missing[:, j])
+                ready[j] = rows[k - 1] if len(rows) >= k else len(values)
+        eligible = np.arange(len(values))[:, None] >= ready[None, :]
+
+        baseline, deviation, variance, relative, sigma = self._gated_filter(
+            values, signal, missing, eligible, a_base)
+
+        times = cube.index
+        closed = []
+        for kind, sign in KINDS.items():
+            closed += self._segment(kind, sign, times, self._flags(sign, relative, sigma, eligible), relative)
+
+        self.baseline, self.signal, self.variance = baseline[-1], signal[-1], variance[-1]
+        self.count = self.count + (~missing).sum(axis=0)
+        self.last_time = times[-1]
+        return closed
+
+    def _gated_filter(self, values: np.ndarray, signal: np.ndarray, missing: np.ndarray, eligible: np.ndarray,
+                      alpha: float) -> Tuple[np.ndarray, ...]:
+        """Como `_filter`, sem as amostras sinalizadas na linha de base e na variância (ver `_gate`)."""
+        # Amostras sinalizadas não entram na linha de base nem na variância, então a
+        # sinalização de uma amostra depende das anteriores. O bloco é calculado como matriz;
+        # cada estação sinalizada é refeita amostra a amostra (`_gate`) a partir da primeira
+        # sinalização (ou do início, se um trecho ficou aberto) até `merge_gap` sem sinalização,
+        # e dali em diante de novo como matriz, junto com as demais estações refeitas, em
+        # janelas que dobram de tamanho enquanto nenhuma delas volta a ser sinalizada
+        cfg, n = self.config, len(values)
+        baseline, deviation, variance, relative, sigma = self._filter(
+            values, signal, missing, self.baseline, self.variance, alpha)
+        resume = max(int(pd.Timedelta(cfg.merge_gap) / pd.Timedelta(cfg.step)), 1)
+        disturbed = self._disturbed(relative, sigma, eligible)
+        pending = {j: 0 if self.hold[j] else int(np.argmax(disturbed[:, j]))
+                   for j in np.flatnonzero(disturbed.any(axis=0) | (self.hold > 0))}
+        scan: Dict[int, int] = {}
+        window = 16 * resume
+        while pending or scan:
+            for j, first in pending.items():
+                i = self._gate(j, first, resume, values, signal, missing, eligible,
+                               baseline, deviation, variance, relative, sigma, alpha)
+                if not self.hold[j] and i < n:
+                    scan[j] = i
+            if pending:
+                pending, window = {}, 16 * resume
+            if not scan:
+                break
+
+            # Linhas anteriores ao recomeço de cada estação entram como falha (NaN),
+            # o que mantém a média exponencial no valor de onde ela recomeça
+            r0 = min(scan.values())
+            rows = slice(r0, min(r0 + window, n))
+            cols = [j for j in scan if scan[j] < rows.stop]
+            starts = np.array([scan[j] for j in cols])
+            lead = np.arange(r0, rows.stop)[:, None] < starts[None, :]
+            part_base, part_dev, part_var, part_rel, part_sigma = self._filter(
+                np.where(lead, np.nan, values[rows, cols]), signal[rows, cols], missing[rows, cols] | lead,
+                baseline[starts, cols], variance[starts, cols], alpha)
+            for k, j in enumerate(cols):
+                i = scan.pop(j)
+                skip = i - r0
+                baseline[i + 1:rows.stop + 1, j] = part_base[skip + 1:, k]
+                variance[i + 1:rows.stop + 1, j] = part_var[skip + 1:, k]
+                deviation[i:rows.stop, j] = part_dev[skip:, k]
+                relative[i:rows.stop, j] = part_rel[skip:, k]
+                sigma[i:rows.stop, j] = part_sigma[skip:, k]
+                flagged = np.flatnonzero(self._disturbed(relative[i:rows.stop, j], sigma[i:rows.stop, j],
+                                                         eligible[i:rows.stop, j]))
+                if len(flagged):
+                    pending[j] = i + int(flagged[0])
+                elif rows.stop < n:
+                    scan[j] = rows.stop
+            window *= 2
+        return baseline, deviation, variance, relative, sigma
+
+    def _flags(self, sign: int, relative: np.ndarray, sigma: np.ndarray, eligible: np.ndarray) -> np.ndarray:
+        """Estações sinalizadas em cada instante para o sentido `sign` (-1 queda, +1 aumento)."""
+        if sign < 0:
+            flags = (relative <= -self.config.drop_pct) & (sigma <= -self.config.min_sigma)
+        else:
+            flags = (relative >= self.config.rise_pct) & (sigma >= self.config.min_sigma)
+        return flags & eligible
+
+    def _gate(self, j: int, i: int, resume: int, values: np.ndarray, signal: np.ndarray, missing: np.ndarray,
+              eligible: np.ndarray, baseline: np.ndarray, deviation: np.ndarray, variance: np.ndarray,
+              relative: np.ndarray, sigma: np.ndarray, alpha: float) -> int:
+        """
+        Refaz a estação `j` amostra a amostra desde a linha `i`, sem atualizar linha de base e
+        variância nas amostras sinalizadas, até `resume` linhas seguidas sem sinalização.
+
+        O trecho continua o que ficou aberto na atualização anterior (`hold`/`quiet`); se o
+        bloco acabar antes de `resume` linhas calmas, ele fica aberto para a próxima.
+
+        Returns:
+            int: Primeira linha ainda não refeita.
+        """
+        cfg = self.config
+        max_hold = pd.Timedelta(cfg.max_hold) / pd.Timedelta(cfg.step)
+        b, v, hold, quiet = baseline[i, j], variance[i, j], self.hold[j], self.quiet[j]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            while i < len(values) and quiet < resume:
+                d = np.nan if missing[i, j] else signal[i, j] - b
+                r, s = 100 * d / b, d / np.sqrt(v)
+                flagged = eligible[i, j] and ((-r >= cfg.drop_pct and -s >= cfg.min_sigma)
+                                              or (r >= cfg.rise_pct and s >= cfg.min_sigma))
+                hold, quiet = (hold + 1, 0) if flagged else (hold, quiet + 1)
+                if not flagged or hold > max_hold:
+                    b, v = self._ewm_step(b, values[i, j], alpha), self._ewm_step(v, d ** 2, alpha)
+                deviation[i, j], relative[i, j], sigma[i, j] = d, r, s
+                baseline[i + 1, j], variance[i + 1, j] = b, v
+                i += 1
+        self.hold[j], self.quiet[j] = (hold, quiet) if quiet < resume else (0, 0)
+        return i
+
+    def _disturbed(self, relative: np.ndarray, sigma: np.ndarray, eligible: np.ndarray) -> np.ndarray:
+        """Estações sinalizadas em qualquer sentido (amostras fora da linha de base e da variância)."""
+        return self._flags(-1, relative, sigma, eligible) | self._flags(1, relative, sigma, eligible)
+
+    def _segment(self, kind: str, sign: int, times: pd.DatetimeIndex, flags: np.ndarray,
+                 relative: np.ndarray) -> List[Event]:
+        """Agrupa os instantes com estações suficientes em eventos (só há laço por evento)."""
+        gap = pd.Timedelta(self.config.merge_gap)
+        active = np.flatnonzero(flags.sum(axis=1) >= self.config.min_stations)
+        closed = []
+        if len(active):
+            breaks = np.flatnonzero(np.diff(times[active].values) > gap.to_timedelta64()) + 1
+            for run in np.split(active, breaks):
+                i0, i1 = run[0], run[-1] + 1
+                signed = np.where(flags[i0:i1], relative[i0:i1], np.nan) * sign
+                extreme = np.fmax.reduce(signed, axis=0)
+                involved = np.flatnonzero(~np.isnan(extreme))
+                peak = np.nanargmax(np.fmax.reduce(signed, axis=1))
+                event = Event(kind, times[i0], times[i1 - 1], times[i0 + peak],
+                              round(float(np.nanmax(extreme)) * sign, 3),
+                              {self.stations[j]: round(float(extreme[j]) * sign, 3) for j in involved})
+
+                current = self.open_events.pop(kind, None)
+                if current is not None and event.onset - self.last_active[kind] <= gap:
+                    current.merge(event)
+                    event = current
+                elif current is not None:
+                    closed.append(current)
+                self.open_events[kind] = event
+                self.last_active[kind] = event.end
+
+        current = self.open_events.get(kind)
+        if current is not None and times[-1] - self.last_active[kind] > gap:
+            closed.append(self.open_events.pop(kind))
+        return closed
+
+    def flush(self) -> List[Event]:
+        """Encerra e retorna os eventos ainda abertos."""
+        events = list(self.open_events.values())
+        self.open_events.clear()
+        return events
+
+    def state(self) -> dict:
+        def listed(a):
+            return [None if np.isnan(v) else float(v) for v in a]
+
+        return {
+            "config": asdict(self.config),
+            "stations": self.stations,
+            "last_time": self.last_time.isoformat() if self.last_time is not None else None,
+            "count": self.count.tolist(),
+            "hold": self.hold.tolist(),
+            "quiet": self.quiet.tolist(),
+            "baseline": listed(self.baseline),
+            "signal": listed(self.signal),
+            "variance": listed(self.variance),
+            "open_events": {k: e.to_dict() for k, e in self.open_events.items()},
+            "last_active": {k: t.isoformat() for k, t in self.last_active.items()},
+        }
+
+    def save(self, path: str) -> None:
+        """Grava o estado em JSON (escrita atômica)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, config: Optional[DetectorConfig] = None) -> "EventDetector":
+        """
+        Restaura um detector salvo com `save`.
+
+        Se `config` for informado e diferir do salvo, o estado é descartado e o
+        detector recomeça (os limiares mudam a linha de base e a variância esperadas).
+        """
+        if not os.path.exists(path):
+            return cls(config)
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        saved = DetectorConfig(**state["config"])
+        if config is not None and config != saved:
+            print("Parâmetros do detector mudaram; recomeçando do início.")
+            return cls(config)
+
+        detector = cls(saved)
+        detector.stations = state["stations"]
+        detector.last_time = pd.Timestamp(state["last_time"]) if state["last_time"] else None
+        detector.count = np.array(state["count"], dtype=np.int64)
+        for name in ("hold", "quiet"):
+            setattr(detector, name, np.array(state.get(name, [0] * len(detector.stations)), dtype=np.int64))
+        for name in ("baseline", "signal", "variance"):
+            setattr(detector, name, np.array([np.nan if v is None else v for v in state[name]], dtype=np.float64))
+        detector.open_events = {k: Event.from_dict(e) for k, e in state["open_events"].items()}
+        detector.last_active = {k: pd.Timestamp(t) for k, t in state["last_active"].items()}
+        return detector
+
+
+def append_events(events: List[Event], path: str) -> None:
+    """Acrescenta eventos a um arquivo JSON lines."""
+    if not events:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event.to_dict(), ensure_ascii=False) + "\n")
+
+
+def update_events(
+    dataframes: Dict[str, pd.DataFrame],
+    events_dir: str = DEFAULT_EVENTS_DIR,
+    config: Optional[DetectorConfig] = None
+) -> List[Event]:
+    """
+    Atualiza o detector salvo em `events_dir` com as séries das estações.
+
+    O estado fica em `events_dir/detector_state.json` e os eventos encerrados são
+    acrescentados a `events_dir/events.jsonl`.
+
+    Returns:
+        List[Event]: Eventos encerrados nesta atualização.
+    """
+    state_path = os.path.join(events_dir, "detector_state.json")
+    detector = EventDetector.load(state_path, config)
+    events = detector.update(dataframes)
+    append_events(events, os.path.join(events_dir, "events.jsonl"))
+    detector.save(state_path)
+    return events
+
+
+def detect_from_rollup(
+    stations: List[str],
+    rollup_root: Optional[str] = None,
+    events_dir: str = DEFAULT_EVENTS_DIR,
+    config: Optional[DetectorConfig] = None
+) -> List[Event]:
+    """Como `update_events`, lendo só as amostras novas do nível de 1 minuto da pirâmide de agregados."""
+    from src.rollup import DEFAULT_ROLLUP_DIR, read_level
+
+    detector = EventDetector.load(os.path.join(events_dir, "detector_state.json"), config)
+    cfg = detector.config
+    start = detector.last_time + pd.Timedelta(cfg.step) if detector.last_time is not None else None
+    frames = {s: read_level(s, "1min", rollup_root or DEFAULT_ROLLUP_DIR, start, columns=[cfg.column])
+              for s in stations}
+    return update_events(frames, events_dir, cfg)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from src.pipeline import DEFAULT_STATIONS
+
+    parser = argparse.ArgumentParser(description="Detecta decréscimos de Forbush e GLEs nas estações.")
+    parser.add_argument("--stations", help="Estações separadas por vírgula")
+    parser.add_argument("--column", default="RCORR_P", choices=["RCORR_P", "RCORR_E"])
+    parser.add_argument("--drop-pct", type=float, default=DetectorConfig.drop_pct)
+    parser.add_argument("--rise-pct", type=float, default=DetectorConfig.rise_pct)
+    parser.add_argument("--min-stations", type=int, default=DetectorConfig.min_stations)
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args(argv)
+
+    stations = [s.strip().upper() for s in args.stations.split(",")] if args.stations else DEFAULT_STATIONS
+    config = DetectorConfig(column=args.column, drop_pct=args.drop_pct, rise_pct=args.rise_pct,
+                            min_stations=args.min_stations)
+    events = detect_from_rollup(stations, os.path.join(args.data_dir, "rollup"),
+                                os.path.join(args.data_dir, "events"), config)
+    for event in events:
+        print(f"{event.kind:<8} {event.onset} → {event.end}  pico {event.amplitude:+.1f}% em {event.peak_time}"
+              f"  ({len(event.stations)} estações: {', '.join(event.stations)})")
+    if not events:
+        print("Nenhum evento encerrado.")
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.events --stations OULU,ROME,APT --drop-pct 3
+    main()
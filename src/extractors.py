@@ -1,173 +1,171 @@
 import os
-import pandas as pd
 import requests
 from datetime import datetime
+from typing import Optional
 
-def extract_goes(save_path: str, total_day: int = 3) -> None:
+from src.http_cache import FEED_TTLS, FetchResult, fetch
+from src.ingest import FEED_SCHEMAS, read_feed
+from src.instrument import span
+from src.storage import list_partitions, store_dir, update_store
+
+SWPC_BASE_URL = "https://services.swpc.noaa.gov"
+GFZ_URL = "https://kp.gfz.de/app/json/"
+
+
+def _up_to_date(response: FetchResult, save_path: str) -> bool:
+    """Corpo igual ao último gravado e armazenamento ainda com partições (não foi apagado)."""
+    return not response.changed and bool(list_partitions(store_dir(save_path)))
+
+
+def extract_goes(save_path: str, total_day: int = 3, export_xlsx: bool = False, base_url: str = SWPC_BASE_URL,
+                 data_dir: Optional[str] = None) -> None:
     """
-    Extrai e atualiza os dados do satélite GOES e salva em formato Excel, evitando duplicatas.
+    Extrai e atualiza os dados do satélite GOES no armazenamento particionado, evitando duplicatas.
 
     Args:
-        save_path (str): Caminho onde o arquivo será salvo.
+        save_path (str): Caminho do arquivo Excel; os dados ficam na pasta de mesmo nome.
         total_day (int): Quantos dias de dados baixar (máximo suportado: 3 dias).
+        export_xlsx (bool): Se True, também regrava o histórico completo em `save_path`.
+        base_url (str): Endereço base do SWPC.
+        data_dir (str, optional): Pasta de dados com o cache de respostas (`src.http_cache`).
     """
-    url = f"https://services.swpc.noaa.gov/json/goes/primary/integral-protons-{total_day}-day.json"
-    response = requests.get(url)
-
-    if response.status_code != 200:
-        print(f"Erro ao baixar dados GOES. Código: {response.status_code}")
-        return
-
-    df_new = pd.DataFrame(response.json())
-    df_new["time_tag"] = pd.to_datetime(df_new["time_tag"], errors="coerce").dt.tz_localize(None)
-    df_new = df_new[["time_tag", "satellite", "energy", "flux"]]
-
-    if os.path.exists(save_path):
-        df_existing = pd.read_excel(save_path)
-        df_existing["time_tag"] = pd.to_datetime(df_existing["time_tag"], errors="coerce")
-        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-        df_combined.drop_duplicates(subset=["time_tag", "satellite", "energy"], inplace=True)
-    else:
-        df_combined = df_new
-
-    df_combined.sort_values("time_tag", inplace=True)
-    df_combined.to_excel(save_path, index=False)
-    print(f"Dados GOES salvos/atualizados em: {save_path}")
-
-def extract_ace_all(output_dir: str) -> None:
+    url = f"{base_url}/json/goes/primary/integral-protons-{total_day}-day.json"
+    with span("extract_goes", "goes") as s:
+        response = fetch(url, ttl=FEED_TTLS["goes"], data_dir=data_dir)
+        s.add(bytes=response.n_bytes)
+
+        if not response.ok:
+            raise requests.HTTPError(f"Erro ao baixar dados GOES: código {response.status}")
+        if _up_to_date(response, save_path):
+            print("Dados GOES sem alterações desde a última consulta.")
+            return
+
+        df_new = read_feed(response.content, FEED_SCHEMAS["goes"])
+        s.add(rows_parsed=len(df_new))
+
+        update_store(df_new, save_path, "time_tag", ["time_tag", "satellite", "energy"], export_xlsx)
+        s.add(rows_written=len(df_new))
+        response.commit()
+        print(f"Dados GOES salvos/atualizados em: {save_path}")
+
+def extract_ace_all(output_dir: str, export_xlsx: bool = False, base_url: str = SWPC_BASE_URL,
+                    data_dir: Optional[str] = None) -> None:
     """
     Extrai e atualiza os dados dos quatro endpoints do satélite ACE
-    (EPAM, MAG, SIS, SWEPAM) e salva em arquivos Excel separados.
+    (EPAM, MAG, SIS, SWEPAM) em armazenamentos particionados separados.
 
     Args:
         output_dir (str): Caminho da pasta onde os arquivos serão salvos.
+        export_xlsx (bool): Se True, também regrava um arquivo Excel por endpoint.
+        base_url (str): Endereço base do SWPC.
+        data_dir (str, optional): Pasta de dados com o cache de respostas (`src.http_cache`).
+
+    Raises:
+        RuntimeError: Se algum endpoint falhar (os demais são atualizados mesmo assim).
     """
     ACE_URLS = {
-        "ace_epam_5m.xlsx": "https://services.swpc.noaa.gov/json/ace/epam/ace_epam_5m.json",
-        "ace_mag_1h.xlsx": "https://services.swpc.noaa.gov/json/ace/mag/ace_mag_1h.json",
-        "ace_sis_5m.xlsx": "https://services.swpc.noaa.gov/json/ace/sis/ace_sis_5m.json",
-        "ace_swepam_1h.xlsx": "https://services.swpc.noaa.gov/json/ace/swepam/ace_swepam_1h.json"
+        "ace_epam_5m.xlsx": (f"{base_url}/json/ace/epam/ace_epam_5m.json", "ace_epam"),
+        "ace_mag_1h.xlsx": (f"{base_url}/json/ace/mag/ace_mag_1h.json", "ace_mag"),
+        "ace_sis_5m.xlsx": (f"{base_url}/json/ace/sis/ace_sis_5m.json", "ace_sis"),
+        "ace_swepam_1h.xlsx": (f"{base_url}/json/ace/swepam/ace_swepam_1h.json", "ace_swepam")
     }
 
-    def detectar_coluna_tempo(df):
-        for col in df.columns:
-            if col.lower() in ['time_tag', 'timestamp', 'time', 'date']:
-                return col
-        return None
-
     os.makedirs(output_dir, exist_ok=True)
 
-    for filename, url in ACE_URLS.items():
+    failed = {}
+    for filename, (url, feed) in ACE_URLS.items():
         save_path = os.path.join(output_dir, filename)
         print(f"\nBaixando dados de: {filename}")
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            df_new = pd.DataFrame(response.json())
-        except Exception as e:
-            print(f"[ERRO] Falha ao acessar {url}: {e}")
-            continue
-
-        if df_new.empty:
-            print(f"[-] Dados vazios para: {filename}")
-            continue
-
-        col_tempo = detectar_coluna_tempo(df_new)
-        if not col_tempo:
-            print(f"[-] Coluna de tempo não encontrada em {filename}, pulando.")
-            continue
-
-        df_new[col_tempo] = pd.to_datetime(df_new[col_tempo], errors='coerce')
-
-        if os.path.exists(save_path):
-            df_existing = pd.read_excel(save_path)
-            df_existing[col_tempo] = pd.to_datetime(df_existing[col_tempo], errors='coerce')
-            df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-            df_combined.drop_duplicates(subset=[col_tempo], inplace=True)
-        else:
-            df_combined = df_new
-
-        df_combined.sort_values(by=col_tempo, inplace=True)
-        df_combined.to_excel(save_path, index=False)
-        print(f" {filename} atualizado com {len(df_new)} novos registros")
-
-
-def extract_kp(save_path: str) -> None:
+        with span("extract_ace_all", feed) as s:
+            ttl = FEED_TTLS["ace_5m"] if filename.endswith("_5m.xlsx") else FEED_TTLS["ace_1h"]
+            try:
+                response = fetch(url, ttl=ttl, data_dir=data_dir)
+                s.add(bytes=response.n_bytes)
+                if not response.ok:
+                    raise requests.HTTPError(f"código {response.status}")
+                if _up_to_date(response, save_path):
+                    print(f"[=] {filename} sem alterações desde a última consulta.")
+                    continue
+                df_new = read_feed(response.content, FEED_SCHEMAS[feed])
+                s.add(rows_parsed=len(df_new))
+            except (requests.RequestException, ValueError) as e:
+                print(f"[ERRO] Falha ao acessar {url}: {e}")
+                failed[feed] = str(e)
+                continue
+
+            if df_new.empty:
+                print(f"[-] Dados vazios para: {filename}")
+                continue
+
+            col_tempo = FEED_SCHEMAS[feed].time_col
+            update_store(df_new, save_path, col_tempo, [col_tempo], export_xlsx)
+            s.add(rows_written=len(df_new))
+            response.commit()
+            print(f" {filename} atualizado com {len(df_new)} novos registros")
+
+    if failed:
+        raise RuntimeError(f"endpoints do ACE com falha: {failed}")
+
+
+def extract_kp(save_path: str, export_xlsx: bool = False, base_url: str = SWPC_BASE_URL,
+               data_dir: Optional[str] = None) -> None:
     """
-    Extrai e atualiza o índice Kp (1 minuto) e salva em formato Excel.
+    Extrai e atualiza o índice Kp (1 minuto) no armazenamento particionado.
 
     Args:
-        save_path (str): Caminho onde o arquivo será salvo.
+        save_path (str): Caminho do arquivo Excel; os dados ficam na pasta de mesmo nome.
+        export_xlsx (bool): Se True, também regrava o histórico completo em `save_path`.
+        base_url (str): Endereço base do SWPC.
+        data_dir (str, optional): Pasta de dados com o cache de respostas (`src.http_cache`).
     """
-    url = "https://services.swpc.noaa.gov/json/planetary_k_index_1m.json"
-    response = requests.get(url)
-
-    if response.status_code != 200:
-        print(f"Erro ao baixar índice Kp. Código: {response.status_code}")
-        return
-
-    df_new = pd.DataFrame(response.json())
-    df_new["time_tag"] = pd.to_datetime(df_new["time_tag"], errors="coerce", utc=True).dt.tz_localize(None)
-
-    if os.path.exists(save_path):
-        df_existing = pd.read_excel(save_path)
-        df_existing["time_tag"] = pd.to_datetime(df_existing["time_tag"], errors="coerce")
-        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-        df_combined.drop_duplicates(subset=["time_tag"], inplace=True)
-    else:
-        df_combined = df_new
-
-    df_combined.sort_values("time_tag", inplace=True)
-    df_combined.to_excel(save_path, index=False)
-    print(f" Índice Kp salvo/atualizado em: {save_path}")
-
-def extract_kp_gfz_xlsx(start: str, end: str, save_path: str, index: str = "Kp", status: str = "def"):
+    url = f"{base_url}/json/planetary_k_index_1m.json"
+    with span("extract_kp", "kp_1m") as s:
+        response = fetch(url, ttl=FEED_TTLS["kp_1m"], data_dir=data_dir)
+        s.add(bytes=response.n_bytes)
+
+        if not response.ok:
+            raise requests.HTTPError(f"Erro ao baixar índice Kp: código {response.status}")
+        if _up_to_date(response, save_path):
+            print("Índice Kp sem alterações desde a última consulta.")
+            return
+
+        df_new = read_feed(response.content, FEED_SCHEMAS["kp_1m"])
+        s.add(rows_parsed=len(df_new))
+
+        update_store(df_new, save_path, "time_tag", ["time_tag"], export_xlsx)
+        s.add(rows_written=len(df_new))
+        response.commit()
+        print(f" Índice Kp salvo/atualizado em: {save_path}")
+
+def extract_kp_gfz_xlsx(start: str, end: str, save_path: str, index: str = "Kp", status: str = "def", export_xlsx: bool = False, url: str = GFZ_URL,
+                        data_dir: Optional[str] = None):
     """
-    Extrai e atualiza o índice Kp do GFZ Potsdam e salva em formato Excel (.xlsx).
+    Extrai e atualiza o índice Kp do GFZ Potsdam no armazenamento particionado
+    (e, opcionalmente, em formato Excel .xlsx). `data_dir` é a pasta de dados com o
+    cache de respostas (`src.http_cache`).
     """
-    url = "https://kp.gfz.de/app/json/"
     params = {
         "start": start,
         "end": end,
         "index": index,
         "status": status
     }
-    try:
-        # response = requests.get(url)
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-
-        # Monta o DataFrame novo (com timezone)
-        df_new = pd.DataFrame({
-            "datetime": pd.to_datetime(data["datetime"], utc=True),
-            "Kp": data["Kp"],
-            "status": data["status"]
-        })
-        # Remove timezone do df_new ANTES de qualquer concat
-        df_new["datetime"] = df_new["datetime"].dt.tz_localize(None)
-
-        # Atualização incremental, se arquivo já existir
-        if os.path.exists(save_path):
-            df_existing = pd.read_excel(save_path)
-            df_existing["datetime"] = pd.to_datetime(df_existing["datetime"], errors="coerce")
-            # Remove timezone do df_existing também
-            df_existing["datetime"] = df_existing["datetime"].dt.tz_localize(None)
-            # Trata DataFrames vazios para evitar FutureWarning do pandas
-            frames_to_concat = [df_existing, df_new]
-            frames_to_concat = [df for df in frames_to_concat if not df.empty]
-            df_combined = pd.concat(frames_to_concat, ignore_index=True)
-            df_combined.drop_duplicates(subset=["datetime"], inplace=True)
-        else:
-            df_combined = df_new
-
-        df_combined.sort_values("datetime", inplace=True)
-
-        # Aqui já está sem timezone!
-        df_combined.to_excel(save_path, index=False)
+    with span("extract_kp_gfz", "kp_gfz") as s:
+        response = fetch(url, params=params, ttl=FEED_TTLS["kp_gfz"], timeout=30, data_dir=data_dir)
+        s.add(bytes=response.n_bytes)
+        if not response.ok:
+            raise requests.HTTPError(f"Erro ao baixar índice Kp (GFZ): código {response.status}")
+        if _up_to_date(response, save_path):
+            print("Índice Kp (GFZ) sem alterações desde a última consulta.")
+            return
+        # Resposta já colunar (datetime, índice e status); tempos em UTC, sem timezone
+        df_new = read_feed(response.content, FEED_SCHEMAS["kp_gfz"])
+        s.add(rows_parsed=len(df_new))
+
+        # Atualização incremental: só as partições com dados novos são regravadas
+        update_store(df_new, save_path, "datetime", ["datetime"], export_xlsx)
+        s.add(rows_written=len(df_new))
+        response.commit()
         print(f"Índice Kp (GFZ) salvo/atualizado em: {save_path}")
 
-    except Exception as e:
-        print(f"Erro ao extrair ou salvar índice Kp (GFZ): {e}")
-
 
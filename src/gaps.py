@@ -0,0 +1,553 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.backfill import DEFAULT_CHUNK, RateLimiter, fetch_gfz_chunk, gfz_save_path
+from src.barometric import apply_pressure_correction, load_station_meta
+from src.download import COLUMN_TYPES, DEFAULT_WINDOW, NEST_BASE_URL, fetch_station_windows, get_session
+from src.extractors import GFZ_URL
+from src.instrument import span
+from src.archive import StationArchive
+from src.processing import _locate_data_block, iter_station_chunks, parse_station_rows
+from src.rollup import update_pyramid
+from src.station_update import DEFAULT_OVERLAP, insert_station_rows, row_offset
+from src.storage import list_partitions, update_store
+
+DEFAULT_INDEX_PATH = os.path.join("data", "gaps.json")
+INDEX_VERSION = 1
+# Intervalo entre amostras acima de cadência × TOLERANCE conta como falha
+TOLERANCE = 1.5
+# Distância máxima entre falhas reunidas na mesma consulta de reparo
+DEFAULT_JOIN = timedelta(hours=6)
+
+# Armazenamentos particionados indexados: (tipo, nome, pasta relativa à pasta de dados, coluna de tempo)
+STORES = [
+    ("swpc", "goes", os.path.join("data_goes", "goes_protons"), "time_tag"),
+    ("swpc", "kp_1m", os.path.join("data_kp", "kp_index_1min"), "time_tag"),
+    ("swpc", "ace_epam", os.path.join("data_ace", "ace_epam_5m"), "time_tag"),
+    ("swpc", "ace_mag", os.path.join("data_ace", "ace_mag_1h"), "time_tag"),
+    ("swpc", "ace_sis", os.path.join("data_ace", "ace_sis_5m"), "time_tag"),
+    ("swpc", "ace_swepam", os.path.join("data_ace", "ace_swepam_1h"), "time_tag"),
+]
+# Tipos cujas falhas podem ser reconsultadas (os feeds do SWPC só servem os últimos dias)
+REPAIRABLE = ("station", "gfz")
+
+_EMPTY = np.empty((0, 2), dtype=np.int64)
+
+
+def find_gaps(times: np.ndarray, cadence: int, tolerance: float = TOLERANCE) -> np.ndarray:
+    """
+    Falhas de uma série a partir das diferenças entre instantes consecutivos.
+
+    Args:
+        times (np.ndarray): Instantes com dados válidos (int64, ns); repetidos e fora de
+            ordem são aceitos (ex.: vários canais do GOES no mesmo instante).
+        cadence (int): Cadência esperada, em ns.
+        tolerance (float): Fator sobre a cadência a partir do qual há falha.
+
+    Returns:
+        np.ndarray: Matriz (falhas × 2) int64 com o primeiro e o último instante ausente.
+    """
+    times = np.unique(times)
+    idx = np.flatnonzero(np.diff(times) > cadence * tolerance)
+    return np.column_stack([times[idx] + cadence, times[idx + 1] - cadence])
+
+
+def estimate_cadence(times: np.ndarray) -> Optional[int]:
+    """Cadência de uma série (mediana das diferenças entre instantes distintos), em ns."""
+    step = np.diff(np.unique(times))
+    return int(np.median(step)) if len(step) else None
+
+
+def subtract_times(gaps: np.ndarray, times: np.ndarray, cadence: int) -> np.ndarray:
+    """
+    Falhas que restam depois de recebidos os instantes `times`.
+
+    Cada falha é expandida na grade da cadência, os instantes recebidos são removidos e os
+    que sobram são reagrupados em falhas.
+    """
+    if not len(gaps):
+        return _EMPTY
+    lengths = (gaps[:, 1] - gaps[:, 0]) // cadence + 1
+    starts = np.repeat(gaps[:, 0], lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    grid = starts + offsets * cadence
+    missing = grid[~np.isin(grid, times)]
+    if not len(missing):
+        return _EMPTY
+    breaks = np.flatnonzero(np.diff(missing) > cadence) + 1
+    return np.column_stack([missing[np.r_[0, breaks]], missing[np.r_[breaks - 1, len(missing) - 1]]])
+
+
+def replace_region(gaps: np.ndarray, lo: int, hi: int, new: np.ndarray) -> np.ndarray:
+    """Troca as falhas contidas em [lo, hi] pelas recém-detectadas na mesma região."""
+    keep = (gaps[:, 1] < lo) | (gaps[:, 0] > hi)
+    merged = np.concatenate([gaps[keep], new.reshape(-1, 2)])
+    return merged[np.argsort(merged[:, 0], kind="stable")]
+
+
+def plan_requests(
+    gaps: np.ndarray,
+    cadence: int,
+    window: timedelta,
+    join: timedelta = DEFAULT_JOIN
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Menor conjunto de consultas [início, fim) que cobre as falhas.
+
+    As falhas, em ordem, são reunidas com a anterior enquanto a distância entre elas
+    não passa de `join` e a consulta resultante cabe em `window`; falhas maiores que
+    `window` são divididas. Como cada consulta avança o máximo possível, o número de
+    consultas é o mínimo sob esses limites.
+
+    Args:
+        gaps (np.ndarray): Falhas (int64, ns), ordenadas.
+        cadence (int): Cadência da série, em ns.
+        window (timedelta): Duração máxima de uma consulta.
+        join (timedelta): Maior trecho com dados entre duas falhas reunidas.
+
+    Returns:
+        List[Tuple[datetime, datetime]]: Consultas em ordem cronológica.
+    """
+    window_ns, join_ns = int(window.total_seconds() * 1e9), int(join.total_seconds() * 1e9)
+    planned: List[List[int]] = []
+    for first, last in gaps:
+        end = int(last) + cadence
+        start = int(first)
+        if planned and start - planned[-1][1] <= join_ns and end - planned[-1][0] <= window_ns:
+            planned[-1][1] = end
+            continue
+        if planned and start - planned[-1][1] <= join_ns and planned[-1][1] - planned[-1][0] < window_ns:
+            # Completa a consulta anterior com o começo desta falha
+            split = planned[-1][0] + window_ns
+            planned[-1][1] = split
+            start = split
+        while end - start > window_ns:
+            planned.append([start, start + window_ns])
+            start += window_ns
+        planned.append([start, end])
+    return [(pd.Timestamp(a).to_pydatetime(), pd.Timestamp(b).to_pydatetime()) for a, b in planned]
+
+
+def _to_iso(values) -> List[str]:
+    return [str(v) for v in np.asarray(values, dtype="datetime64[ns]").astype("datetime64[s]")]
+
+
+class GapIndex:
+    """
+    Índice de falhas por série (arquivo de estação ou armazenamento de um feed), em JSON.
+
+    Cada série guarda a cadência, o primeiro e o último instante com dados, as falhas
+    como intervalos [primeiro ausente, último ausente], os intervalos já reconsultados
+    sem sucesso (`unavailable`) e o estado da fonte usado nas atualizações incrementais.
+
+    Args:
+        path (str): Arquivo do índice.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self.series: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") == INDEX_VERSION:
+                self.series = saved["series"]
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "series": self.series}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def gaps(self, key: str) -> np.ndarray:
+        """Falhas da série (int64, ns), em matriz (falhas × 2)."""
+        gaps = self.series[key]["gaps"]
+        if not gaps:
+            return _EMPTY
+        return np.array(gaps, dtype="datetime64[ns]").view(np.int64).reshape(-1, 2)
+
+    def unavailable(self, key: str) -> np.ndarray:
+        spans = self.series[key].get("unavailable", [])
+        if not spans:
+            return _EMPTY
+        return np.array(spans, dtype="datetime64[ns]").view(np.int64).reshape(-1, 2)
+
+    def _set(self, key: str, gaps: np.ndarray, **fields) -> None:
+        entry = self.series.setdefault(key, {})
+        entry.update(fields)
+        entry["gaps"] = [list(pair) for pair in zip(_to_iso(gaps[:, 0]), _to_iso(gaps[:, 1]))]
+        cadence = entry["cadence_s"] * 1_000_000_000
+        entry["missing"] = int(((gaps[:, 1] - gaps[:, 0]) // cadence + 1).sum()) if len(gaps) else 0
+
+    def update_station_file(self, path: str, full: bool = False) -> bool:
+        """
+        Atualiza as falhas de um arquivo de estação (`{estação}_{ano}.txt`).
+
+        Um arquivo substituído (outro inode, ex.: novo download completo) é relido inteiro;
+        caso contrário, só o trecho a partir do último instante com dados menos a
+        sobreposição das atualizações (`DEFAULT_OVERLAP`) é lido, e as falhas nesse trecho
+        são recalculadas.
+
+        Returns:
+            bool: True se o índice mudou.
+        """
+        station = os.path.basename(path).split("_")[0]
+        key = f"station/{os.path.splitext(os.path.basename(path))[0]}"
+        st = os.stat(path)
+        state = {"inode": st.st_ino, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        entry = self.series.get(key)
+        if entry is not None and entry.get("state") == state and not full:
+            return False
+
+        incremental = entry is not None and not full and entry["state"].get("inode") == st.st_ino \
+            and entry.get("last") is not None
+        since = None
+        if incremental:
+            cadence = entry["cadence_s"] * 1_000_000_000
+            gaps = self.gaps(key)
+            # Âncora: último instante com dados antes do trecho relido
+            since = pd.Timestamp(entry["last"]).value - int(DEFAULT_OVERLAP.total_seconds() * 1e9)
+            inside = (gaps[:, 0] <= since) & (since <= gaps[:, 1]) if len(gaps) else np.zeros(0, bool)
+            since = int(gaps[inside, 0][0]) - cadence if inside.any() else since
+            since = max(since, pd.Timestamp(entry["first"]).value)
+
+        offset = row_offset(path, pd.Timestamp(since).to_pydatetime()) if since is not None else None
+        parts = []
+        for chunk in iter_station_chunks(path, offset=offset):
+            # Mesmo critério de `load_station_data`: linha com algum valor nulo não conta
+            chunk = chunk[chunk.index.notna()].dropna()
+            parts.append(chunk.index.values.astype("datetime64[ns]").view(np.int64))
+        times = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+        if incremental:
+            new = find_gaps(times, cadence)
+            gaps = replace_region(gaps, since, np.iinfo(np.int64).max, new)
+            last = max(int(times.max()), pd.Timestamp(entry["last"]).value) if len(times) else \
+                pd.Timestamp(entry["last"]).value
+            self._set(key, gaps, last=_to_iso([last])[0], state=state)
+            return True
+
+        cadence = estimate_cadence(times) or 60_000_000_000
+        gaps = find_gaps(times, cadence) if len(times) else _EMPTY
+        self._set(key, gaps, kind="station", name=station, source=path, cadence_s=cadence // 1_000_000_000,
+                  first=_to_iso([times.min()])[0] if len(times) else None,
+                  last=_to_iso([times.max()])[0] if len(times) else None, state=state)
+        return True
+
+    def update_store(self, kind: str, name: str, root: str, time_col: str, full: bool = False) -> bool:
+        """
+        Atualiza as falhas de um armazenamento particionado.
+
+        Só as partições alteradas desde a última atualização (mtime), mais uma vizinha de
+        cada lado como âncora, são lidas (apenas a coluna de tempo); as falhas entre o
+        primeiro e o último instante desse trecho são recalculadas.
+
+        Returns:
+            bool: True se o índice mudou.
+        """
+        key = f"{kind}/{name}"
+        paths = list_partitions(root)
+        if not paths:
+            return False
+        mtimes = {os.path.basename(p): os.stat(p).st_mtime_ns for p in paths}
+        entry = self.series.get(key)
+        previous = entry["state"]["partitions"] if entry is not None and not full else {}
+        if previous == mtimes:
+            return False
+
+        names = sorted(mtimes)
+        incremental = bool(previous) and set(previous) <= set(mtimes)
+        changed = [i for i, n in enumerate(names) if previous.get(n) != mtimes[n]] if incremental else \
+            list(range(len(names)))
+        lo, hi = max(changed[0] - 1, 0), min(changed[-1] + 1, len(names) - 1)
+        frames = [pd.read_parquet(os.path.join(root, n), columns=[time_col])[time_col] for n in names[lo:hi + 1]]
+        times = np.concatenate([f.to_numpy(dtype="datetime64[ns]").view(np.int64) for f in frames])
+        state = {"partitions": mtimes}
+        if not len(times):
+            return False
+
+        if incremental:
+            cadence = entry["cadence_s"] * 1_000_000_000
+            gaps = replace_region(self.gaps(key), int(times.min()), int(times.max()), find_gaps(times, cadence))
+            first = min(pd.Timestamp(entry["first"]).value, int(times.min()))
+            last = max(pd.Timestamp(entry["last"]).value, int(times.max()))
+            self._set(key, gaps, first=_to_iso([first])[0], last=_to_iso([last])[0], state=state)
+            return True
+
+        cadence = estimate_cadence(times) or 60_000_000_000
+        self._set(key, find_gaps(times, cadence), kind=kind, name=name, source=root,
+                  cadence_s=cadence // 1_000_000_000, first=_to_iso([times.min()])[0],
+                  last=_to_iso([times.max()])[0], state=state)
+        return True
+
+    def update_all(self, data_dir: str = "data", full: bool = False) -> List[str]:
+        """
+        Atualiza as séries encontradas em `data_dir`: arquivos das estações, índices do GFZ
+        e feeds do SWPC.
+
+        Returns:
+            List[str]: Séries cujo índice mudou.
+        """
+        changed = []
+        with span("gaps", "stations"):
+            for path in sorted(glob.glob(os.path.join(data_dir, "data_station", "*.txt"))):
+                try:
+                    if self.update_station_file(path, full):
+                        changed.append(f"station/{os.path.splitext(os.path.basename(path))[0]}")
+                except ValueError as e:
+                    print(f"Falhas: {path} ignorado ({e})")
+
+        stores = list(STORES)
+        for root in sorted(glob.glob(os.path.join(data_dir, "data_kp", "dados_*_gfz"))):
+            index = os.path.basename(root)[len("dados_"):-len("_gfz")]
+            stores.append(("gfz", "Kp" if index == "kp" else index, os.path.relpath(root, data_dir), "datetime"))
+        with span("gaps", "stores"):
+            for kind, name, rel, time_col in stores:
+                if self.update_store(kind, name, os.path.join(data_dir, rel), time_col, full):
+                    changed.append(f"{kind}/{name}")
+        return changed
+
+    def summary(self) -> pd.DataFrame:
+        """Uma linha por série: cadência, período, número de falhas e amostras ausentes."""
+        rows = []
+        for key, entry in sorted(self.series.items()):
+            gaps = self.gaps(key)
+            longest = int((gaps[:, 1] - gaps[:, 0]).max()) + entry["cadence_s"] * 1_000_000_000 if len(gaps) else 0
+            rows.append({"series": key, "cadence": pd.Timedelta(seconds=entry["cadence_s"]),
+                         "first": entry.get("first"), "last": entry.get("last"), "gaps": len(gaps),
+                         "missing": entry["missing"], "longest": pd.Timedelta(longest),
+                         "unavailable": len(entry.get("unavailable", []))})
+        return pd.DataFrame(rows)
+
+    def pending(self, key: str) -> np.ndarray:
+        """Falhas ainda não reconsultadas (fora dos intervalos `unavailable`)."""
+        gaps, spans = self.gaps(key), self.unavailable(key)
+        if not len(gaps) or not len(spans):
+            return gaps
+        covered = np.zeros(len(gaps), dtype=bool)
+        for a, b in spans:
+            covered |= (gaps[:, 0] >= a) & (gaps[:, 1] <= b)
+        return gaps[~covered]
+
+    def record_repair(self, key: str, requested: List[Tuple[datetime, datetime]], received: np.ndarray,
+                      state: Optional[dict] = None) -> int:
+        """
+        Atualiza a série após um reparo: remove das falhas os instantes recebidos e marca
+        como `unavailable` o que foi pedido e não veio.
+
+        Returns:
+            int: Amostras preenchidas.
+        """
+        entry = self.series[key]
+        cadence = entry["cadence_s"] * 1_000_000_000
+        before = self.gaps(key)
+        after = subtract_times(before, np.unique(received), cadence)
+        self._set(key, after, **({"state": state} if state is not None else {}))
+        filled = int(((before[:, 1] - before[:, 0]) // cadence + 1).sum()) - entry["missing"] if len(before) else 0
+
+        spans = self.unavailable(key)
+        bounds = np.array([[pd.Timestamp(a).value, pd.Timestamp(b).value] for a, b in requested], dtype=np.int64)
+        for a, b in after:
+            if ((bounds[:, 0] <= a) & (b < bounds[:, 1])).any():
+                spans = np.concatenate([spans, [[a, b]]])
+        entry["unavailable"] = [list(p) for p in zip(_to_iso(spans[:, 0]), _to_iso(spans[:, 1]))]
+        return filled
+
+
+def _repair_station(index: GapIndex, key: str, requests_plan, base_url: str, session: requests.Session,
+                    max_workers: int, data_dir: str) -> Tuple[int, Optional[int]]:
+    entry = index.series[key]
+    station, path = entry["name"], entry["source"]
+    # Os mesmos tipos já gravados no arquivo (ex.: contagens e pressão no modo de correção local)
+    columns, _, _ = _locate_data_block(path)
+    types = [COLUMN_TYPES[c] for c in columns]
+
+    def fetch(window):
+        return fetch_station_windows(station, window[0], window[1], types, base_url, session,
+                                     window=DEFAULT_WINDOW, max_workers=1)
+
+    with span("repair_station", station) as s, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetched = list(executor.map(fetch, requests_plan))
+        header = next((h for h, rows, _ in fetched if rows), None)
+        rows = sorted({row for _, part, _ in fetched for row in part})
+        n_bytes = sum(n for _, _, n in fetched)
+        s.add(bytes=n_bytes)
+
+        received = pd.DataFrame()
+        if rows:
+            insert_station_rows(path, rows)
+            # Linhas novas no formato de `load_station_data`, para a pirâmide e o arquivo binário
+            received = parse_station_rows(station, header, rows)
+            # Modo de correção local: RCORR_P calculada com os coeficientes da estação
+            received = apply_pressure_correction(
+                received, load_station_meta(os.path.join(data_dir, "station_meta.json")).get(station))
+            s.add(rows_written=len(received))
+
+    if not received.empty:
+        rollup_root = os.path.join(data_dir, "rollup")
+        if os.path.isdir(os.path.join(rollup_root, station)):
+            for a, b in requests_plan:
+                part = received[(received.index >= a) & (received.index < b)]
+                if not part.empty:
+                    update_pyramid(station, part, rollup_root, since=a)
+        archive_root = os.path.join(data_dir, "archive")
+        if os.path.exists(os.path.join(archive_root, f"{station}.json")):
+            StationArchive(station, archive_root).append(received)
+
+    times = received.index.values.astype("datetime64[ns]").view(np.int64)
+    filled = index.record_repair(key, requests_plan, times)
+    # Sincroniza o estado do arquivo (e o que houver depois do último instante conhecido)
+    index.update_station_file(path)
+    return filled, n_bytes
+
+
+def _repair_gfz(index: GapIndex, key: str, requests_plan, url: str, session: requests.Session,
+                status: str, data_dir: str) -> Tuple[int, Optional[int]]:
+    entry = index.series[key]
+    name = entry["name"]
+    limiter = RateLimiter(2.0)
+    frames = []
+    with span("repair_gfz", name) as s:
+        for window in requests_plan:
+            df = fetch_gfz_chunk(window, name, status, url, session, limiter)
+            frames.append(df[(df["datetime"] >= window[0]) & (df["datetime"] < window[1])])
+        received = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if not received.empty:
+            save_path = gfz_save_path(os.path.join(data_dir, "data_kp"), name)
+            update_store(received, save_path, "datetime", ["datetime"])
+            s.add(rows_written=len(received))
+
+    root = entry["source"]
+    state = {"partitions": {os.path.basename(p): os.stat(p).st_mtime_ns for p in list_partitions(root)}}
+    times = received["datetime"].to_numpy(dtype="datetime64[ns]").view(np.int64) if not received.empty else \
+        np.empty(0, dtype=np.int64)
+    return index.record_repair(key, requests_plan, times, state), None
+
+
+def repair(
+    index: GapIndex,
+    series: Optional[List[str]] = None,
+    data_dir: str = "data",
+    join: timedelta = DEFAULT_JOIN,
+    nest_url: str = NEST_BASE_URL,
+    gfz_url: str = GFZ_URL,
+    status: str = "def",
+    max_workers: int = 4,
+    dry_run: bool = False,
+    session: Optional[requests.Session] = None
+) -> Dict[str, dict]:
+    """
+    Reconsulta só os intervalos ausentes das séries indicadas.
+
+    As falhas pendentes de cada série são reunidas pelo `plan_requests` (janelas de
+    `DEFAULT_WINDOW` para o NEST, que responde em 1 minuto até esse tamanho, e de
+    `DEFAULT_CHUNK` para o GFZ); as linhas recebidas são intercaladas no arquivo da
+    estação (e na pirâmide e no arquivo binário, se existirem) ou gravadas no armazenamento
+    do índice do GFZ. O que foi pedido e não veio fica marcado como indisponível e não é
+    pedido de novo. Os feeds do SWPC não têm histórico para reconsulta e são ignorados.
+
+    Args:
+        index (GapIndex): Índice de falhas (salvo ao final).
+        series (List[str], optional): Séries a reparar (ex.: "station/OULU_2024", "gfz/Kp").
+            Defaults para todas as reparáveis.
+        data_dir (str): Pasta de dados.
+        join (timedelta): Maior trecho com dados entre falhas reunidas na mesma consulta.
+        nest_url (str): Endereço do draw_graph.php.
+        gfz_url (str): Endereço da API do GFZ.
+        status (str): Status dos índices do GFZ ("def" ou "all").
+        max_workers (int): Consultas simultâneas ao NEST por estação.
+        dry_run (bool): Só mostra o plano, sem baixar nada.
+        session (requests.Session, optional): Sessão HTTP. Defaults para a sessão compartilhada.
+
+    Returns:
+        Dict[str, dict]: Por série: falhas, consultas (e as de um download completo do
+        período), amostras preenchidas e bytes recebidos do NEST.
+    """
+    session = session or get_session()
+    report = {}
+    for key in series or sorted(index.series):
+        entry = index.series[key]
+        if entry["kind"] not in REPAIRABLE:
+            continue
+        gaps = index.pending(key)
+        if not len(gaps):
+            continue
+        cadence = entry["cadence_s"] * 1_000_000_000
+        window = DEFAULT_WINDOW if entry["kind"] == "station" else DEFAULT_CHUNK
+        planned = plan_requests(gaps, cadence, window, join if entry["kind"] == "station" else window)
+        # Referência: consultas de um novo download de todo o período da série
+        span_ns = pd.Timestamp(entry["last"]).value - pd.Timestamp(entry["first"]).value + cadence
+        naive = -(-span_ns // int(window.total_seconds() * 1e9))
+        report[key] = {"gaps": len(gaps), "requests": len(planned), "full_requests": int(naive), "filled": 0}
+        print(f"{key}: {len(gaps)} falhas → {len(planned)} consultas (download completo: {naive})")
+        if dry_run:
+            continue
+
+        t0 = time.perf_counter()
+        try:
+            if entry["kind"] == "station":
+                filled, n_bytes = _repair_station(index, key, planned, nest_url, session, max_workers, data_dir)
+            else:
+                filled, n_bytes = _repair_gfz(index, key, planned, gfz_url, session, status, data_dir)
+        except Exception as e:
+            print(f"{key}: falha no reparo: {e}")
+            report[key]["error"] = str(e)
+            continue
+        index.save()
+        report[key].update(filled=filled, remaining=len(index.gaps(key)))
+        received = f", {n_bytes / 1e3:.0f} kB" if n_bytes is not None else ""
+        if n_bytes is not None:
+            report[key]["bytes"] = n_bytes
+        print(f"{key}: {filled} amostras preenchidas{received} em {time.perf_counter() - t0:.1f}s; "
+              f"restam {len(index.gaps(key))} falhas")
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Índice de falhas das estações e feeds, e reparo só das falhas.")
+    parser.add_argument("command", choices=["update", "show", "repair"])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--index", help="Arquivo do índice. Defaults para <data-dir>/gaps.json")
+    parser.add_argument("--series", help="Séries separadas por vírgula (ex.: station/OULU_2024,gfz/Kp)")
+    parser.add_argument("--full", action="store_true", help="Relê as fontes inteiras em vez do trecho novo")
+    parser.add_argument("--join-hours", type=float, default=DEFAULT_JOIN.total_seconds() / 3600)
+    parser.add_argument("--nest-url", default=NEST_BASE_URL)
+    parser.add_argument("--gfz-url", default=GFZ_URL)
+    parser.add_argument("--status", default="def", choices=["def", "all"])
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra o plano de consultas")
+    args = parser.parse_args(argv)
+
+    index = GapIndex(args.index or os.path.join(args.data_dir, "gaps.json"))
+    if args.command in ("update", "repair"):
+        t0 = time.perf_counter()
+        changed = index.update_all(args.data_dir, args.full)
+        index.save()
+        print(f"Índice de falhas atualizado em {time.perf_counter() - t0:.1f}s ({len(changed)} séries alteradas)")
+    if args.command == "repair":
+        report = repair(index, args.series.split(",") if args.series else None, args.data_dir,
+                        timedelta(hours=args.join_hours), args.nest_url, args.gfz_url, args.status,
+                        dry_run=args.dry_run)
+        index.save()
+        if any("error" in r for r in report.values()):
+            return 1
+    summary = index.summary()
+    if args.series:
+        summary = summary[summary["series"].isin(args.series.split(","))]
+    print(summary.to_string(index=False) if not summary.empty else "Nenhuma série indexada.")
+    return 0
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.gaps update | show | repair [--series station/OULU_2024] [--dry-run]
+    raise SystemExit(main())
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import requests
+
+from src.download import get_session
+
+DEFAULT_HTTP_CACHE_DIR = os.path.join("data", ".cache", "http")
+
+# Tempo (s) durante o qual uma resposta é considerada atual, sem nem consultar o servidor.
+# Valores abaixo da cadência de publicação de cada feed.
+FEED_TTLS: Dict[str, float] = {
+    "goes": 60,
+    "ace_5m": 60,
+    "ace_1h": 600,
+    "kp_1m": 30,
+    "kp_gfz": 900,
+}
+
+
+@dataclass
+class FetchResult:
+    """
+    Resposta de `fetch`.
+
+    Attributes:
+        url (str): URL consultada.
+        status (int): Código HTTP (200, 304...), ou o da última resposta se veio do cache.
+        content (bytes): Corpo atual (do servidor ou do cache).
+        changed (bool): True se o corpo difere do último corpo confirmado com `commit()`.
+        from_cache (bool): True se o servidor não foi consultado (TTL ainda válido).
+        sha256 (str): Hash do corpo.
+        last_modified (str, optional): Cabeçalho Last-Modified do servidor (momento da publicação).
+    """
+    url: str
+    status: int
+    content: bytes = b""
+    changed: bool = False
+    from_cache: bool = False
+    sha256: str = ""
+    last_modified: Optional[str] = None
+    _cache: Optional["ResponseCache"] = field(default=None, repr=False)
+    _key: str = field(default="", repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (200, 304)
+
+    @property
+    def n_bytes(self) -> int:
+        """Bytes recebidos do servidor (0 se a resposta veio do cache ou foi 304)."""
+        return len(self.content) if self.status == 200 and not self.from_cache else 0
+
+    def json(self):
+        return json.loads(self.content)
+
+    def commit(self) -> None:
+        """Confirma que o corpo foi processado; chamadas seguintes com o mesmo corpo terão changed=False."""
+        if self._cache is not None:
+            self._cache.commit(self._key, self.sha256)
+
+
+class ResponseCache:
+    """
+    Cache em disco de respostas HTTP com requisições condicionais.
+
+    Guarda corpo, ETag e Last-Modified por URL. Dentro do TTL a resposta guardada é
+    devolvida sem acesso à rede; depois disso a requisição é feita com
+    `If-None-Match`/`If-Modified-Since`. Um corpo só conta como alterado se o hash
+    difere do último corpo confirmado com `FetchResult.commit()`, de modo que uma
+    falha entre o download e a gravação não faz dados serem perdidos.
+
+    Args:
+        cache_dir (str): Pasta do cache.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(url: str, params: Optional[dict] = None) -> str:
+        raw = url + "?" + "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".body"
+
+    def load(self, key: str):
+        meta_path, body_path = self._paths(key)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None, b""
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            body = f.read()
+        return meta, body
+
+    def _write(self, path: str, data: bytes) -> None:
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def save(self, key: str, meta: dict, body: Optional[bytes] = None) -> None:
+        meta_path, body_path = self._paths(key)
+        with self._lock:
+            if body is not None:
+                self._write(body_path, body)
+            self._write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def commit(self, key: str, sha256: str) -> None:
+        meta, _ = self.load(key)
+        if meta is not None:
+            meta["committed_sha256"] = sha256
+            self.save(key, meta)
+
+
+_default_caches: Dict[str, ResponseCache] = {}
+_default_caches_lock = threading.Lock()
+
+
+def http_cache_dir(data_dir: str) -> str:
+    """Pasta do cache de respostas dentro da pasta de dados `data_dir`."""
+    return os.path.join(data_dir, ".cache", "http")
+
+
+def get_response_cache(cache_dir: str = DEFAULT_HTTP_CACHE_DIR) -> ResponseCache:
+    """Cache compartilhado no processo para a pasta `cache_dir`."""
+    with _default_caches_lock:
+        if cache_dir not in _default_caches:
+            _default_caches[cache_dir] = ResponseCache(cache_dir)
+        return _default_caches[cache_dir]
+
+
+def fetch(
+    url: str,
+    params: Optional[dict] = None,
+    ttl: float = 0,
+    cache: Optional[ResponseCache] = None,
+    session: Optional[requests.Session] = None,
+    timeout: float = 30,
+    force: bool = False,
+    data_dir: Optional[str] = None
+) -> FetchResult:
+    """
+    Baixa uma URL usando o cache de respostas e requisições condicionais.
+
+    Args:
+        url (str): Endereço do feed.
+        params (dict, optional): Parâmetros de query.
+        ttl (float): Segundos durante os quais a resposta guardada é usada sem consultar o servidor.
+        cache (ResponseCache, optional): Cache a usar. Defaults para o cache em `<data_dir>/.cache/http`.
+        session (requests.Session, optional): Sessão HTTP. Defaults para a sessão compartilhada.
+        timeout (float): Tempo máximo de espera, em segundos.
+        force (bool): Ignora TTL e validadores e trata o corpo como alterado.
+        data_dir (str, optional): Pasta de dados que contém o cache. Defaults para "data".
+
+    Returns:
+        FetchResult: Resposta; verifique `ok` e `changed` antes de processar.
+    """
+    if cache is None:
+        cache = get_response_cache(http_cache_dir(data_dir) if data_dir is not None else DEFAULT_HTTP_CACHE_DIR)
+    session = session or get_session()
+    key = cache.key(url, params)
+    meta, body = cache.load(key)
+    now = time.time()
+
+    def result(status: int, content: bytes, sha: str, from_cache: bool, last_modified: Optional[str]) -> FetchResult:
+        committed = (meta or {}).get("committed_sha256")
+        changed = force or sha != committed
+        return FetchResult(url, status, content, changed, from_cache, sha, last_modified, _cache=cache, _key=key)
+
+    if meta and not force and now - meta["fetched_at"] < ttl:
+        return result(meta["status"], body, meta["sha256"], True, meta.get("last_modified"))
+
+    headers = {}
+    if meta and not force:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = session.get(url, params=params, headers=headers, timeout=timeout)
+
+    if response.status_code == 304 and meta:
+        meta["fetched_at"] = now
+        cache.save(key, meta)
+        return result(304, body, meta["sha256"], False, meta.get("last_modified"))
+
+    if response.status_code != 200:
+        return FetchResult(url, response.status_code)
+
+    content = response.content
+    sha = hashlib.sha256(content).hexdigest()
+    new_meta = {
+        "url": url,
+        "status": 200,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": sha,
+        "committed_sha256": (meta or {}).get("committed_sha256"),
+        "fetched_at": now,
+    }
+    cache.save(key, new_meta, content if not meta or meta["sha256"] != sha else None)
+    return result(200, content, sha, False, new_meta["last_modified"])
@@ -0,0 +1,200 @@
+import io
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pj
+
+try:
+    import orjson as _json
+except ImportError:  # orjson é opcional; a biblioteca padrão dá o mesmo resultado, mais devagar
+    import json as _json
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+_QUOTE, _BACKSLASH, _COMMA = ord('"'), ord("\\"), ord(",")
+_LBRACE, _RBRACE, _LBRACKET, _RBRACKET = ord("{"), ord("}"), ord("["), ord("]")
+_NEWLINE, _CR, _SPACE = ord("\n"), ord("\r"), ord(" ")
+
+
+@dataclass
+class FeedSchema:
+    """
+    Esquema de um feed JSON.
+
+    Attributes:
+        name (str): Nome do feed.
+        time_formats (Dict[str, str]): Colunas de tempo e o formato strptime de cada uma.
+        fields (Dict[str, pa.DataType]): Tipos das demais colunas conhecidas; colunas
+            não listadas têm o tipo inferido.
+        columns (List[str], optional): Colunas mantidas no resultado, nesta ordem.
+        layout (str): "records" (lista de objetos) ou "columns" (objeto de listas, como o GFZ).
+    """
+    name: str
+    time_formats: Dict[str, str]
+    fields: Dict[str, pa.DataType] = field(default_factory=dict)
+    columns: Optional[List[str]] = None
+    layout: str = "records"
+
+    @property
+    def time_col(self) -> str:
+        return next(iter(self.time_formats))
+
+    def parse_schema(self) -> pa.Schema:
+        """Esquema usado na leitura: tempos como texto, convertidos depois com formato explícito."""
+        names = list(self.time_formats) + [n for n in self.fields if n not in self.time_formats]
+        return pa.schema([(n, pa.string() if n in self.time_formats else self.fields[n]) for n in names])
+
+
+SWPC_TIME = "%Y-%m-%dT%H:%M:%S"
+
+FEED_SCHEMAS: Dict[str, FeedSchema] = {
+    "goes": FeedSchema(
+        "goes",
+        {"time_tag": SWPC_TIME + "Z"},
+        {"satellite": pa.int16(), "flux": pa.float64(), "energy": pa.string()},
+        columns=["time_tag", "satellite", "energy", "flux"],
+    ),
+    "kp_1m": FeedSchema(
+        "kp_1m",
+        {"time_tag": SWPC_TIME},
+        {"kp_index": pa.int16(), "estimated_kp": pa.float64(), "kp": pa.string()},
+    ),
+    "ace_epam": FeedSchema("ace_epam", {"time_tag": SWPC_TIME}, {"active": pa.bool_()}),
+    "ace_mag": FeedSchema("ace_mag", {"time_tag": SWPC_TIME}, {"active": pa.bool_()}),
+    "ace_sis": FeedSchema("ace_sis", {"time_tag": SWPC_TIME}, {"active": pa.bool_()}),
+    "ace_swepam": FeedSchema("ace_swepam", {"time_tag": SWPC_TIME}, {"active": pa.bool_()}),
+    "kp_gfz": FeedSchema(
+        "kp_gfz",
+        {"datetime": SWPC_TIME + "Z"},
+        {"status": pa.string()},
+        layout="columns",
+    ),
+}
+
+
+class _ArrayToNdjson(io.RawIOBase):
+    """
+    Converte uma lista JSON de objetos (`[{...}, {...}]`) em um objeto por linha, bloco a bloco.
+
+    Só as vírgulas entre objetos, os colchetes externos e as quebras de linha (JSON
+    formatado) são trocados, byte a byte, sem mudar o tamanho do bloco. Aspas,
+    profundidade e estado "dentro de string" são calculados com numpy sobre os
+    bytes de cada bloco e carregados para o bloco seguinte. Aspas escapadas são
+    reconhecidas pela barra invertida anterior (uma barra escapada logo antes de
+    aspas, `\\\\"`, não é tratada; não ocorre nos feeds do SWPC).
+    """
+
+    def __init__(self, content: bytes, block_size: int = DEFAULT_BLOCK_SIZE):
+        self._view = memoryview(content)
+        self._pos = 0
+        self._block_size = block_size
+        self._in_string = False
+        self._depth = 0
+        self._prev_backslash = False
+        self._buffer = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def _convert(self, chunk: memoryview) -> bytearray:
+        out = bytearray(chunk)
+        arr = np.frombuffer(out, dtype=np.uint8)
+
+        # Quebras de linha só podem ser espaço em branco fora de strings; a única quebra
+        # que sobra é a inserida entre objetos
+        arr[(arr == _NEWLINE) | (arr == _CR)] = _SPACE
+
+        # As contas seguintes usam só as posições de aspas e de bytes estruturais,
+        # bem menos numerosas que os bytes do bloco
+        quotes = np.flatnonzero(arr == _QUOTE)
+        if len(quotes):
+            before = arr[np.maximum(quotes - 1, 0)] == _BACKSLASH
+            if quotes[0] == 0:
+                before[0] = self._prev_backslash
+            quotes = quotes[~before]
+        candidates = np.flatnonzero(
+            (arr == _COMMA) | (arr == _LBRACE) | (arr == _RBRACE) | (arr == _LBRACKET) | (arr == _RBRACKET)
+        )
+        outside = (np.searchsorted(quotes, candidates) + self._in_string) % 2 == 0
+        candidates = candidates[outside]
+        chars = arr[candidates]
+
+        step = np.zeros(len(chars), dtype=np.int64)
+        step[(chars == _LBRACE) | (chars == _LBRACKET)] = 1
+        step[(chars == _RBRACE) | (chars == _RBRACKET)] = -1
+        depth = self._depth + np.cumsum(step)
+
+        arr[candidates[(chars == _COMMA) & (depth == 1)]] = _NEWLINE
+        arr[candidates[(chars == _LBRACKET) & (depth == 1)]] = _SPACE
+        arr[candidates[(chars == _RBRACKET) & (depth == 0)]] = _SPACE
+
+        self._in_string = bool((len(quotes) + self._in_string) % 2)
+        self._depth = int(depth[-1]) if len(depth) else self._depth
+        self._prev_backslash = bool(chunk[-1] == _BACKSLASH)
+        return out
+
+    def readinto(self, b) -> int:
+        while not len(self._buffer) and self._pos < len(self._view):
+            chunk = self._view[self._pos:self._pos + self._block_size]
+            self._pos += len(chunk)
+            self._buffer = memoryview(self._convert(chunk))
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def _apply_schema(table: pa.Table, schema: FeedSchema) -> pd.DataFrame:
+    for name, fmt in schema.time_formats.items():
+        if name in table.column_names:
+            parsed = pc.strptime(table[name], format=fmt, unit="ns", error_is_null=True)
+            table = table.set_column(table.schema.get_field_index(name), name, parsed)
+    for name, dtype in schema.fields.items():
+        if name in table.column_names and table.schema.field(name).type != dtype:
+            table = table.set_column(table.schema.get_field_index(name), name, table[name].cast(dtype, safe=False))
+    if schema.columns:
+        table = table.select([c for c in schema.columns if c in table.column_names])
+    return table.to_pandas()
+
+
+def _read_records(content: bytes, schema: FeedSchema, block_size: int) -> pa.Table:
+    parse_options = pj.ParseOptions(explicit_schema=schema.parse_schema(), unexpected_field_behavior="infer")
+    read_options = pj.ReadOptions(block_size=block_size)
+    try:
+        reader = pj.open_json(_ArrayToNdjson(content, block_size), read_options, parse_options)
+        return pa.Table.from_batches(list(reader), reader.schema)
+    except pa.ArrowInvalid:
+        # Registros heterogêneos (campo novo no meio do arquivo): leitura inteira, com inferência global
+        return pj.read_json(io.BufferedReader(_ArrayToNdjson(content, block_size)), read_options, parse_options)
+
+
+def read_feed(content: bytes, schema: FeedSchema, block_size: int = DEFAULT_BLOCK_SIZE) -> pd.DataFrame:
+    """
+    Converte o corpo de um feed JSON em DataFrame sem criar um dicionário por registro.
+
+    Listas de objetos são convertidas em JSON delimitado por linhas e lidas em blocos
+    pelo leitor colunar do Arrow; objetos de listas (GFZ) já são colunares e só passam
+    pelo decodificador JSON (chaves que não são listas, como `meta`, são ignoradas).
+    Tempos são convertidos com o formato explícito do esquema (valores fora do
+    formato viram NaT) e ficam em UTC sem timezone.
+
+    Args:
+        content (bytes): Corpo da resposta.
+        schema (FeedSchema): Esquema do feed (ver FEED_SCHEMAS).
+        block_size (int): Tamanho dos blocos lidos, em bytes; limita a memória intermediária.
+
+    Returns:
+        pd.DataFrame: Registros do feed.
+    """
+    if schema.layout == "columns":
+        data = _json.loads(content)
+        table = pa.table({name: values for name, values in data.items() if isinstance(values, list)})
+    elif not content.strip() or content.strip() == b"[]":
+        table = pa.table({name: pa.array([], type=t) for name, t in zip(schema.parse_schema().names, schema.parse_schema().types)})
+    else:
+        table = _read_records(content, schema, block_size)
+    return _apply_schema(table, schema)
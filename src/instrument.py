@@ -0,0 +1,231 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de memória não é registrado
+    resource = None
+
+_lock = threading.Lock()
+_enabled = False
+_sink = None
+_records: List[dict] = []
+_profile_dir: Optional[str] = None
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss em KiB no Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _rss_mb() -> Optional[float]:
+    # RSS atual do processo (segundo campo de /proc/self/statm, em páginas); só no Linux
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * _PAGE_SIZE / 2 ** 20
+
+
+class Span:
+    """
+    Medição de um trecho: tempo, bytes transferidos, linhas lidas e gravadas e memória.
+
+    A memória é a variação do RSS do processo entre a entrada e a saída do trecho
+    (`rss_delta_mb`, só no Linux) e o pico de RSS do processo até a saída
+    (`process_peak_rss_mb`). Nenhuma das duas é isolada por etapa: trechos simultâneos
+    (outras etapas do pipeline) entram na mesma medida, e o pico só cresce ao longo da
+    execução. Para a memória de uma etapa, meça-a sozinha (ex.: `--profile`).
+
+    Use como gerenciador de contexto (ver `span`) e informe os contadores com `add`.
+    """
+
+    __slots__ = ("stage", "key", "counters", "_start", "_wall", "_rss", "_profile", "_profile_path")
+
+    def __init__(self, stage: str, key: Optional[str] = None, profile_dir: Optional[str] = None):
+        self.stage = stage
+        self.key = key
+        self.counters: Dict[str, int] = {}
+        self._profile = cProfile.Profile() if profile_dir else None
+        if profile_dir:
+            name = stage if key is None else f"{stage}.{key}"
+            self._profile_path = os.path.join(profile_dir, f"{name}.prof")
+
+    def add(self, **counters: int) -> None:
+        """Soma contadores (bytes, rows_parsed, rows_written, ...)."""
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def __enter__(self) -> "Span":
+        self._wall = time.time()
+        self._rss = _rss_mb()
+        self._start = time.perf_counter()
+        if self._profile is not None:
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Python 3.12+: só um cProfile ativo por vez no processo
+                self._profile = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+        elapsed = time.perf_counter() - self._start
+        rss = _rss_mb()
+        record = {
+            "stage": self.stage,
+            "key": self.key,
+            "start": round(self._wall, 3),
+            "elapsed": round(elapsed, 6),
+            **self.counters,
+            "rss_delta_mb": round(rss - self._rss, 1) if rss is not None and self._rss is not None else None,
+            "process_peak_rss_mb": _peak_rss_mb(),
+            "status": "ok" if exc_type is None else "failed",
+        }
+        rows = self.counters.get("rows_parsed") or self.counters.get("rows_written")
+        if rows and elapsed > 0:
+            record["rows_per_s"] = round(rows / elapsed, 1)
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        if self._profile is not None:
+            self._profile.dump_stats(self._profile_path)
+            record["profile"] = self._profile_path
+        _emit(record)
+
+
+class _NullSpan:
+    """Span usado com a instrumentação desligada: não mede nada."""
+
+    __slots__ = ()
+
+    def add(self, **counters: int) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(stage: str, key: Optional[str] = None, profile: bool = False):
+    """
+    Mede um trecho do pipeline, se a instrumentação estiver ligada.
+
+    Desligada, retorna sempre o mesmo objeto vazio: o custo é o de uma chamada de função.
+
+    Args:
+        stage (str): Nome do trecho (por exemplo, "download_station_data").
+        key (str, optional): Estação ou feed.
+        profile (bool): Grava também um dump do cProfile, se `enable` recebeu `profile_dir`.
+
+    Example:
+        with span("extract_goes", "goes") as s:
+            ...
+            s.add(bytes=len(content), rows_parsed=len(df))
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(stage, key, _profile_dir if profile else None)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(path: Optional[str] = None, profile_dir: Optional[str] = None) -> None:
+    """
+    Liga a instrumentação.
+
+    Args:
+        path (str, optional): Arquivo JSON lines onde cada medição é acrescentada.
+        profile_dir (str, optional): Pasta dos dumps do cProfile (`.prof`, legíveis por
+            pstats, snakeviz ou flameprof para gerar flamegraphs).
+    """
+    global _enabled, _sink, _profile_dir
+    disable()
+    with _lock:
+        _records.clear()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            _sink = open(path, "a", encoding="utf-8")
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+        _profile_dir = profile_dir
+        _enabled = True
+
+
+def disable() -> None:
+    global _enabled, _sink, _profile_dir
+    with _lock:
+        _enabled = False
+        _profile_dir = None
+        if _sink is not None:
+            _sink.close()
+            _sink = None
+
+
+def _emit(record: dict) -> None:
+    with _lock:
+        _records.append(record)
+        if _sink is not None:
+            _sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+            _sink.flush()
+
+
+def records() -> List[dict]:
+    """Medições registradas desde o último `enable`."""
+    with _lock:
+        return list(_records)
+
+
+def summary(items: Optional[List[dict]] = None) -> List[dict]:
+    """
+    Agrega as medições por trecho: chamadas, tempo total, bytes, linhas, linhas/s, maior
+    variação de RSS em uma chamada e pico de RSS do processo (ver `Span`).
+    """
+    groups: Dict[str, dict] = {}
+    for r in records() if items is None else items:
+        g = groups.setdefault(r["stage"], {"stage": r["stage"], "calls": 0, "failed": 0, "elapsed": 0.0,
+                                           "bytes": 0, "rows_parsed": 0, "rows_written": 0,
+                                           "rss_delta_mb": None, "process_peak_rss_mb": None})
+        g["calls"] += 1
+        g["failed"] += r["status"] != "ok"
+        g["elapsed"] += r["elapsed"]
+        for name in ("bytes", "rows_parsed", "rows_written"):
+            g[name] += r.get(name, 0)
+        for name in ("rss_delta_mb", "process_peak_rss_mb"):
+            if r.get(name) is not None:
+                g[name] = r[name] if g[name] is None else max(g[name], r[name])
+    for g in groups.values():
+        rows = g["rows_parsed"] or g["rows_written"]
+        g["rows_per_s"] = rows / g["elapsed"] if rows and g["elapsed"] > 0 else None
+    return list(groups.values())
+
+
+def print_summary(items: Optional[List[dict]] = None) -> None:
+    """Imprime a tabela de `summary`. O tempo dos trechos aninhados também conta no trecho externo."""
+    groups = summary(items)
+    if not groups:
+        return
+    print(f"\n{'trecho':<30}{'chamadas':>9}{'tempo (s)':>11}{'MB':>9}{'linhas lidas':>14}"
+          f"{'gravadas':>11}{'linhas/s':>12}{'Δ RSS (MB)':>12}{'pico proc. (MB)':>17}")
+    for g in groups:
+        rate = f"{g['rows_per_s']:,.0f}" if g["rows_per_s"] else "-"
+        delta = f"{g['rss_delta_mb']:+.0f}" if g["rss_delta_mb"] is not None else "-"
+        peak = f"{g['process_peak_rss_mb']:.0f}" if g["process_peak_rss_mb"] is not None else "-"
+        failed = f"  ({g['failed']} falhas)" if g["failed"] else ""
+        print(f"{g['stage']:<30}{g['calls']:>9}{g['elapsed']:>11.2f}{g['bytes'] / 1e6:>9.1f}"
+              f"{g['rows_parsed']:>14,}{g['rows_written']:>11,}{rate:>12}{delta:>12}{peak:>17}{failed}")
@@ -0,0 +1,518 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from src import instrument
+from src.instrument import span
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_STATIONS = [
+    "OULU", "APT", "CALG", "CALM", "DRBS",
+    "INVK", "IRK2", "JUNG", "JUNG1", "KERG",
+    "KIEL2", "LMKS", "PTFM", "PWNK", "ROME",
+    "TERA", "THUL"
+]
+SOURCES = ["stations", "goes", "ace", "kp", "kp_gfz"]
+DATE_FORMAT = "%Y-%m-%d"
+
+# Limite de estágios simultâneos por tipo de recurso
+DEFAULT_POOLS = {"network": len(SOURCES), "cpu": 2}
+
+
+@dataclass
+class PipelineConfig:
+    """
+    Configuração de uma execução do pipeline (arquivo JSON ou argumentos de linha de comando).
+
+    Attributes:
+        start (datetime): Data inicial.
+        end (datetime): Data final.
+        sources (List[str]): Fontes a extrair (stations, goes, ace, kp, kp_gfz).
+        stations (List[str]): Estações NMDB.
+        update_stations (bool): Baixa só os dados posteriores ao último registro salvo.
+        local_pressure_correction (bool): Baixa a pressão da estação no lugar da RCORR_P e
+            calcula a RCORR_P localmente com os coeficientes de `data/station_meta.json`
+            (`src.barometric`); estações sem coeficientes ficam sem RCORR_P.
+        plot (bool): Gera os gráficos das estações.
+        rollup (bool): Atualiza a pirâmide de agregados das estações.
+        archive (bool): Grava as estações também no arquivo binário de 1 minuto
+            (`src.archive`, em `data/archive`).
+        events (bool): Procura decréscimos de Forbush e GLEs nas amostras novas das
+            estações (`src.events`; estado e eventos em `data/events`).
+        gaps (bool): Atualiza o índice de falhas das estações e feeds (`src.gaps`, em
+            `data/gaps.json`) depois das extrações.
+        export_xlsx (bool): Exporta também para Excel.
+        data_dir (str): Pasta base dos dados.
+        plot_dir (str): Pasta dos gráficos.
+        kp_gfz_start (datetime, optional): Início do Kp GFZ. Defaults para `start`.
+        kp_gfz_end (datetime, optional): Fim do Kp GFZ. Defaults para `end`.
+        pools (Dict[str, int]): Estágios simultâneos por recurso ("network", "cpu").
+        station_workers (int): Downloads simultâneos de estações.
+        plot_workers (int, optional): Processos de renderização dos gráficos.
+        nest_url (str, optional): Endereço do draw_graph.php. Defaults para o NEST oficial.
+        swpc_url (str, optional): Endereço base do SWPC. Defaults para o servidor da NOAA.
+        gfz_url (str, optional): Endereço da API do Kp GFZ.
+        metrics_path (str, optional): Arquivo JSON lines com as medições de cada trecho
+            (tempo, bytes, linhas, memória); liga a instrumentação (`src.instrument`).
+        profile_dir (str, optional): Pasta dos dumps do cProfile de cada etapa; liga a
+            instrumentação e executa as etapas uma de cada vez, e os gráficos no próprio
+            processo. O download das estações (threads) fica sem dump, só com as medições.
+    """
+    start: datetime = datetime(2024, 1, 1)
+    end: datetime = field(default_factory=datetime.today)
+    sources: List[str] = field(default_factory=lambda: list(SOURCES))
+    stations: List[str] = field(default_factory=lambda: list(DEFAULT_STATIONS))
+    update_stations: bool = False
+    local_pressure_correction: bool = False
+    plot: bool = True
+    rollup: bool = True
+    events: bool = False
+    archive: bool = False
+    gaps: bool = False
+    export_xlsx: bool = False
+    data_dir: str = "data"
+    plot_dir: str = "plots"
+    kp_gfz_start: Optional[datetime] = None
+    kp_gfz_end: Optional[datetime] = None
+    pools: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_POOLS))
+    station_workers: int = 8
+    plot_workers: Optional[int] = None
+    nest_url: Optional[str] = None
+    swpc_url: Optional[str] = None
+    gfz_url: Optional[str] = None
+    metrics_path: Optional[str] = None
+    profile_dir: Optional[str] = None
+
+    def __post_init__(self):
+        unknown = set(self.sources) - set(SOURCES)
+        if unknown:
+            raise ValueError(f"Fontes desconhecidas: {sorted(unknown)}. Use {SOURCES}.")
+
+    def dir(self, name: str) -> str:
+        return os.path.join(self.data_dir, name)
+
+
+def _parse_date(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    for fmt in (DATE_FORMAT, "%Y-%m-%dT%H:%M:%S", "%d%m%Y"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: {value}")
+
+
+def load_config(path: Optional[str] = None, **overrides) -> PipelineConfig:
+    """
+    Lê a configuração de um arquivo JSON e aplica as sobreposições informadas.
+
+    Args:
+        path (str, optional): Arquivo JSON com os campos de `PipelineConfig`.
+        **overrides: Campos que substituem os do arquivo (valores None são ignorados).
+
+    Returns:
+        PipelineConfig: Configuração validada.
+    """
+    values: Dict[str, Any] = {}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            values.update(json.load(f))
+    values.update({k: v for k, v in overrides.items() if v is not None})
+
+    for key in ("start", "end", "kp_gfz_start", "kp_gfz_end"):
+        if key in values:
+            values[key] = _parse_date(values[key])
+    if "pools" in values:
+        values["pools"] = {**DEFAULT_POOLS, **values["pools"]}
+    return PipelineConfig(**values)
+
+
+@dataclass
+class Stage:
+    """
+    Etapa do pipeline.
+
+    Attributes:
+        name (str): Nome único.
+        func (Callable): Recebe um dicionário com os resultados das dependências.
+        deps (List[str]): Etapas que precisam terminar antes.
+        pool (str): Recurso usado ("network" ou "cpu"), que limita a concorrência.
+        profile (bool): Grava o dump do cProfile da etapa com `profile_dir`. False nas
+            etapas que trabalham em threads próprias, que o cProfile não enxerga.
+    """
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    deps: List[str] = field(default_factory=list)
+    pool: str = "network"
+    profile: bool = True
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str
+    started: float = 0.0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+def run_stages(
+    stages: List[Stage],
+    pools: Optional[Dict[str, int]] = None
+) -> Dict[str, StageResult]:
+    """
+    Executa as etapas respeitando as dependências, com concorrência limitada por recurso.
+
+    Uma etapa começa assim que todas as suas dependências terminam com sucesso; se
+    alguma falhar, a etapa é marcada como "skipped". Etapas independentes (por exemplo,
+    extratores de servidores diferentes) rodam ao mesmo tempo.
+
+    Args:
+        stages (List[Stage]): Etapas do pipeline.
+        pools (Dict[str, int], optional): Etapas simultâneas por recurso. Defaults para DEFAULT_POOLS.
+
+    Returns:
+        Dict[str, StageResult]: Resultado de cada etapa, na ordem de `stages`.
+    """
+    pools = {**DEFAULT_POOLS, **(pools or {})}
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [d for d in stage.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Etapa {stage.name} depende de etapas inexistentes: {missing}")
+
+    semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in pools.items()}
+    for stage in stages:
+        semaphores.setdefault(stage.pool, threading.BoundedSemaphore(1))
+    outputs: Dict[str, Any] = {}
+    results: Dict[str, StageResult] = {}
+    t0 = time.perf_counter()
+
+    def execute(stage: Stage) -> StageResult:
+        with semaphores[stage.pool]:
+            started = time.perf_counter()
+            print(f"▶ {stage.name}")
+            try:
+                with span(stage.name, profile=stage.profile):
+                    outputs[stage.name] = stage.func({d: outputs.get(d) for d in stage.deps})
+                status, error = "ok", None
+            except Exception as e:
+                status, error = "failed", f"{type(e).__name__}: {e}"
+                print(f"[ERRO] Etapa {stage.name} falhou: {error}")
+            return StageResult(stage.name, status, started - t0, time.perf_counter() - started, error)
+
+    remaining = list(stages)
+    with ThreadPoolExecutor(max_workers=max(sum(pools.values()), 1)) as executor:
+        running = {}
+        while remaining or running:
+            changed = True
+            while changed:
+                changed = False
+                for stage in list(remaining):
+                    states = [results[d].status if d in results else None for d in stage.deps]
+                    if any(s in ("failed", "skipped") for s in states):
+                        results[stage.name] = StageResult(stage.name, "skipped", error="dependência falhou")
+                    elif all(s == "ok" for s in states):
+                        running[executor.submit(execute, stage)] = stage
+                    else:
+                        continue
+                    remaining.remove(stage)
+                    changed = True
+
+            if not running:
+                if remaining:
+                    raise ValueError(f"Dependência circular entre: {[s.name for s in remaining]}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                results[stage.name] = future.result()
+
+    return {stage.name: results[stage.name] for stage in stages}
+
+
+def build_stages(config: PipelineConfig) -> List[Stage]:
+    """Monta as etapas (download → leitura → armazenamento → gráficos) a partir da configuração."""
+    from src.backfill import DEFAULT_CHUNK, backfill_gfz
+    from src.cache import cached_load_station_data
+    from src.download import DEFAULT_WINDOW, NEST_BASE_URL, PRESSURE_TYPES, download_stations
+    from src.extractors import GFZ_URL, SWPC_BASE_URL, extract_ace_all, extract_goes, extract_kp, extract_kp_gfz_xlsx
+    from src.station_update import update_stations
+
+    nest_url = config.nest_url or NEST_BASE_URL
+    station_types = PRESSURE_TYPES if config.local_pressure_correction else None
+    swpc_url = config.swpc_url or SWPC_BASE_URL
+
+    station_dir = config.dir("data_station")
+    goes_dir = config.dir("data_goes")
+    kp_dir = config.dir("data_kp")
+    ace_dir = config.dir("data_ace")
+    stages: List[Stage] = []
+
+    if "stations" in config.sources:
+        def download(_):
+            os.makedirs(station_dir, exist_ok=True)
+            if config.update_stations:
+                return update_stations(config.stations, station_dir, default_start=config.start,
+                                       include_types=station_types, max_workers=config.station_workers,
+                                       base_url=nest_url)
+            return download_stations(config.stations, config.start, config.end, station_dir,
+                                     include_types=station_types, max_workers=config.station_workers,
+                                     base_url=nest_url, window=DEFAULT_WINDOW)
+
+        def parse(inputs):
+            dataframes = {}
+            if config.local_pressure_correction:
+                from src.barometric import apply_pressure_correction, load_station_meta
+                meta = load_station_meta(config.dir("station_meta.json"))
+                missing = [s for s in config.stations if s not in meta]
+                if missing:
+                    print(f"Sem coeficientes barométricos (python -m src.barometric calibrate): {', '.join(missing)}")
+            for station, result in inputs["stations.download"].items():
+                # Um arquivo de uma execução anterior não representa o intervalo pedido agora
+                if not result.ok:
+                    print(f"{station} ignorada: download com status {result.status}")
+                    continue
+                if os.path.exists(result.file_path):
+                    try:
+                        dataframes[station] = cached_load_station_data(result.file_path, data_dir=config.data_dir)
+                        if config.local_pressure_correction:
+                            dataframes[station] = apply_pressure_correction(dataframes[station], meta.get(station))
+                    except Exception as e:
+                        print(f"Erro ao processar {station}: {e}")
+            if not dataframes:
+                raise RuntimeError("Nenhuma estação válida carregada.")
+            return dataframes
+
+        # O cProfile só vê a thread que chama, não as threads de download
+        stages.append(Stage("stations.download", download, profile=False))
+        stages.append(Stage("stations.parse", parse, ["stations.download"], "cpu"))
+
+        if config.rollup:
+            def store(inputs):
+                from src.rollup import update_pyramid
+                for station, df in inputs["stations.parse"].items():
+                    update_pyramid(station, df, os.path.join(config.data_dir, "rollup"))
+
+            stages.append(Stage("stations.store", store, ["stations.parse"], "cpu"))
+
+        if config.archive:
+            def archive(inputs):
+                from src.archive import StationArchive
+                for station, df in inputs["stations.parse"].items():
+                    StationArchive(station, os.path.join(config.data_dir, "archive")).append(df)
+
+            stages.append(Stage("stations.archive", archive, ["stations.parse"], "cpu"))
+
+        if config.events:
+            def events(inputs):
+                from src.events import update_events
+                return update_events(inputs["stations.parse"], os.path.join(config.data_dir, "events"))
+
+            stages.append(Stage("stations.events", events, ["stations.parse"], "cpu"))
+
+        if config.plot:
+            def plot(inputs):
+                from src.cube import StationCube
+                from src.plot import render_station_plots
+                cube = StationCube.from_series(inputs["stations.parse"])
+                # Com --profile, renderiza no próprio processo para o dump incluir os gráficos
+                workers = 1 if config.profile_dir else config.plot_workers
+                render_station_plots(cube, cube.stations, config.plot_dir, max_workers=workers)
+
+            stages.append(Stage("stations.plot", plot, ["stations.parse"], "cpu"))
+
+    if "goes" in config.sources:
+        stages.append(Stage("goes", lambda _: extract_goes(
+            save_path=os.path.join(goes_dir, "goes_protons.xlsx"), export_xlsx=config.export_xlsx, base_url=swpc_url,
+            data_dir=config.data_dir)))
+
+    if "ace" in config.sources:
+        stages.append(Stage("ace", lambda _: extract_ace_all(ace_dir, export_xlsx=config.export_xlsx, base_url=swpc_url,
+                                                             data_dir=config.data_dir)))
+
+    if "kp" in config.sources:
+        stages.append(Stage("kp", lambda _: extract_kp(
+            save_path=os.path.join(kp_dir, "kp_index_1min.xlsx"), export_xlsx=config.export_xlsx, base_url=swpc_url,
+            data_dir=config.data_dir)))
+
+    if "kp_gfz" in config.sources:
+        gfz_start = config.kp_gfz_start or config.start
+        gfz_end = config.kp_gfz_end or config.end
+        if gfz_end - gfz_start > DEFAULT_CHUNK:
+            # Intervalos longos: preenchimento em trechos paralelos, com retomada
+            def kp_gfz(_):
+                failed = backfill_gfz(gfz_start, datetime.combine(gfz_end.date(), datetime.min.time()) + timedelta(days=1),
+                                      kp_dir, export_xlsx=config.export_xlsx, url=config.gfz_url or GFZ_URL)
+                if any(failed.values()):
+                    raise RuntimeError(f"trechos do GFZ com falha: {failed}")
+
+            stages.append(Stage("kp_gfz", kp_gfz))
+        else:
+            stages.append(Stage("kp_gfz", lambda _: extract_kp_gfz_xlsx(
+                start=gfz_start.strftime("%Y-%m-%dT00:00:00Z"),
+                end=gfz_end.strftime("%Y-%m-%dT23:59:59Z"),
+                save_path=os.path.join(kp_dir, "dados_kp_gfz.xlsx"),
+                export_xlsx=config.export_xlsx,
+                url=config.gfz_url or GFZ_URL,
+                data_dir=config.data_dir
+            )))
+
+    if config.gaps:
+        def gaps(_):
+            from src.gaps import GapIndex
+            index = GapIndex(config.dir("gaps.json"))
+            changed = index.update_all(config.data_dir)
+            index.save()
+            return changed
+
+        extractions = {"stations": "stations.download", "goes": "goes", "ace": "ace", "kp": "kp", "kp_gfz": "kp_gfz"}
+        stages.append(Stage("gaps", gaps, [extractions[s] for s in config.sources], "cpu"))
+
+    for d in (station_dir, goes_dir, kp_dir, ace_dir, config.plot_dir):
+        os.makedirs(d, exist_ok=True)
+    return stages
+
+
+def print_summary(results: Dict[str, StageResult], total: float) -> None:
+    print(f"\n{'etapa':<20}{'status':<10}{'início (s)':>12}{'duração (s)':>13}")
+    for r in results.values():
+        print(f"{r.name:<20}{r.status:<10}{r.started:>12.1f}{r.elapsed:>13.1f}" + (f"  {r.error}" if r.error else ""))
+    serial = sum(r.elapsed for r in results.values())
+    print(f"Tempo total: {total:.1f}s (soma das etapas: {serial:.1f}s)")
+
+
+def run(config: PipelineConfig, report_path: Optional[str] = None) -> Dict[str, StageResult]:
+    """
+    Executa o pipeline descrito por `config` e imprime o resumo por etapa.
+
+    Args:
+        config (PipelineConfig): Configuração.
+        report_path (str, optional): Se informado, grava o resumo em JSON (útil no cron).
+
+    Returns:
+        Dict[str, StageResult]: Resultado de cada etapa.
+    """
+    stages, pools = build_stages(config), config.pools
+    if config.metrics_path or config.profile_dir:
+        instrument.enable(config.metrics_path, config.profile_dir)
+        if config.profile_dir:
+            # Todas as etapas num único recurso de tamanho 1: uma etapa por vez no
+            # pipeline inteiro, então cada dump do cProfile contém só a sua etapa
+            stages = [replace(stage, pool="profile") for stage in stages]
+            pools = {"profile": 1}
+    try:
+        t0 = time.perf_counter()
+        results = run_stages(stages, pools)
+        total = time.perf_counter() - t0
+        print_summary(results, total)
+        metrics = instrument.summary() if instrument.enabled() else None
+        instrument.print_summary()
+    finally:
+        instrument.disable()
+
+    if report_path:
+        report = {
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "total_seconds": round(total, 3),
+            "stages": [asdict(r) for r in results.values()],
+        }
+        if metrics is not None:
+            report["metrics"] = metrics
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return results
+
+
+class PipelineLock:
+    """
+    Impede que duas execuções agendadas (cron) rodem ao mesmo tempo.
+
+    A trava é do sistema operacional (flock; `msvcrt.locking` no Windows) sobre um arquivo
+    que permanece no disco: se o processo morrer (falha, OOM, SIGKILL), o kernel a libera
+    e a próxima execução segue normalmente. O arquivo guarda o PID da execução atual.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR)
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(self._fd)
+            self._fd = None
+            raise RuntimeError(f"Outra execução do pipeline está em andamento ({self.path}).")
+        os.ftruncate(self._fd, 0)
+        os.write(self._fd, str(os.getpid()).encode("ascii"))
+        return self
+
+    def __exit__(self, *exc):
+        # O arquivo não é apagado: outra execução pode já tê-lo aberto para travar
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Executa a extração de dados sem interação.")
+    parser.add_argument("--config", help="Arquivo JSON com a configuração")
+    parser.add_argument("--start", help="Data inicial (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Data final (YYYY-MM-DD)")
+    parser.add_argument("--sources", help=f"Fontes separadas por vírgula ({','.join(SOURCES)})")
+    parser.add_argument("--stations", help="Estações separadas por vírgula")
+    parser.add_argument("--update", action="store_true", default=None, help="Baixa só os dados novos das estações")
+    parser.add_argument("--export-xlsx", action="store_true", default=None)
+    parser.add_argument("--no-plot", action="store_false", dest="plot", default=None)
+    parser.add_argument("--report", help="Grava o resumo da execução em JSON")
+    parser.add_argument("--metrics", help="Grava as medições de cada trecho em JSON lines")
+    parser.add_argument("--profile", nargs="?", const=os.path.join("data", "profile"), metavar="PASTA",
+                        help="Grava dumps do cProfile por etapa (padrão: data/profile); "
+                             "gráficos sem paralelismo, download das estações sem dump")
+    parser.add_argument("--lock", default=os.path.join("data", ".pipeline.lock"),
+                        help="Arquivo de trava contra execuções simultâneas")
+    args = parser.parse_args(argv)
+
+    config = load_config(
+        args.config,
+        start=args.start,
+        end=args.end,
+        sources=args.sources.split(",") if args.sources else None,
+        stations=[s.strip().upper() for s in args.stations.split(",")] if args.stations else None,
+        update_stations=args.update,
+        export_xlsx=args.export_xlsx,
+        plot=args.plot,
+        metrics_path=args.metrics,
+        profile_dir=args.profile,
+    )
+    os.makedirs(os.path.dirname(args.lock) or ".", exist_ok=True)
+    with PipelineLock(args.lock):
+        results = run(config, args.report)
+    return 0 if all(r.status == "ok" for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.pipeline --config pipeline.json
+    sys.exit(main())
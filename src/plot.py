@@ -1,44 +1,273 @@
 import matplotlib.pyplot as plt
+import multiprocessing
 import os
-from typing import List, Optional
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
 import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from src.cube import StationCube
+from src.instrument import span
+
+FIGSIZE = (14, 6)
+DPI = 100
+
+# Figura reaproveitada entre gráficos dentro de cada processo de renderização
+_FIGURE = None
+
+
+def decimate_minmax(x: np.ndarray, y: np.ndarray, n_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduz a série a no máximo 2 pontos (mínimo e máximo) por intervalo de tempo.
+
+    Com um intervalo por pixel a linha desenhada é a mesma da série completa: o traço
+    vertical de cada coluna vai do mínimo ao máximo. Intervalos só com NaN viram um NaN,
+    preservando as falhas da série.
+
+    Args:
+        x (np.ndarray): Tempos em int64 (ns), crescentes.
+        y (np.ndarray): Valores.
+        n_bins (int): Número de intervalos (largura do gráfico em pixels).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Tempos e valores reduzidos.
+    """
+    if len(x) <= 2 * n_bins:
+        return x, y
+
+    span = max(int(x[-1] - x[0]), 1)
+    bins = ((x - x[0]).astype(np.float64) * (n_bins / span)).astype(np.int64).clip(0, n_bins - 1)
+
+    # x é crescente, então cada intervalo é um trecho contínuo do array
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    counts = np.diff(np.r_[starts, len(x)])
+    with np.errstate(invalid="ignore"):
+        y_min = np.fmin.reduceat(y, starts)
+        y_max = np.fmax.reduceat(y, starts)
+
+    keep = [np.array([0, len(x) - 1])]
+    for target in (y_min, y_max):
+        # Primeira ocorrência do extremo em cada intervalo
+        hits = np.flatnonzero(y == np.repeat(target, counts))
+        first = np.r_[True, bins[hits[1:]] != bins[hits[:-1]]]
+        keep.append(hits[first])
+
+    # Intervalos sem nenhum valor válido: um NaN para interromper a linha
+    keep.append(starts[np.isnan(y_min)])
+
+    keep = np.unique(np.concatenate(keep))
+    return x[keep], y[keep]
+
+
+def decimate_lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduz a série a `n_out` pontos pelo algoritmo Largest-Triangle-Three-Buckets.
+
+    Preserva a forma visual com menos pontos que o min-max, mas não as falhas:
+    valores NaN são descartados antes da redução.
+
+    Args:
+        x (np.ndarray): Tempos em int64 (ns), crescentes.
+        y (np.ndarray): Valores.
+        n_out (int): Número de pontos desejado.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Tempos e valores reduzidos.
+    """
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return x, y
+
+    xf = (x - x[0]).astype(np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xf[nxt_lo:nxt_hi].mean() if nxt_hi > nxt_lo else xf[-1]
+        avg_y = y[nxt_lo:nxt_hi].mean() if nxt_hi > nxt_lo else y[-1]
+        area = np.abs(
+            (xf[a] - avg_x) * (y[lo:hi] - y[a]) - (xf[a] - xf[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def decimate(x: np.ndarray, y: np.ndarray, width_px: int, method: str = "minmax") -> Tuple[np.ndarray, np.ndarray]:
+    """Aplica a redução escolhida ("minmax", "lttb" ou None) para a largura em pixels."""
+    if method == "minmax":
+        return decimate_minmax(x, y, width_px)
+    if method == "lttb":
+        return decimate_lttb(x, y, 2 * width_px)
+    if method is None:
+        return x, y
+    raise ValueError(f"Método de redução desconhecido: {method}")
+
+
+def _iter_series(
+    data: Union[pd.DataFrame, StationCube],
+    stations: List[str],
+    tipo: List[str]
+) -> Iterator[Tuple[str, str, np.ndarray, np.ndarray]]:
+    """Percorre (estação, tipo, tempos em ns, valores) de um DataFrame MultiIndex ou de um StationCube."""
+    if isinstance(data, StationCube):
+        x = data.times.view(np.int64)
+        for station in stations:
+            for t in tipo:
+                if (station, t) in data:
+                    yield station, t, x, data.series(station, t)
+        return
+
+    x = data.index.values.astype("datetime64[ns]").view(np.int64)
+    for station in stations:
+        for t in tipo:
+            if (station, t) in data.columns:
+                yield station, t, x, data[(station, t)].to_numpy(dtype=np.float64)
+
+
+def _plot_jobs(
+    data: Union[pd.DataFrame, StationCube],
+    stations: List[str],
+    tipo: List[str],
+    save_path: str,
+    method: Optional[str]
+) -> list:
+    width_px = FIGSIZE[0] * DPI
+    jobs = []
+    for station, t, x, y in _iter_series(data, stations, tipo):
+        xs, ys = decimate(x, y, width_px, method)
+        filename = os.path.join(save_path, f"{station}_{t}.png")
+        jobs.append((filename, station, t, xs, ys.astype(np.float64)))
+    return jobs
+
+
+def _render(job) -> str:
+    """Desenha um gráfico reaproveitando a figura do processo (backend Agg, sem pyplot)."""
+    global _FIGURE
+    filename, station, t, x, y = job
+    x = x.view("datetime64[ns]")
+    label = f"{station} - {t}"
+
+    if _FIGURE is None:
+        fig = Figure(figsize=FIGSIZE, dpi=DPI)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        line, = ax.plot(x, y, label=label, linewidth=0.7)
+        ax.set_xlabel("Data")
+        ax.set_ylabel("Contagens corrigidas (c/s)")
+        ax.grid(True)
+        _FIGURE = fig, ax, line
+    else:
+        fig, ax, line = _FIGURE
+        line.set_data(x, y)
+        line.set_label(label)
+        ax.relim()
+        ax.autoscale_view()
+
+    ax.set_title(f"Estatísticas da Estação {station} - {t}")
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(filename)
+    return filename
+
+
+def render_station_plots(
+    df: Union[pd.DataFrame, StationCube],
+    stations: List[str],
+    save_path: str,
+    tipo: Optional[List[str]] = None,
+    method: Optional[str] = "minmax",
+    max_workers: Optional[int] = None
+) -> List[str]:
+    """
+    Gera os gráficos por estação e tipo em paralelo, sem interface gráfica.
+
+    As séries são reduzidas no processo principal para a largura do gráfico em pixels
+    (min-max por padrão: mesma envoltória da série completa, com diferenças apenas na
+    suavização dos traços) e só os pontos reduzidos
+    vão para os processos de renderização, que usam o backend Agg e reaproveitam a
+    mesma figura. Tamanho, títulos, rótulos e nomes de arquivo são os de
+    `plot_stations_comparison_by_type`.
+
+    Args:
+        df (pd.DataFrame | StationCube): DataFrame com colunas MultiIndex (station, tipo) ou StationCube.
+        stations (List[str]): Lista de estações.
+        save_path (str): Diretório onde os gráficos serão salvos.
+        tipo (List[str], optional): Tipos de correção. Defaults para ["RCORR_E", "RUNCORR", "RCORR_P"].
+        method (str, optional): "minmax", "lttb" ou None (sem redução).
+        max_workers (int, optional): Processos de renderização. Defaults para o número de CPUs;
+            1 renderiza no próprio processo.
+
+    Returns:
+        List[str]: Arquivos gerados.
+    """
+    tipo = tipo or ["RCORR_E", "RUNCORR", "RCORR_P"]
+    os.makedirs(save_path, exist_ok=True)
+    with span("render_station_plots") as s:
+        jobs = _plot_jobs(df, stations, tipo, save_path, method)
+        max_workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+
+        t0 = time.perf_counter()
+        if max_workers <= 1:
+            files = [_render(job) for job in jobs]
+        else:
+            # forkserver: o pipeline chama daqui de uma thread enquanto outras etapas seguram
+            # travas (pools HTTP, instrumentação); um fork copiaria essas travas já fechadas
+            with ProcessPoolExecutor(max_workers=max_workers,
+                                     mp_context=multiprocessing.get_context("forkserver")) as executor:
+                chunksize = max(1, len(jobs) // (4 * max_workers))
+                files = list(executor.map(_render, jobs, chunksize=chunksize))
+
+        elapsed = time.perf_counter() - t0
+        # Pontos efetivamente desenhados (após a redução), somados em todos os gráficos
+        s.add(plots=len(files), rows_written=sum(len(job[3]) for job in jobs))
+        print(f" {len(files)} gráficos salvos em {save_path} ({elapsed:.1f}s)")
+        return files
+
 
 def plot_stations_comparison_by_type(
-    df: pd.DataFrame,
+    df: Union[pd.DataFrame, StationCube],
     stations: List[str],
     tipo: Optional[List[str]] = None,
-    save_path: Optional[str] = None
+    save_path: Optional[str] = None,
+    method: Optional[str] = "minmax",
+    max_workers: Optional[int] = None
 ) -> None:
     """
     Plota os dados de cada estação separadamente para cada tipo de dado (RCORR_E, RUNCORR, RCORR_P).
 
     Args:
-        df (pd.DataFrame): DataFrame com colunas MultiIndex (station, tipo).
+        df (pd.DataFrame | StationCube): DataFrame com colunas MultiIndex (station, tipo) ou StationCube.
         stations (List[str]): Lista de estações.
         tipo (List[str], optional): Lista de tipos de correção. Defaults para ["RCORR_E", "RUNCORR", "RCORR_P"].
         save_path (str, optional): Diretório onde os gráficos serão salvos. Se None, os gráficos são exibidos na tela.
+        method (str, optional): Redução das séries antes de plotar ("minmax", "lttb" ou None).
+        max_workers (int, optional): Processos de renderização ao salvar (ver `render_station_plots`).
     """
     tipo = tipo or ["RCORR_E", "RUNCORR", "RCORR_P"]
 
-    for station in stations:
-        for t in tipo:
-            if (station, t) not in df.columns:
-                continue
-
-            plt.figure(figsize=(14, 6))
-            plt.plot(df.index, df[(station, t)], label=f"{station} - {t}", linewidth=0.7)
-            plt.title(f"Estatísticas da Estação {station} - {t}")
-            plt.xlabel("Data")
-            plt.ylabel("Contagens corrigidas (c/s)")
-            plt.grid(True)
-            plt.legend()
-            plt.tight_layout()
-
-            if save_path:
-                os.makedirs(save_path, exist_ok=True)
-                filename = os.path.join(save_path, f"{station}_{t}.png")
-                plt.savefig(filename)
-                print(f" Gráfico salvo: {filename}")
-                plt.close()
-            else:
-                plt.show()
\ No newline at end of file
+    if save_path:
+        render_station_plots(df, stations, save_path, tipo, method, max_workers)
+        return
+
+    for station, t, x, y in _iter_series(df, stations, tipo):
+        xs, ys = decimate(x, y, FIGSIZE[0] * DPI, method)
+        plt.figure(figsize=FIGSIZE)
+        plt.plot(xs.view("datetime64[ns]"), ys, label=f"{station} - {t}", linewidth=0.7)
+        plt.title(f"Estatísticas da Estação {station} - {t}")
+        plt.xlabel("Data")
+        plt.ylabel("Contagens corrigidas (c/s)")
+        plt.grid(True)
+        plt.legend()
+        plt.tight_layout()
+        plt.show()
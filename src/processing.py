@@ -1,41 +1,212 @@
+import io
+import mmap
+import os
 import pandas as pd
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
-def load_station_data(filepath: str) -> pd.DataFrame:
+from src.instrument import span
+from src.schemas import SCHEMAS, enforce
+
+STATION_COLUMNS = ["RCORR_E", "RUNCORR", "RCORR_P"]
+
+# Sufixos dos nomes de coluna do NEST -> nome padronizado.
+# Tabela de 1 minuto: RCORR_E / RUNCORR / RCORR_P
+# Tabela de 1 hora:   1HCOR_E / 1HUNCOR / 1HCOR_P
+# Pressão da estação (mbar), pedida no modo de correção local: RPRESS / 1HPRESS
+HEADER_SUFFIXES = [
+    ("UNCORR", "RUNCORR"),
+    ("UNCOR", "RUNCORR"),
+    ("COR_E", "RCORR_E"),
+    ("COR_P", "RCORR_P"),
+    ("PRESS", "PRESS"),
+]
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_CHUNKSIZE = 500_000
+
+
+def map_header_columns(names: List[str]) -> List[str]:
     """
-    Carrega os dados ASCII de uma estação NMDB, removendo conteúdo HTML e validando o formato.
+    Converte os nomes do cabeçalho do NEST (1 minuto ou 1 hora) para os nomes padronizados.
 
     Args:
-        filepath (str): Caminho do arquivo de texto da estação
+        names (List[str]): Nomes das colunas de dados, sem `start_date_time`.
 
     Returns:
-        pd.DataFrame: DataFrame com colunas ['RCORR_E', 'RUNCORR', 'RCORR_P'] indexado por data/hora
+        List[str]: Nomes padronizados (colunas desconhecidas mantêm o nome original).
     """
-    with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+    mapped = []
+    for name in names:
+        upper = name.upper()
+        mapped.append(next((std for suffix, std in HEADER_SUFFIXES if upper.endswith(suffix)), name))
+    return mapped
 
-    # Localiza índice do início dos dados
-    data_start_index: Optional[int] = next((i for i, line in enumerate(lines) if "start_date_time" in line), None)
 
-    if data_start_index is None:
-        raise ValueError("Formato inesperado: cabeçalho 'start_date_time' não encontrado.")
+def _locate_data_block(filepath: str) -> Tuple[List[str], int, int]:
+    """
+    Localiza o bloco de dados sem carregar o arquivo inteiro.
+
+    Returns:
+        Tuple[List[str], int, int]: Nomes padronizados das colunas e os offsets (em bytes)
+        do início e do fim do bloco de dados.
+    """
+    with open(filepath, "rb") as f:
+        offset = 0
+        header: Optional[bytes] = None
+        for line in f:
+            offset += len(line)
+            # A consulta SQL embutida no HTML também cita start_date_time;
+            # o cabeçalho dos dados é a linha que começa por ele
+            if line.lstrip().startswith(b"start_date_time"):
+                header = line
+                break
+
+        if header is None:
+            raise ValueError("Formato inesperado: cabeçalho 'start_date_time' não encontrado.")
+
+        size = os.fstat(f.fileno()).st_size
+        end = size
+        if size > offset:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                found = mm.find(b"</code>", offset)
+                if found != -1:
+                    end = found
 
-    # Extração dos dados com as 4 primeiras colunas (datetime + 3 tipos de correção)
-    data_lines = [
-        line.strip().split(";")[:4]
-        for line in lines[data_start_index + 1:]
-        if ";" in line
-    ]
+    return _header_columns(header.decode("utf-8")), offset, end
 
-    df = pd.DataFrame(data_lines, columns=["datetime", "RCORR_E", "RUNCORR", "RCORR_P"])
 
-    # Conversão de colunas para os tipos corretos
-    df["datetime"] = pd.to_datetime(df["datetime"].str.strip(), format="%Y-%m-%d %H:%M:%S", errors="coerce")
-    for col in ["RCORR_E", "RUNCORR", "RCORR_P"]:
-        df[col] = pd.to_numeric(df[col].str.strip(), errors="coerce")
+def _header_columns(line: str) -> List[str]:
+    names = line.split()
+    return map_header_columns(names[names.index("start_date_time") + 1:])
 
-    # Limpa entradas inválidas e define índice temporal
-    df.dropna(inplace=True)
-    df.set_index("datetime", inplace=True)
 
-    return df
\ No newline at end of file
+class _BoundedReader(io.RawIOBase):
+    """Leitor que expõe apenas os bytes [start, end) de um arquivo."""
+
+    def __init__(self, f, start: int, end: int):
+        self._f = f
+        self._f.seek(start)
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:self._remaining]
+        n = self._f.readinto(view)
+        self._remaining -= n
+        return n
+
+
+def iter_station_chunks(
+    filepath: str,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    offset: Optional[int] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Lê os dados ASCII de uma estação NMDB em blocos de até `chunksize` linhas.
+
+    O arquivo é posicionado direto no início dos dados e a leitura para no `</code></pre>`
+    final, sem tocar no HTML restante. Cada bloco é convertido pelo leitor CSV em C do pandas.
+
+    Args:
+        filepath (str): Caminho do arquivo de texto da estação
+        chunksize (int): Número máximo de linhas por bloco
+        offset (int, optional): Posição (em bytes, início de uma linha de dados) a partir da
+            qual ler, para percorrer só o final do arquivo. Defaults para o início dos dados.
+
+    Yields:
+        pd.DataFrame: Blocos com as colunas padronizadas, indexados por data/hora
+    """
+    columns, start, end = _locate_data_block(filepath)
+    if offset is not None:
+        start = max(start, offset)
+    if end <= start:
+        return
+
+    with open(filepath, "rb") as raw:
+        reader = io.BufferedReader(_BoundedReader(raw, start, end), buffer_size=1 << 20)
+        yield from _read_data_block(reader, columns, chunksize)
+
+
+def _read_data_block(buffer, columns: List[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Converte as linhas de dados de `buffer` (binário ou texto) em blocos indexados por data/hora."""
+    chunks = pd.read_csv(
+        buffer,
+        sep=";",
+        header=None,
+        names=["datetime"] + columns,
+        usecols=range(len(columns) + 1),
+        skipinitialspace=True,
+        na_values=["null"],
+        comment="#",
+        engine="c",
+        chunksize=chunksize,
+    )
+    for df in chunks:
+        df["datetime"] = pd.to_datetime(df["datetime"], format=DATETIME_FORMAT, errors="coerce")
+        for col in columns:
+            if not pd.api.types.is_float_dtype(df[col]):
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+        yield df.set_index("datetime")
+
+
+def _assemble_station_frame(frames: List[pd.DataFrame], columns: List[str]) -> pd.DataFrame:
+    """Junta os blocos lidos, ordena as colunas e aplica o schema das estações."""
+    if not frames:
+        df = pd.DataFrame(columns=columns, dtype="float64", index=pd.DatetimeIndex([], name="datetime"))
+    else:
+        df = frames[0] if len(frames) == 1 else pd.concat(frames)
+
+    # Ordem padronizada das colunas conhecidas; demais colunas vêm em seguida
+    ordered = [c for c in STATION_COLUMNS if c in df.columns]
+    df = df[ordered + [c for c in df.columns if c not in ordered]]
+
+    # Limpa entradas inválidas; valores em float32 (ver src.schemas)
+    return enforce(df[df.index.notna()].dropna(), SCHEMAS["station"])
+
+
+def load_station_data(filepath: str, chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """
+    Carrega os dados ASCII de uma estação NMDB, removendo conteúdo HTML e validando o formato.
+
+    Args:
+        filepath (str): Caminho do arquivo de texto da estação
+        chunksize (int): Número máximo de linhas lidas por bloco
+
+    Returns:
+        pd.DataFrame: DataFrame com colunas ['RCORR_E', 'RUNCORR', 'RCORR_P'] (float32) indexado por data/hora
+    """
+    station = os.path.basename(filepath).split("_")[0]
+    with span("load_station_data", station) as s:
+        columns, _, _ = _locate_data_block(filepath)
+        df = _assemble_station_frame(list(iter_station_chunks(filepath, chunksize)), columns)
+        s.add(bytes=os.path.getsize(filepath), rows_parsed=len(df))
+
+    return df
+
+
+def parse_station_rows(station: str, header: List[str], rows: List[str]) -> pd.DataFrame:
+    """
+    Converte cabeçalho e linhas já em memória (ex.: `fetch_station_windows`) como `load_station_data`,
+    lendo direto da memória, sem arquivo temporário.
+
+    Args:
+        station (str): Código da estação.
+        header (List[str]): Linhas de cabeçalho, terminando pela de `start_date_time`.
+        rows (List[str]): Linhas de dados.
+
+    Returns:
+        pd.DataFrame: Mesmo formato de `load_station_data`.
+    """
+    line = next((line for line in header if line.lstrip().startswith("start_date_time")), None)
+    if line is None:
+        raise ValueError("Formato inesperado: cabeçalho 'start_date_time' não encontrado.")
+    columns = _header_columns(line)
+    with span("load_station_data", station) as s:
+        frames = list(_read_data_block(io.StringIO("\n".join(rows)), columns, DEFAULT_CHUNKSIZE)) if rows else []
+        df = _assemble_station_frame(frames, columns)
+        s.add(bytes=sum(len(row) + 1 for row in rows), rows_parsed=len(df))
+    return df
@@ -0,0 +1,509 @@
+import argparse
+import os
+import signal
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src.processing import STATION_COLUMNS
+from src.rollup import LEVELS, STATS, TIME_COL, aggregate, level_dir, raw_as_stats
+from src.schemas import enforce, footprint, schema_for_store
+from src.storage import list_partitions, partitions_in_range
+
+try:
+    import orjson as _json
+except ImportError:  # orjson é opcional; a biblioteca padrão dá o mesmo resultado, mais devagar
+    import json as _json
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_MB = 256
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+
+@dataclass
+class Dataset:
+    """
+    Conjunto de dados servido a partir de um armazenamento particionado.
+
+    Attributes:
+        name (str): Nome usado nas consultas.
+        path (str): Pasta do armazenamento, relativa à pasta de dados.
+        time_col (str): Coluna de tempo.
+        keys (List[str]): Colunas que separam séries distintas no mesmo instante
+            (ex.: satélite e energia no GOES); a agregação é feita por série.
+        freq (str): Frequência de partição usada na gravação.
+    """
+    name: str
+    path: str
+    time_col: str
+    keys: List[str] = field(default_factory=list)
+    freq: str = "M"
+
+
+DATASETS: Dict[str, Dataset] = {
+    dataset.name: dataset for dataset in [
+        Dataset("goes", os.path.join("data_goes", "goes_protons"), "time_tag", ["satellite", "energy"]),
+        Dataset("kp_1m", os.path.join("data_kp", "kp_index_1min"), "time_tag"),
+        Dataset("kp_gfz", os.path.join("data_kp", "dados_kp_gfz"), "datetime"),
+        Dataset("ace_mag", os.path.join("data_ace", "ace_mag_1h"), "time_tag"),
+        Dataset("ace_swepam", os.path.join("data_ace", "ace_swepam_1h"), "time_tag"),
+        Dataset("ace_epam", os.path.join("data_ace", "ace_epam_5m"), "time_tag"),
+        Dataset("ace_sis", os.path.join("data_ace", "ace_sis_5m"), "time_tag"),
+    ]
+}
+# Estações: pirâmide de agregados em <pasta de dados>/rollup (parâmetro `station`)
+STATION_DATASET = "station"
+
+
+class PartitionCache:
+    """
+    Cache LRU de partições Parquet decodificadas, limitado em bytes e seguro entre threads.
+
+    Cada entrada guarda o DataFrame da partição (tipos de `src.schemas`, ordenado por
+    tempo) e os tempos em int64, usados para recortar intervalos com `searchsorted`.
+    Uma partição regravada pelo pipeline (mtime ou tamanho diferentes) é lida de novo.
+
+    Args:
+        max_bytes (int): Memória máxima ocupada pelas partições em cache.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_MB << 20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, time_col: str) -> Tuple[pd.DataFrame, np.ndarray]:
+        """Partição `path` decodificada e seus tempos (ns desde a época, int64)."""
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+
+        # Leitura fora do lock: outras consultas seguem sendo atendidas enquanto isso
+        df = enforce(pd.read_parquet(path), schema_for_store(os.path.dirname(path)))
+        if not df[time_col].is_monotonic_increasing:
+            df = df.sort_values(time_col, kind="stable").reset_index(drop=True)
+        times = df[time_col].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        nbytes = footprint(df) + times.nbytes
+
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self.nbytes -= previous[3]
+            self._entries[path] = (version, df, times, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted[3]
+        return df, times
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"partitions": len(self._entries), "mb": round(self.nbytes / 2 ** 20, 1),
+                    "max_mb": round(self.max_bytes / 2 ** 20, 1), "hits": self.hits, "misses": self.misses}
+
+
+def parse_time(value: str) -> pd.Timestamp:
+    """Instante de uma consulta (ISO 8601); com timezone, convertido para UTC sem timezone."""
+    ts = pd.Timestamp(value)
+    return ts.tz_convert("UTC").tz_localize(None) if ts.tzinfo is not None else ts
+
+
+def parse_resolution(value: Optional[str]) -> Optional[pd.Timedelta]:
+    """Resolução pedida ("raw" ou vazio para os dados originais; ex.: "10min", "1h", "1D")."""
+    if not value or value == "raw":
+        return None
+    step = pd.Timedelta(value)
+    if step <= pd.Timedelta(0):
+        raise ValueError(f"Resolução inválida: {value}")
+    return step
+
+
+def resample(df: pd.DataFrame, time_col: str, step: pd.Timedelta, keys: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Agrega registros em intervalos de `step` (média das colunas numéricas, último valor
+    das demais), separadamente para cada combinação de `keys`.
+
+    Cada registro recebe um código inteiro (intervalo × combinação das chaves) e as
+    médias saem de `np.bincount` sobre esses códigos, sem groupby do pandas.
+    """
+    keys = [k for k in keys or [] if k in df.columns]
+    if df.empty:
+        return df
+    bins = df[time_col].to_numpy(dtype="datetime64[ns]").view(np.int64) // step.value
+    first = bins.min()
+    code = bins - first
+    factors = []
+    for k in keys:
+        codes, uniques = pd.factorize(df[k], sort=True)
+        factors.append((k, uniques))
+        code = code * len(uniques) + codes
+    groups, inverse = np.unique(code, return_inverse=True)
+
+    out = {}
+    rest = groups
+    for k, uniques in reversed(factors):
+        out[k] = uniques.take(rest % len(uniques))
+        rest = rest // len(uniques)
+    out = {time_col: ((rest + first) * step.value).astype("datetime64[ns]"), **dict(reversed(out.items()))}
+
+    last = None
+    for col in df.columns:
+        if col == time_col or col in keys:
+            continue
+        s = df[col]
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            values = s.to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = ~np.isnan(values)
+            total = np.bincount(inverse, weights=np.where(valid, values, 0.0), minlength=len(groups))
+            count = np.bincount(inverse, weights=valid, minlength=len(groups))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = total / count
+            out[col] = mean.astype(s.dtype) if s.dtype.kind == "f" else mean
+        else:
+            if last is None:
+                last = np.zeros(len(groups), dtype=np.int64)
+                np.maximum.at(last, inverse, np.arange(len(df)))
+            out[col] = s.iloc[last].to_numpy()
+    return pd.DataFrame(out)
+
+
+class QueryEngine:
+    """
+    Consultas por intervalo de tempo sobre os armazenamentos gerados pelo pipeline.
+
+    Args:
+        data_dir (str): Pasta de dados do pipeline.
+        cache (PartitionCache, optional): Cache de partições. Defaults para um cache de 256 MB.
+        datasets (Dict[str, Dataset], optional): Conjuntos servidos. Defaults para DATASETS.
+    """
+
+    def __init__(self, data_dir: str = "data", cache: Optional[PartitionCache] = None,
+                 datasets: Optional[Dict[str, Dataset]] = None):
+        self.data_dir = data_dir
+        self.cache = cache or PartitionCache()
+        self.datasets = datasets or DATASETS
+        self.rollup_root = os.path.join(data_dir, "rollup")
+
+    def read(self, root: str, time_col: str, start: pd.Timestamp, end: pd.Timestamp,
+             columns: Optional[List[str]] = None, freq: str = "M") -> pd.DataFrame:
+        """Registros de [start, end] de um armazenamento, recortados das partições em cache."""
+        lo, hi = start.value, end.value
+        parts = []
+        for path in partitions_in_range(root, start, end, freq):
+            df, times = self.cache.get(path, time_col)
+            i0, i1 = np.searchsorted(times, lo, "left"), np.searchsorted(times, hi, "right")
+            if i1 > i0:
+                missing = [c for c in columns or [] if c not in df.columns]
+                if missing:
+                    raise ValueError(f"Colunas desconhecidas: {', '.join(missing)}")
+                parts.append(df.iloc[i0:i1] if columns is None else df[[time_col] + columns].iloc[i0:i1])
+        if not parts:
+            return pd.DataFrame(columns=[time_col] + (columns or []))
+        return parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+    def query(
+        self,
+        dataset: str,
+        start: datetime,
+        end: datetime,
+        columns: Optional[List[str]] = None,
+        resolution: Optional[pd.Timedelta] = None,
+        station: Optional[str] = None,
+        stat: str = "mean"
+    ) -> pd.DataFrame:
+        """
+        Consulta um conjunto no intervalo [start, end].
+
+        Args:
+            dataset (str): Nome em DATASETS ou "station".
+            start (datetime): Início do intervalo.
+            end (datetime): Fim do intervalo (inclusivo).
+            columns (List[str], optional): Colunas de valores. Defaults para todas.
+            resolution (pd.Timedelta, optional): Passo da agregação; None devolve os dados originais.
+            station (str, optional): Estação (obrigatória para "station").
+            stat (str): Estatística das estações agregadas (mean, min, max, count).
+
+        Returns:
+            pd.DataFrame: Coluna de tempo primeiro; com `resolution`, um registro por
+            intervalo (e por série, quando o conjunto tem chaves).
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if resolution is not None:
+            start = start.floor(resolution)
+        if end < start:
+            raise ValueError("Fim do intervalo anterior ao início.")
+
+        if dataset == STATION_DATASET:
+            if not station:
+                raise ValueError("Informe a estação (parâmetro station).")
+            return self._station(station, start, end, columns, resolution, stat)
+        if dataset not in self.datasets:
+            raise KeyError(dataset)
+
+        spec = self.datasets[dataset]
+        if columns is not None:
+            columns = [k for k in spec.keys if k not in columns] + [c for c in columns if c != spec.time_col]
+        df = self.read(os.path.join(self.data_dir, spec.path), spec.time_col, start, end, columns, spec.freq)
+        if resolution is not None and not df.empty:
+            df = resample(df, spec.time_col, resolution, spec.keys)
+        return df
+
+    def _station(self, station: str, start: pd.Timestamp, end: pd.Timestamp, columns: Optional[List[str]],
+                 step: Optional[pd.Timedelta], stat: str) -> pd.DataFrame:
+        types = columns or list(STATION_COLUMNS)
+        unknown = [t for t in types if t not in STATION_COLUMNS]
+        if unknown or stat not in STATS:
+            raise ValueError(f"Colunas das estações: {', '.join(STATION_COLUMNS)}; estatísticas: {', '.join(STATS)}")
+
+        # Nível mais grosso da pirâmide cujo passo divide a resolução pedida
+        step = step or LEVELS[0][1]
+        name, level_step, freq = LEVELS[0]
+        for candidate in LEVELS:
+            if candidate[1] <= step and step % candidate[1] == pd.Timedelta(0):
+                name, level_step, freq = candidate
+
+        root = level_dir(station, name, self.rollup_root)
+        if name == LEVELS[0][0]:
+            df = self.read(root, TIME_COL, start, end, types, freq)
+            if step == level_step or df.empty:
+                return df
+            stats = raw_as_stats(df.set_index(TIME_COL), types)
+        else:
+            stats = self.read(root, TIME_COL, start, end, [f"{t}_{s}" for t in types for s in STATS], freq)
+            stats = stats.set_index(TIME_COL)
+        if step > level_step and not stats.empty:
+            stats = aggregate(stats, step, types)
+        out = stats[[f"{t}_{stat}" for t in types]]
+        out.columns = types
+        return out.reset_index()
+
+    def describe(self) -> dict:
+        """Conjuntos disponíveis, com colunas e número de partições, e estações da pirâmide."""
+        datasets = {}
+        for name, spec in self.datasets.items():
+            paths = list_partitions(os.path.join(self.data_dir, spec.path))
+            if paths:
+                df, _ = self.cache.get(paths[-1], spec.time_col)
+                datasets[name] = {"time_col": spec.time_col, "keys": spec.keys, "partitions": len(paths),
+                                  "columns": [c for c in df.columns if c != spec.time_col]}
+        stations = sorted(os.listdir(self.rollup_root)) if os.path.isdir(self.rollup_root) else []
+        datasets[STATION_DATASET] = {"time_col": TIME_COL, "stations": stations, "columns": list(STATION_COLUMNS),
+                                     "resolutions": [name for name, _, _ in LEVELS]}
+        return datasets
+
+
+def to_json(df: pd.DataFrame, time_col: str, meta: dict) -> bytes:
+    """Resposta JSON colunar; tempos em milissegundos desde 1970-01-01 UTC, NaN como null."""
+    data = {}
+    for col in df.columns:
+        s = df[col]
+        if col == time_col:
+            data[col] = s.to_numpy(dtype="datetime64[ms]").view(np.int64)
+        elif isinstance(s.dtype, pd.CategoricalDtype):
+            # Rótulos pelos códigos; o código -1 (NA) pega o None do fim
+            labels = np.append(s.cat.categories.to_numpy(dtype=object), None)
+            data[col] = labels[s.cat.codes.to_numpy()].tolist()
+        elif pd.api.types.is_float_dtype(s) or (pd.api.types.is_integer_dtype(s) and not s.hasnans):
+            data[col] = s.to_numpy(dtype=s.dtype.numpy_dtype if hasattr(s.dtype, "numpy_dtype") else None)
+        else:
+            data[col] = s.astype(object).where(s.notna(), None).tolist()
+    payload = dict(meta, rows=len(df), columns=list(df.columns), data=data)
+    if _json.__name__ == "orjson":
+        return _json.dumps(payload, option=_json.OPT_SERIALIZE_NUMPY)
+    for col, values in data.items():
+        if isinstance(values, np.ndarray):
+            data[col] = np.where(np.isnan(values), None, values).tolist() if values.dtype.kind == "f" \
+                else values.tolist()
+    return _json.dumps(payload).encode("utf-8")
+
+
+def to_arrow(df: pd.DataFrame) -> bytes:
+    """Resposta no formato de stream IPC do Arrow."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Rotas (somente GET):
+
+    - `/datasets`: conjuntos, colunas e estações disponíveis.
+    - `/query?dataset=goes&start=2024-01-01&end=2024-01-08&columns=flux&resolution=1h&format=json`:
+      `format=arrow` devolve um stream IPC do Arrow; para estações, `dataset=station&station=OULU`
+      e, opcionalmente, `stat=max`.
+    - `/stats`: uso do cache e latência das consultas.
+    """
+    protocol_version = "HTTP/1.1"
+    # Cabeçalho e corpo saem em escritas separadas; com o algoritmo de Nagle, respostas
+    # pequenas esperariam o ACK atrasado do cliente (~40 ms) em conexões persistentes
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send(status, _dumps({"error": message}))
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        engine: QueryEngine = self.server.engine
+        if parts.path == "/query":
+            self._query({k: v[-1] for k, v in parse_qs(parts.query).items()})
+        elif parts.path == "/datasets":
+            self._send(200, _dumps(engine.describe()))
+        elif parts.path == "/stats":
+            self._send(200, _dumps(dict(self.server.stats(), cache=engine.cache.stats())))
+        else:
+            self._error(404, f"Rota desconhecida: {parts.path}")
+
+    def _query(self, params: Dict[str, str]):
+        t0 = time.perf_counter()
+        missing = [k for k in ("dataset", "start", "end") if k not in params]
+        if missing:
+            self._error(400, f"Parâmetros obrigatórios: {', '.join(missing)}")
+            return
+        dataset = params["dataset"]
+        try:
+            start, end = parse_time(params["start"]), parse_time(params["end"])
+            columns = params["columns"].split(",") if params.get("columns") else None
+            resolution = parse_resolution(params.get("resolution"))
+            df = self.server.engine.query(dataset, start, end, columns, resolution, params.get("station"),
+                                          params.get("stat", "mean"))
+        except KeyError:
+            self._error(404, f"Conjunto desconhecido: {dataset}")
+            return
+        except ValueError as e:
+            self._error(400, str(e))
+            return
+
+        time_col = df.columns[0] if len(df.columns) else TIME_COL
+        if params.get("format") == "arrow":
+            body, content_type = to_arrow(df), ARROW_CONTENT_TYPE
+        else:
+            meta = {"dataset": dataset, "start": start.isoformat(), "end": end.isoformat(),
+                    "resolution": params.get("resolution") or "raw", "time_col": time_col}
+            body, content_type = to_json(df, time_col, meta), "application/json"
+        self._send(200, body, content_type)
+        self.server.record(time.perf_counter() - t0)
+
+
+def _dumps(payload: dict) -> bytes:
+    body = _json.dumps(payload)
+    return body if isinstance(body, bytes) else body.encode("utf-8")
+
+
+class QueryServer:
+    """
+    Serviço HTTP somente leitura sobre `QueryEngine`, uma thread por conexão; use como
+    context manager ou chame `serve_forever`.
+
+    Args:
+        data_dir (str): Pasta de dados do pipeline.
+        host (str): Endereço de escuta. Defaults para localhost.
+        port (int): Porta (0 escolhe uma porta livre).
+        cache_mb (int): Memória máxima do cache de partições, em MB.
+    """
+
+    def __init__(self, data_dir: str = "data", host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 cache_mb: int = DEFAULT_CACHE_MB):
+        self.httpd = ThreadingHTTPServer((host, port), QueryHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.engine = QueryEngine(data_dir, PartitionCache(cache_mb << 20))
+        self._latencies: List[float] = []
+        self._lock = threading.Lock()
+        self.httpd.record = self._record
+        self.httpd.stats = self.stats
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _record(self, elapsed: float) -> None:
+        with self._lock:
+            self._latencies.append(elapsed)
+            if len(self._latencies) > 10000:
+                del self._latencies[:5000]
+
+    def stats(self) -> dict:
+        """Consultas atendidas recentemente e seus percentis de latência (ms, dentro do servidor)."""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+        if not len(latencies):
+            return {"queries": 0}
+        return {"queries": len(latencies), "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                "p99_ms": round(float(np.percentile(latencies, 99)), 3)}
+
+    def serve_forever(self) -> None:
+        self.httpd.serve_forever()
+
+    def shutdown(self) -> None:
+        self.httpd.shutdown()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serviço local de consultas por intervalo de tempo.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-mb", type=int, default=DEFAULT_CACHE_MB)
+    args = parser.parse_args(argv)
+
+    server = QueryServer(args.data_dir, args.host, args.port, args.cache_mb)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"Servindo {args.data_dir} em {server.url} (cache de {args.cache_mb} MB)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.httpd.server_close()
+    print("Serviço de consultas encerrado.")
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.query_service --data-dir data --port 8765
+    main()
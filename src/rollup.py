@@ -0,0 +1,277 @@
+import glob
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.processing import STATION_COLUMNS
+from src.storage import list_partitions, read_partitioned, write_partitioned
+
+DEFAULT_ROLLUP_DIR = os.path.join("data", "rollup")
+DEFAULT_OVERLAP = timedelta(hours=2)
+STATS = ["mean", "min", "max", "count"]
+TIME_COL = "datetime"
+
+# Níveis da pirâmide, do mais fino ao mais grosso: (nome, passo, partição)
+LEVELS = [
+    ("1min", pd.Timedelta(minutes=1), "M"),
+    ("10min", pd.Timedelta(minutes=10), "M"),
+    ("1h", pd.Timedelta(hours=1), "Y"),
+    ("1d", pd.Timedelta(days=1), "Y"),
+]
+LEVEL_NAMES = [name for name, _, _ in LEVELS]
+
+
+def level_dir(station: str, level: str, root: str = DEFAULT_ROLLUP_DIR) -> str:
+    return os.path.join(root, station, level)
+
+
+def _level(name: str):
+    for level in LEVELS:
+        if level[0] == name:
+            return level
+    raise ValueError(f"Nível desconhecido: {name}. Use um de {LEVEL_NAMES}.")
+
+
+def raw_as_stats(df: pd.DataFrame, types: List[str]) -> pd.DataFrame:
+    """Trata cada valor de 1 minuto como um agregado de uma amostra."""
+    parts = {}
+    for t in types:
+        values = df[t]
+        parts[f"{t}_mean"] = values
+        parts[f"{t}_min"] = values
+        parts[f"{t}_max"] = values
+        parts[f"{t}_count"] = values.notna().astype(np.int32)
+    return pd.DataFrame(parts, index=df.index)
+
+
+def aggregate(stats: pd.DataFrame, step: pd.Timedelta, types: List[str]) -> pd.DataFrame:
+    """
+    Agrega um nível da pirâmide para um passo maior.
+
+    Média, mínimo, máximo e contagem são combináveis: a média do nível superior é a
+    média das médias ponderada pelas contagens, então cada nível é calculado a partir
+    do anterior sem voltar aos dados brutos.
+
+    Args:
+        stats (pd.DataFrame): Nível de origem, indexado por tempo, com colunas `<tipo>_<estatística>`.
+        step (pd.Timedelta): Passo do nível de destino.
+        types (List[str]): Tipos de correção presentes.
+
+    Returns:
+        pd.DataFrame: Nível agregado, indexado pelo início de cada intervalo.
+    """
+    keys = stats.index.floor(step)
+    parts, how = {}, {}
+    for t in types:
+        count = stats[f"{t}_count"]
+        parts[f"{t}_sum"] = (stats[f"{t}_mean"] * count).fillna(0.0)
+        parts[f"{t}_min"] = stats[f"{t}_min"]
+        parts[f"{t}_max"] = stats[f"{t}_max"]
+        parts[f"{t}_count"] = count
+        how.update({f"{t}_sum": "sum", f"{t}_min": "min", f"{t}_max": "max", f"{t}_count": "sum"})
+
+    grouped = pd.DataFrame(parts, index=stats.index).groupby(keys).agg(how)
+    out = {}
+    for t in types:
+        count = grouped[f"{t}_count"].astype(np.int32)
+        out[f"{t}_mean"] = grouped[f"{t}_sum"].where(count > 0) / count.where(count > 0)
+        out[f"{t}_min"] = grouped[f"{t}_min"]
+        out[f"{t}_max"] = grouped[f"{t}_max"]
+        out[f"{t}_count"] = count
+    result = pd.DataFrame(out, index=grouped.index)
+    result.index.name = TIME_COL
+    return result
+
+
+def pyramid_watermark(station: str, root: str = DEFAULT_ROLLUP_DIR) -> Optional[pd.Timestamp]:
+    """Último instante de 1 minuto já incorporado à pirâmide da estação."""
+    partitions = list_partitions(level_dir(station, "1min", root))
+    if not partitions:
+        return None
+    last = pd.read_parquet(partitions[-1], columns=[TIME_COL])
+    return last[TIME_COL].max() if not last.empty else None
+
+
+def update_pyramid(
+    station: str,
+    df: pd.DataFrame,
+    root: str = DEFAULT_ROLLUP_DIR,
+    since: Optional[datetime] = None,
+    overlap: timedelta = DEFAULT_OVERLAP
+) -> int:
+    """
+    Incorpora dados de 1 minuto da estação à pirâmide de agregados.
+
+    Só as linhas a partir de `since` são consideradas (por padrão, a marca d'água da
+    pirâmide menos `overlap`, para acompanhar correções tardias do NEST). Cada nível
+    superior é recalculado apenas nos dias afetados, a partir do nível imediatamente
+    abaixo, e só as partições desses dias são regravadas.
+
+    Args:
+        station (str): Código da estação.
+        df (pd.DataFrame): Saída de `load_station_data` (indexada por datetime).
+        root (str): Pasta da pirâmide.
+        since (datetime, optional): Início das linhas a incorporar.
+        overlap (timedelta): Quanto reprocessar antes da marca d'água.
+
+    Returns:
+        int: Número de linhas de 1 minuto incorporadas.
+    """
+    if since is None:
+        watermark = pyramid_watermark(station, root)
+        since = watermark - overlap if watermark is not None else None
+    if since is not None:
+        df = df[df.index >= pd.Timestamp(since)]
+    if df.empty:
+        return 0
+
+    types = [t for t in STATION_COLUMNS if t in df.columns]
+    raw = df[types].copy()
+    raw.index = raw.index.astype("datetime64[ns]")
+    raw.index.name = TIME_COL
+    write_partitioned(raw.reset_index(), level_dir(station, "1min", root), TIME_COL, freq="M", keep="last")
+
+    # Recalcula os níveis superiores só nos dias afetados (do primeiro ao último)
+    start = raw.index.min().floor("1D")
+    end = raw.index.max().floor("1D") + pd.Timedelta(days=1) - pd.Timedelta(minutes=1)
+    below = raw_as_stats(read_level(station, "1min", root, start=start, end=end), types)
+    for name, step, freq in LEVELS[1:]:
+        level = aggregate(below, step, types)
+        write_partitioned(level.reset_index(), level_dir(station, name, root), TIME_COL, freq=freq, keep="last")
+        below = level
+    return len(raw)
+
+
+def read_level(
+    station: str,
+    level: str,
+    root: str = DEFAULT_ROLLUP_DIR,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Lê um nível da pirâmide no intervalo [start, end], indexado por tempo."""
+    _, _, freq = _level(level)
+    df = read_partitioned(level_dir(station, level, root), TIME_COL, start, end, columns, freq)
+    if df.empty:
+        return pd.DataFrame(columns=columns or []).rename_axis(TIME_COL)
+    return df.set_index(TIME_COL)
+
+
+def choose_level(start: datetime, end: datetime, max_points: int) -> str:
+    """
+    Escolhe o nível mais fino cujo número de pontos em [start, end] cabe em `max_points`.
+
+    Se nem o nível diário couber, retorna o diário.
+    """
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for name, step, _ in LEVELS:
+        if span / step <= max_points:
+            return name
+    return LEVEL_NAMES[-1]
+
+
+def query(
+    station: str,
+    start: datetime,
+    end: datetime,
+    max_points: int = 2000,
+    types: Optional[List[str]] = None,
+    stats: Optional[List[str]] = None,
+    level: Optional[str] = None,
+    root: str = DEFAULT_ROLLUP_DIR
+) -> pd.DataFrame:
+    """
+    Consulta a série agregada de uma estação no nível adequado ao intervalo.
+
+    Args:
+        station (str): Código da estação.
+        start (datetime): Início do intervalo.
+        end (datetime): Fim do intervalo (inclusivo).
+        max_points (int): Máximo de pontos desejado; define o nível (ver `choose_level`).
+        types (List[str], optional): Tipos de correção. Defaults para STATION_COLUMNS.
+        stats (List[str], optional): Estatísticas (mean, min, max, count). Defaults para todas.
+        level (str, optional): Força um nível específico.
+        root (str): Pasta da pirâmide.
+
+    Returns:
+        pd.DataFrame: Colunas MultiIndex (tipo, estatística), indexado por tempo;
+        o nível usado fica em `df.attrs["level"]`.
+    """
+    types = types or STATION_COLUMNS
+    stats = stats or STATS
+    level = level or choose_level(start, end, max_points)
+
+    if level == "1min":
+        df = read_level(station, level, root, start, end, columns=types)
+        df = raw_as_stats(df, [t for t in types if t in df.columns])
+    else:
+        columns = [f"{t}_{s}" for t in types for s in stats]
+        df = read_level(station, level, root, start, end, columns=columns)
+
+    df = df[[f"{t}_{s}" for t in types for s in stats if f"{t}_{s}" in df.columns]]
+    df.columns = pd.MultiIndex.from_tuples([tuple(c.rsplit("_", 1)) for c in df.columns], names=["type", "stat"])
+    df.attrs["level"] = level
+    return df
+
+
+def overview(
+    stations: List[str],
+    start: datetime,
+    end: datetime,
+    max_points: int = 2000,
+    types: Optional[List[str]] = None,
+    stat: str = "mean",
+    root: str = DEFAULT_ROLLUP_DIR
+) -> pd.DataFrame:
+    """
+    Visão geral de várias estações a partir da pirâmide, sem ler os dados brutos.
+
+    Args:
+        stations (List[str]): Estações.
+        start (datetime): Início do intervalo.
+        end (datetime): Fim do intervalo (inclusivo).
+        max_points (int): Máximo de pontos por série.
+        types (List[str], optional): Tipos de correção. Defaults para STATION_COLUMNS.
+        stat (str): Estatística a usar em cada ponto.
+        root (str): Pasta da pirâmide.
+
+    Returns:
+        pd.DataFrame: Colunas MultiIndex (station, type), no mesmo formato usado pelos gráficos.
+    """
+    level = choose_level(start, end, max_points)
+    frames: Dict[str, pd.DataFrame] = {}
+    for station in stations:
+        df = query(station, start, end, types=types, stats=[stat], level=level, root=root)
+        if not df.empty:
+            frames[station] = df.xs(stat, axis=1, level="stat")
+
+    if not frames:
+        return pd.DataFrame()
+    combined = pd.concat(frames.values(), axis=1, keys=frames.keys())
+    combined.columns.names = ["station", "type"]
+    combined.attrs["level"] = level
+    return combined
+
+
+def build_all(station_dir: str, root: str = DEFAULT_ROLLUP_DIR) -> None:
+    """Atualiza a pirâmide de todas as estações a partir dos arquivos em `station_dir`."""
+    from src.cache import cached_load_station_data
+
+    # Cache de leitura na pasta de dados que contém `station_dir` (ex.: data/data_station -> data)
+    data_dir = os.path.dirname(os.path.normpath(station_dir))
+    for path in sorted(glob.glob(os.path.join(station_dir, "*.txt"))):
+        station = os.path.basename(path).split("_")[0]
+        t0 = time.perf_counter()
+        n = update_pyramid(station, cached_load_station_data(path, data_dir=data_dir), root)
+        print(f"{station}: {n} linhas incorporadas à pirâmide ({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.rollup [pasta_das_estacoes]
+    build_all(sys.argv[1] if len(sys.argv) > 1 else os.path.join("data", "data_station"))
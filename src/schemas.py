@@ -0,0 +1,130 @@
+import fnmatch
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class DatasetSchema:
+    """
+    Tipos de um conjunto de dados armazenado.
+
+    Tempos ficam em datetime64[ns] UTC sem timezone (valores com timezone são
+    convertidos para UTC). Campos de poucos valores distintos são categóricos;
+    números usam float32/int16 quando a precisão da fonte permite.
+
+    Attributes:
+        name (str): Nome do conjunto.
+        time_col (str): Coluna (ou nome do índice) de tempo.
+        columns (Dict[str, str]): Tipo de cada coluna conhecida ("float32", "int16",
+            "category", "bool").
+        numeric (str, optional): Tipo das colunas numéricas não listadas: "compact"
+            (float32 para reais; int16, ou int32 se não couber, para inteiros) ou None
+            para não alterar.
+        stores (List[str]): Padrões (fnmatch) dos nomes das pastas de armazenamento
+            que seguem este esquema.
+    """
+    name: str
+    time_col: str
+    columns: Dict[str, str] = field(default_factory=dict)
+    numeric: Optional[str] = "compact"
+    stores: List[str] = field(default_factory=list)
+
+
+SCHEMAS: Dict[str, DatasetSchema] = {
+    schema.name: schema for schema in [
+        DatasetSchema("goes", "time_tag",
+                      {"satellite": "int16", "energy": "category", "flux": "float32"},
+                      stores=["goes_protons"]),
+        DatasetSchema("kp_1m", "time_tag",
+                      {"kp_index": "int16", "estimated_kp": "float32", "kp": "category"},
+                      stores=["kp_index_1min"]),
+        # Kp e os demais índices do GFZ (ap, Hp30, SN...), uma coluna de valores cada
+        DatasetSchema("kp_gfz", "datetime", {"Kp": "float32", "status": "category"},
+                      stores=["dados_kp_gfz", "dados_*_gfz"]),
+        DatasetSchema("ace_epam", "time_tag", {"active": "bool"}, stores=["ace_epam_5m"]),
+        DatasetSchema("ace_mag", "time_tag", {"active": "bool"}, stores=["ace_mag_1h"]),
+        DatasetSchema("ace_sis", "time_tag", {"active": "bool"}, stores=["ace_sis_5m"]),
+        DatasetSchema("ace_swepam", "time_tag", {"active": "bool"}, stores=["ace_swepam_1h"]),
+        # Saída de `load_station_data`: contagens com 3 casas decimais (e a pressão em mbar,
+        # no modo de correção local), indexadas por tempo
+        DatasetSchema("station", "datetime",
+                      {"RCORR_E": "float32", "RUNCORR": "float32", "RCORR_P": "float32", "PRESS": "float32"}),
+    ]
+}
+
+
+def schema_for_store(root: str) -> Optional[DatasetSchema]:
+    """Esquema da pasta de armazenamento `root` (pelo nome da pasta), se houver."""
+    name = os.path.basename(os.path.normpath(root))
+    for schema in SCHEMAS.values():
+        if any(fnmatch.fnmatch(name, pattern) for pattern in schema.stores):
+            return schema
+    return None
+
+
+def _as_utc_ns(values):
+    # Valores sem timezone já são UTC (só a resolução muda); com timezone, são convertidos
+    if pd.api.types.is_datetime64_dtype(values.dtype):
+        return values.astype("datetime64[ns]")
+    times = pd.to_datetime(values, utc=True)
+    times = times.tz_localize(None) if isinstance(times, pd.DatetimeIndex) else times.dt.tz_localize(None)
+    return times.astype("datetime64[ns]")
+
+
+def _compact_integer(s: pd.Series) -> str:
+    if s.empty:
+        return "int16"
+    info = np.iinfo(np.int16)
+    return "int16" if info.min <= s.min() and s.max() <= info.max else "int32"
+
+
+def _cast(s: pd.Series, dtype: str) -> pd.Series:
+    if dtype.startswith("int") and s.isna().any():
+        # Inteiros com falhas: tipo inteiro com suporte a NA
+        return s.astype(dtype.capitalize())
+    if dtype == "bool" and s.isna().any():
+        return s.astype("boolean")
+    return s.astype(dtype)
+
+
+def enforce(df: pd.DataFrame, schema: Optional[DatasetSchema]) -> pd.DataFrame:
+    """
+    Converte `df` para os tipos de `schema` (sem cópia das colunas que já estão no tipo certo).
+
+    Args:
+        df (pd.DataFrame): Registros (coluna de tempo como coluna ou como índice).
+        schema (DatasetSchema, optional): Esquema; None devolve `df` inalterado.
+
+    Returns:
+        pd.DataFrame: Registros com os tipos do esquema.
+    """
+    if schema is None or df is None:
+        return df
+    df = df.copy(deep=False)
+
+    if df.index.name == schema.time_col and isinstance(df.index, pd.DatetimeIndex):
+        if df.index.dtype != "datetime64[ns]":
+            df.index = pd.DatetimeIndex(_as_utc_ns(df.index), name=schema.time_col)
+    elif schema.time_col in df.columns and df[schema.time_col].dtype != "datetime64[ns]":
+        df[schema.time_col] = _as_utc_ns(df[schema.time_col])
+
+    for col in df.columns:
+        if col == schema.time_col:
+            continue
+        s = df[col]
+        dtype = schema.columns.get(col)
+        if dtype is None and schema.numeric == "compact" and pd.api.types.is_numeric_dtype(s) \
+                and not pd.api.types.is_bool_dtype(s):
+            dtype = _compact_integer(s) if pd.api.types.is_integer_dtype(s) else "float32"
+        if dtype is not None and str(s.dtype) != dtype:
+            df[col] = _cast(s, dtype)
+    return df
+
+
+def footprint(df: pd.DataFrame) -> int:
+    """Memória ocupada pelo DataFrame, em bytes (inclui o conteúdo das strings)."""
+    return int(df.memory_usage(index=True, deep=True).sum())
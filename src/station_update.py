@@ -0,0 +1,339 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+from src.download import (
+    DEFAULT_WINDOW,
+    MIN_WINDOW,
+    NEST_BASE_URL,
+    StationDownloadResult,
+    _host_semaphore,
+    fetch_station_windows,
+    get_session,
+)
+from src.processing import _locate_data_block, map_header_columns
+
+WATERMARK_SUFFIX = ".watermark.json"
+DEFAULT_OVERLAP = timedelta(hours=2)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_ROW_PATTERN = re.compile(rb"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2};")
+
+
+def utc_now() -> datetime:
+    """Instante atual em UTC, sem timezone (mesma convenção dos arquivos do NEST)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None, second=0, microsecond=0)
+
+
+def _watermark_path(file_path: str) -> str:
+    return file_path + WATERMARK_SUFFIX
+
+
+def _scan_tail(file_path: str, cutoff: Optional[bytes] = None, block: int = 1 << 16):
+    """
+    Percorre o arquivo de trás para frente, linha a linha, sem lê-lo inteiro.
+
+    Sem `cutoff`, devolve (offset, timestamp) da última linha de dados.
+    Com `cutoff`, devolve o offset logo após a última linha anterior a `cutoff`
+    (ou após o cabeçalho `start_date_time`, se todas forem posteriores).
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        while True:
+            start = max(0, size - block)
+            f.seek(start)
+            data = f.read(size - start)
+            lines = data.split(b"\n")
+            if start > 0:
+                # A primeira linha do bloco pode estar incompleta
+                lines = lines[1:]
+
+            line_end = size
+            for line in reversed(lines):
+                stripped = line.strip()
+                if _ROW_PATTERN.match(stripped):
+                    ts = stripped[:19]
+                    if cutoff is None:
+                        return line_end, ts.decode("ascii")
+                    if ts < cutoff:
+                        return min(line_end + 1, size), ts.decode("ascii")
+                elif stripped.startswith(b"start_date_time"):
+                    return min(line_end + 1, size), None
+                line_end -= len(line) + 1
+
+            if start == 0:
+                raise ValueError(f"Formato inesperado em {file_path}: cabeçalho 'start_date_time' não encontrado.")
+            block *= 4
+
+
+def row_offset(file_path: str, when: datetime) -> int:
+    """Posição (em bytes) da primeira linha de dados com timestamp >= `when`, lendo só o final do arquivo."""
+    offset, _ = _scan_tail(file_path, cutoff=when.strftime(TIMESTAMP_FORMAT).encode("ascii"))
+    return offset
+
+
+def read_watermark(file_path: str) -> Optional[datetime]:
+    """
+    Retorna a marca d'água (timestamp mais recente armazenado) do arquivo da estação.
+
+    Usa o arquivo auxiliar `<arquivo>.watermark.json`; se ele não existir, lê apenas o
+    final do arquivo de dados.
+
+    Args:
+        file_path (str): Arquivo da estação.
+
+    Returns:
+        datetime, optional: Último timestamp, ou None se não houver arquivo ou dados.
+    """
+    if not os.path.exists(file_path):
+        return None
+
+    sidecar = _watermark_path(file_path)
+    if os.path.exists(sidecar):
+        with open(sidecar, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        stat = os.stat(file_path)
+        if meta.get("size") == stat.st_size and meta.get("watermark"):
+            return datetime.strptime(meta["watermark"], TIMESTAMP_FORMAT)
+
+    try:
+        _, ts = _scan_tail(file_path)
+    except ValueError:
+        return None
+    return datetime.strptime(ts, TIMESTAMP_FORMAT) if ts else None
+
+
+def write_watermark(file_path: str, watermark: datetime) -> None:
+    meta = {
+        "watermark": watermark.strftime(TIMESTAMP_FORMAT),
+        "size": os.path.getsize(file_path),
+        "updated_at": utc_now().strftime(TIMESTAMP_FORMAT),
+    }
+    with open(_watermark_path(file_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def merge_station_rows(file_path: str, header: List[str], rows: List[str]) -> int:
+    """
+    Incorpora novas linhas ao arquivo da estação, substituindo as que se sobrepõem.
+
+    As linhas existentes a partir do primeiro timestamp novo são descartadas (correções
+    tardias do NEST prevalecem) truncando o arquivo nesse ponto; o restante do histórico
+    não é lido nem regravado.
+
+    Args:
+        file_path (str): Arquivo da estação.
+        header (List[str]): Cabeçalho usado se o arquivo ainda não existir.
+        rows (List[str]): Novas linhas de dados, ordenadas.
+
+    Returns:
+        int: Número de linhas gravadas.
+    """
+    if not rows:
+        return 0
+
+    if not os.path.exists(file_path):
+        with open(file_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write("\n".join(header))
+            f.write("\n")
+    else:
+        # Linhas com outras colunas (ex.: troca para o modo de correção local) não se misturam
+        names = next((line.split() for line in header if line.lstrip().startswith("start_date_time")), None)
+        columns, _, _ = _locate_data_block(file_path)
+        if names is not None and map_header_columns(names[1:]) != columns:
+            raise ValueError(f"{file_path} tem as colunas {columns}, diferentes das baixadas "
+                             f"({map_header_columns(names[1:])}); use outro arquivo ou pasta.")
+        cut, _ = _scan_tail(file_path, cutoff=rows[0][:19].encode("ascii"))
+        with open(file_path, "r+b") as f:
+            f.truncate(cut)
+            if cut > 0:
+                f.seek(cut - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    # Arquivos antigos (página HTML) perdem o rodapé </code></pre> no truncamento acima
+    with open(file_path, "a", encoding="utf-8", newline="\n") as f:
+        for line in rows:
+            f.write(line)
+            f.write("\n")
+
+    write_watermark(file_path, datetime.strptime(rows[-1][:19], TIMESTAMP_FORMAT))
+    return len(rows)
+
+
+def insert_station_rows(file_path: str, rows: List[str]) -> int:
+    """
+    Intercala linhas em qualquer ponto do arquivo da estação (preenchimento de falhas).
+
+    Só o trecho a partir do primeiro timestamp novo é lido e regravado: as linhas
+    existentes desse trecho são intercaladas com as novas, que prevalecem em timestamps
+    repetidos. Linhas que não são de dados (rodapé HTML de arquivos antigos) são descartadas.
+
+    Args:
+        file_path (str): Arquivo da estação (já existente).
+        rows (List[str]): Novas linhas de dados.
+
+    Returns:
+        int: Número de linhas novas gravadas.
+    """
+    if not rows:
+        return 0
+
+    merged = {}
+    cut = row_offset(file_path, datetime.strptime(min(rows)[:19], TIMESTAMP_FORMAT))
+    with open(file_path, "r+b") as f:
+        f.seek(cut)
+        for line in f.read().split(b"\n"):
+            stripped = line.strip()
+            if _ROW_PATTERN.match(stripped):
+                merged[stripped[:19]] = stripped
+        merged.update((row[:19].encode("ascii"), row.encode("utf-8")) for row in rows)
+
+        f.seek(cut)
+        f.truncate()
+        if cut > 0:
+            f.seek(cut - 1)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        f.write(b"\n".join(merged[ts] for ts in sorted(merged)))
+        f.write(b"\n")
+
+    last = max(merged)
+    watermark = read_watermark(file_path)
+    ts = datetime.strptime(last.decode("ascii"), TIMESTAMP_FORMAT)
+    write_watermark(file_path, max(ts, watermark) if watermark else ts)
+    return len(rows)
+
+
+def update_station(
+    station_code: str,
+    file_path: str,
+    default_start: datetime,
+    end_date: Optional[datetime] = None,
+    overlap: timedelta = DEFAULT_OVERLAP,
+    include_types: Optional[List[str]] = None,
+    base_url: str = NEST_BASE_URL,
+    session: Optional[requests.Session] = None,
+    timeout: float = 120,
+    window: timedelta = DEFAULT_WINDOW,
+    max_workers: int = 4,
+    semaphore=None
+) -> StationDownloadResult:
+    """
+    Atualiza o arquivo da estação baixando apenas o intervalo posterior à marca d'água.
+
+    Consulta `(marca d'água - overlap, end_date]`; o `overlap` recupera correções tardias
+    do NEST. Sem arquivo local, baixa a partir de `default_start`.
+
+    Args:
+        station_code (str): Código da estação (ex: "OULU").
+        file_path (str): Arquivo da estação.
+        default_start (datetime): Início usado quando ainda não há dados locais.
+        end_date (datetime, optional): Fim do intervalo. Defaults para agora (UTC).
+        overlap (timedelta): Quanto reconsultar antes da marca d'água.
+        include_types (List[str], optional): Tipos de dados desejados.
+        base_url (str): Endereço do draw_graph.php.
+        session (requests.Session, optional): Sessão HTTP. Defaults para a sessão compartilhada.
+        timeout (float): Tempo máximo de espera por resposta, em segundos.
+        window (timedelta): Tamanho das janelas de consulta.
+        max_workers (int): Janelas simultâneas.
+
+    Returns:
+        StationDownloadResult: Resultado; `n_bytes` mostra o volume realmente transferido.
+    """
+    end_date = end_date or utc_now()
+    watermark = read_watermark(file_path)
+    start_date = max(watermark - overlap, default_start) if watermark else default_start
+
+    t0 = time.perf_counter()
+    if start_date >= end_date:
+        return StationDownloadResult(station_code, file_path, "ok", elapsed=0.0)
+
+    print(f"🔗 Atualizando {station_code} desde {start_date:%Y-%m-%d %H:%M}...")
+    header, rows, n_bytes = fetch_station_windows(
+        station_code, start_date, end_date, include_types, base_url,
+        session or get_session(), timeout, window, MIN_WINDOW, max_workers, semaphore
+    )
+    elapsed = time.perf_counter() - t0
+
+    if not rows:
+        status = "ok" if watermark else "no_data"
+        print(f"Nenhum dado novo para {station_code}.")
+        return StationDownloadResult(station_code, file_path, status, n_bytes=n_bytes, elapsed=elapsed)
+
+    n = merge_station_rows(file_path, header, rows)
+    print(f"{station_code}: {n} linhas incorporadas em {file_path}")
+    return StationDownloadResult(
+        station_code, file_path, "ok", http_status=200, n_bytes=n_bytes, elapsed=elapsed
+    )
+
+
+def update_stations(
+    stations: List[str],
+    output_dir: str,
+    default_start: datetime,
+    end_date: Optional[datetime] = None,
+    overlap: timedelta = DEFAULT_OVERLAP,
+    include_types: Optional[List[str]] = None,
+    max_workers: int = 8,
+    max_per_host: int = 4,
+    base_url: str = NEST_BASE_URL,
+    timeout: float = 120,
+    filename_template: str = "{station}_{year}.txt",
+    window: timedelta = DEFAULT_WINDOW
+) -> Dict[str, StationDownloadResult]:
+    """
+    Atualiza várias estações em paralelo a partir das respectivas marcas d'água.
+
+    Args:
+        stations (List[str]): Códigos das estações.
+        output_dir (str): Pasta dos arquivos das estações.
+        default_start (datetime): Início usado para estações ainda sem dados locais
+            (também define o ano no nome do arquivo).
+        end_date (datetime, optional): Fim do intervalo. Defaults para agora (UTC).
+        overlap (timedelta): Quanto reconsultar antes de cada marca d'água.
+        include_types (List[str], optional): Tipos de dados desejados.
+        max_workers (int): Estações atualizadas simultaneamente.
+        max_per_host (int): Máximo de requisições simultâneas ao NEST.
+        base_url (str): Endereço do draw_graph.php.
+        timeout (float): Tempo máximo de espera por resposta, em segundos.
+        filename_template (str): Modelo do nome do arquivo (`station` e `year` disponíveis).
+        window (timedelta): Tamanho das janelas de consulta.
+
+    Returns:
+        Dict[str, StationDownloadResult]: Resultado por estação, na ordem de `stations`.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    end_date = end_date or utc_now()
+    session = get_session(pool_maxsize=max(max_workers, max_per_host))
+    semaphore = _host_semaphore(base_url, max_per_host)
+
+    def worker(station: str) -> StationDownloadResult:
+        filename = filename_template.format(station=station, year=default_start.year)
+        file_path = os.path.join(output_dir, filename)
+        try:
+            return update_station(
+                station, file_path, default_start, end_date, overlap, include_types,
+                base_url, session, timeout, window, 2, semaphore
+            )
+        except Exception as e:
+            print(f"[ERRO] Falha ao atualizar {station}: {e}")
+            return StationDownloadResult(station, file_path, "error", error=str(e))
+
+    results: Dict[str, StationDownloadResult] = {}
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(worker, station): station for station in stations}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    ordered = {station: results[station] for station in stations}
+    total_bytes = sum(r.n_bytes for r in ordered.values())
+    print(f"\n{len(stations)} estações atualizadas em {time.perf_counter() - t0:.1f}s ({total_bytes / 1e6:.2f} MB)")
+    return ordered
@@ -0,0 +1,276 @@
+import glob
+import os
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+
+from src.schemas import enforce, schema_for_store
+
+# Colunas de tempo conhecidas nos arquivos gerados pelos extratores
+TIME_COLUMNS = ["time_tag", "datetime", "timestamp", "time", "date"]
+
+PARTITION_FORMATS = {
+    "M": "%Y-%m",
+    "Y": "%Y",
+}
+
+
+def store_dir(save_path: str) -> str:
+    """
+    Pasta do armazenamento particionado correspondente a um arquivo .xlsx.
+
+    Ex.: "data/data_goes/goes_protons.xlsx" -> "data/data_goes/goes_protons".
+    """
+    return os.path.splitext(save_path)[0]
+
+
+def detect_time_column(df: pd.DataFrame) -> Optional[str]:
+    for col in df.columns:
+        if str(col).lower() in TIME_COLUMNS:
+            return col
+    return None
+
+
+def list_partitions(root: str) -> List[str]:
+    """Lista os arquivos de partição de um armazenamento, em ordem cronológica."""
+    return sorted(glob.glob(os.path.join(root, "*.parquet")))
+
+
+def partitions_in_range(
+    root: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    freq: str = "M"
+) -> List[str]:
+    """Partições que podem conter registros em [start, end], em ordem cronológica."""
+    paths = list_partitions(root)
+    fmt = PARTITION_FORMATS[freq]
+    if start is not None:
+        paths = [p for p in paths if os.path.basename(p)[:-8] >= start.strftime(fmt)]
+    if end is not None:
+        paths = [p for p in paths if os.path.basename(p)[:-8] <= end.strftime(fmt)]
+    return paths
+
+
+def last_timestamp(root: str, time_col: str) -> Optional[pd.Timestamp]:
+    """Instante mais recente armazenado, lendo apenas a coluna de tempo da última partição."""
+    for path in reversed(list_partitions(root)):
+        df = pd.read_parquet(path, columns=[time_col])
+        if not df.empty:
+            return df[time_col].max()
+    return None
+
+
+def _partition_labels(times: pd.Series, freq: str) -> pd.Series:
+    return times.dt.strftime(PARTITION_FORMATS[freq])
+
+
+def _write_atomic(df: pd.DataFrame, path: str, time_col: Optional[str] = None) -> None:
+    tmp_path = path + ".tmp"
+    # Tempos ordenados em cadência regular ocupam quase nada com codificação delta
+    # (que exige desligar o dicionário nessa coluna); zstd no restante
+    encoding = {}
+    if time_col is not None:
+        encoding = {"use_dictionary": [c for c in df.columns if c != time_col],
+                    "column_encoding": {time_col: "DELTA_BINARY_PACKED"}}
+    df.to_parquet(tmp_path, index=False, compression="zstd", **encoding)
+    os.replace(tmp_path, path)
+
+
+def write_partitioned(
+    df: pd.DataFrame,
+    root: str,
+    time_col: str,
+    keys: Optional[List[str]] = None,
+    freq: str = "M",
+    keep: str = "first"
+) -> int:
+    """
+    Grava novos registros em um armazenamento particionado por tempo (Parquet).
+
+    Apenas as partições que se sobrepõem aos novos dados são lidas e regravadas;
+    o restante do histórico não é tocado. Os tipos seguem o esquema da pasta
+    (`src.schemas`), se houver.
+
+    Args:
+        df (pd.DataFrame): Novos registros.
+        root (str): Pasta do armazenamento.
+        time_col (str): Coluna de tempo usada para particionar e ordenar.
+        keys (List[str], optional): Colunas que identificam um registro. Defaults para [time_col].
+        freq (str): "M" para partições mensais ou "Y" para anuais.
+        keep (str): Qual registro manter em caso de duplicata ("first" mantém o já armazenado).
+
+    Returns:
+        int: Número de partições gravadas.
+    """
+    if freq not in PARTITION_FORMATS:
+        raise ValueError(f"Frequência de partição inválida: {freq}")
+
+    keys = keys or [time_col]
+    schema = schema_for_store(root)
+    df = enforce(df[df[time_col].notna()], schema)
+    if df.empty:
+        return 0
+
+    os.makedirs(root, exist_ok=True)
+    labels = _partition_labels(df[time_col], freq)
+
+    written = 0
+    for label, df_part in df.groupby(labels, sort=True):
+        path = os.path.join(root, f"{label}.parquet")
+        if os.path.exists(path):
+            df_existing = pd.read_parquet(path)
+            frames = [frame for frame in (df_existing, df_part) if not frame.empty]
+            df_part = enforce(pd.concat(frames, ignore_index=True), schema)
+        df_part = df_part.drop_duplicates(subset=keys, keep=keep)
+        df_part = df_part.sort_values(time_col, kind="stable")
+        _write_atomic(df_part, path, time_col)
+        written += 1
+
+    return written
+
+
+def read_partitioned(
+    root: str,
+    time_col: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    columns: Optional[List[str]] = None,
+    freq: str = "M"
+) -> pd.DataFrame:
+    """
+    Lê um armazenamento particionado, opcionalmente restrito ao intervalo [start, end],
+    com os tipos do esquema da pasta (`src.schemas`), se houver.
+
+    Args:
+        root (str): Pasta do armazenamento.
+        time_col (str, optional): Coluna de tempo (necessária para filtrar por intervalo).
+        start (datetime, optional): Início do intervalo.
+        end (datetime, optional): Fim do intervalo (inclusivo).
+        columns (List[str], optional): Colunas a carregar.
+        freq (str): Frequência de partição usada na gravação.
+
+    Returns:
+        pd.DataFrame: Registros ordenados por tempo.
+    """
+    paths = partitions_in_range(root, start, end, freq)
+
+    if columns is not None and time_col is not None and time_col not in columns:
+        columns = [time_col] + list(columns)
+
+    frames = [pd.read_parquet(p, columns=columns) for p in paths]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    df = enforce(pd.concat(frames, ignore_index=True), schema_for_store(root))
+    if time_col is not None:
+        if start is not None:
+            df = df[df[time_col] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df[time_col] <= pd.Timestamp(end)]
+    return df.reset_index(drop=True)
+
+
+def export_excel(root: str, save_path: str, time_col: Optional[str] = None) -> None:
+    """
+    Exporta o armazenamento particionado completo para um único arquivo Excel.
+
+    Args:
+        root (str): Pasta do armazenamento.
+        save_path (str): Caminho do .xlsx de saída.
+        time_col (str, optional): Coluna de ordenação.
+    """
+    df = read_partitioned(root)
+    if time_col is not None and not df.empty:
+        df = df.sort_values(time_col, kind="stable")
+    df.to_excel(save_path, index=False)
+    print(f"Exportado para Excel: {save_path}")
+
+
+def migrate_excel(
+    xlsx_path: str,
+    root: Optional[str] = None,
+    time_col: Optional[str] = None,
+    keys: Optional[List[str]] = None,
+    freq: str = "M"
+) -> int:
+    """
+    Migra um arquivo .xlsx existente para o armazenamento particionado.
+
+    Args:
+        xlsx_path (str): Arquivo Excel de origem.
+        root (str, optional): Pasta de destino. Defaults para `store_dir(xlsx_path)`.
+        time_col (str, optional): Coluna de tempo. Detectada automaticamente se omitida.
+        keys (List[str], optional): Colunas que identificam um registro.
+        freq (str): Frequência de partição.
+
+    Returns:
+        int: Número de partições gravadas.
+    """
+    root = root or store_dir(xlsx_path)
+    df = pd.read_excel(xlsx_path)
+    time_col = time_col or detect_time_column(df)
+    if not time_col:
+        print(f"[-] Coluna de tempo não encontrada em {xlsx_path}, pulando.")
+        return 0
+
+    df[time_col] = pd.to_datetime(df[time_col], errors="coerce")
+    if getattr(df[time_col].dt, "tz", None) is not None:
+        df[time_col] = df[time_col].dt.tz_localize(None)
+
+    n = write_partitioned(df, root, time_col, keys, freq)
+    print(f"Migrado: {xlsx_path} -> {root} ({len(df)} registros, {n} partições)")
+    return n
+
+
+def update_store(
+    df_new: pd.DataFrame,
+    save_path: str,
+    time_col: str,
+    keys: Optional[List[str]] = None,
+    export_xlsx: bool = False,
+    freq: str = "M"
+) -> int:
+    """
+    Atualiza o armazenamento particionado associado a `save_path` com novos registros.
+
+    Na primeira chamada, se ainda existir apenas o .xlsx antigo, ele é migrado antes.
+    O Excel só é regravado quando `export_xlsx` é True.
+
+    Args:
+        df_new (pd.DataFrame): Novos registros.
+        save_path (str): Caminho do .xlsx (define a pasta do armazenamento).
+        time_col (str): Coluna de tempo.
+        keys (List[str], optional): Colunas que identificam um registro. Defaults para [time_col].
+        export_xlsx (bool): Se True, exporta o histórico completo para `save_path`.
+        freq (str): Frequência de partição.
+
+    Returns:
+        int: Número de partições gravadas.
+    """
+    root = store_dir(save_path)
+    if not list_partitions(root) and os.path.exists(save_path):
+        migrate_excel(save_path, root, time_col, keys, freq)
+
+    n = write_partitioned(df_new, root, time_col, keys, freq)
+    if export_xlsx:
+        export_excel(root, save_path, time_col)
+    return n
+
+
+def migrate_all(data_dir: str = "data") -> None:
+    """Migra todos os .xlsx encontrados em `data_dir` que ainda não têm armazenamento particionado."""
+    for xlsx_path in sorted(glob.glob(os.path.join(data_dir, "**", "*.xlsx"), recursive=True)):
+        if list_partitions(store_dir(xlsx_path)):
+            print(f"Já migrado: {xlsx_path}")
+            continue
+        keys = ["time_tag", "satellite", "energy"] if os.path.basename(xlsx_path).startswith("goes") else None
+        migrate_excel(xlsx_path, keys=keys)
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.storage [pasta_de_dados]
+    migrate_all(sys.argv[1] if len(sys.argv) > 1 else "data")